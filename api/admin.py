@@ -0,0 +1,222 @@
+"""
+Admin-only operational endpoints (/admin/...).
+
+Every route requires the `X-Admin-Token` header to match HATCH_ADMIN_TOKEN.
+When no token is configured the admin surface answers 404, as if absent.
+"""
+
+import hmac
+import os
+from functools import wraps
+
+from flask import Blueprint, Response, request, jsonify
+
+from utils import logger, get_config, sampler
+
+logger_instance = logger
+
+admin = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+def require_admin(view):
+    """Reject requests without a valid admin token."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = get_config().admin_token
+        if not token:
+            return jsonify({"error": "Not found"}), 404
+        supplied = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            logger_instance.warning("Rejected admin request", path=request.path, remote_addr=request.remote_addr)
+            return jsonify({"error": "Forbidden"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin.route('/log_sampling', methods=['GET'])
+@require_admin
+def get_log_sampling():
+    """
+    Current per-event sample rates and the error collapse window.
+    """
+    return jsonify({"rates": sampler.get_rates(), "collapse_window": sampler.collapse_window}), 200
+
+
+@admin.route('/log_sampling', methods=['PUT', 'POST'])
+@require_admin
+def update_log_sampling():
+    """
+    Update sample rates at runtime.
+    Expects: {"rates": {"<event name>": <0..1>, ...}, "collapse_window": <seconds, optional>}
+    """
+    data = request.json or {}
+    try:
+        if 'rates' in data:
+            sampler.update_rates(data['rates'])
+        if 'collapse_window' in data:
+            sampler.collapse_window = float(data['collapse_window'])
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    logger_instance.info("Log sampling updated", rates=sampler.get_rates(), collapse_window=sampler.collapse_window)
+    return jsonify({"rates": sampler.get_rates(), "collapse_window": sampler.collapse_window}), 200
+
+
+@admin.route('/log_sampling/flush', methods=['POST'])
+@require_admin
+def flush_log_sampling():
+    """
+    Emit summaries for collapsed errors that are still pending.
+    """
+    sampler.flush()
+    return jsonify({"success": True}), 200
+
+
+@admin.route('/telemetry/flush', methods=['POST'])
+@require_admin
+def flush_telemetry():
+    """
+    Write buffered provider telemetry samples to the provider_telemetry table now.
+    """
+    from providers.telemetry import telemetry
+    try:
+        written = telemetry.flush_to_db()
+    except Exception as e:
+        logger_instance.error("Failed to flush provider telemetry", error=str(e))
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"success": True, "rows": written}), 200
+
+
+@admin.route('/profile/cpu', methods=['GET'])
+@require_admin
+def profile_cpu():
+    """
+    Sample this worker's thread stacks for N seconds and return collapsed stacks
+    (feed to flamegraph.pl, speedscope or inferno).
+    Query params: seconds (default 10, max 60), interval_ms (default 5), idle=true to keep idle threads.
+    Blocks the calling request thread for the duration.
+    """
+    from utils import profiling
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval_ms', 5)) / 1000
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if seconds <= 0 or seconds > profiling.MAX_PROFILE_SECONDS or interval <= 0:
+        return jsonify({"error": f"seconds must be in (0, {profiling.MAX_PROFILE_SECONDS}] and interval_ms > 0"}), 400
+
+    try:
+        stacks, passes = profiling.sample_stacks(seconds, interval, include_idle=request.args.get('idle') == 'true')
+    except profiling.ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+
+    logger_instance.info("CPU profile served", seconds=seconds, passes=passes, stacks=len(stacks))
+    return Response(profiling.collapsed_text(stacks), mimetype='text/plain', headers={
+        "Content-Disposition": f"attachment; filename=cpu-{os.getpid()}.folded",
+        "X-Profile-Samples": str(passes),
+    })
+
+
+@admin.route('/profile/memory', methods=['GET'])
+@require_admin
+def memory_status():
+    """
+    tracemalloc state: whether tracing, traced/peak bytes and stored snapshot ids.
+    """
+    from utils import profiling
+    return jsonify(profiling.memory_status()), 200
+
+
+@admin.route('/profile/memory/start', methods=['POST'])
+@require_admin
+def start_memory_tracing():
+    """
+    Start tracemalloc. Expects optional {"frames": <traceback depth, default 10>}.
+    Tracing slows allocations noticeably; stop it when done.
+    """
+    from utils import profiling
+    data = request.get_json(silent=True) or {}
+    try:
+        frames = int(data.get('frames', 10))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(profiling.start_tracemalloc(frames)), 200
+
+
+@admin.route('/profile/memory/stop', methods=['POST'])
+@require_admin
+def stop_memory_tracing():
+    """
+    Stop tracemalloc and discard stored snapshots.
+    """
+    from utils import profiling
+    return jsonify(profiling.stop_tracemalloc()), 200
+
+
+@admin.route('/profile/memory/snapshot', methods=['POST'])
+@require_admin
+def take_memory_snapshot():
+    """
+    Store a tracemalloc snapshot in this worker and return its id.
+    """
+    from utils import profiling
+    try:
+        snapshot_id = profiling.take_snapshot()
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"snapshot_id": snapshot_id, **profiling.memory_status()}), 200
+
+
+@admin.route('/profile/memory/diff', methods=['GET'])
+@require_admin
+def diff_memory_snapshots():
+    """
+    Allocation growth between two stored snapshots.
+    Query params: from, to (snapshot ids), key (lineno|filename|traceback, default lineno), limit (default 25).
+    """
+    from utils import profiling
+    key_type = request.args.get('key', 'lineno')
+    if key_type not in ('lineno', 'filename', 'traceback'):
+        return jsonify({"error": f"Invalid key: {key_type}"}), 400
+    try:
+        from_id = int(request.args['from'])
+        to_id = int(request.args['to'])
+        limit = int(request.args.get('limit', 25))
+    except (KeyError, ValueError):
+        return jsonify({"error": "Query params 'from' and 'to' must be snapshot ids"}), 400
+
+    try:
+        stats = profiling.diff_snapshots(from_id, to_id, key_type, limit)
+    except KeyError as e:
+        return jsonify({"error": f"Unknown snapshot id: {e}"}), 404
+    return jsonify({"from": from_id, "to": to_id, "key": key_type, "stats": stats}), 200
+
+
+@admin.route('/slow_queries', methods=['GET'])
+@require_admin
+def get_slow_queries():
+    """
+    Slowest statements in this worker by normalized SQL, worst total time first, with captured plans.
+    Query params: limit (default all), plans=false to omit plans.
+    """
+    from db.slow_queries import slow_queries
+    try:
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "threshold_ms": slow_queries.threshold_ms,
+        "analyze": slow_queries.analyze,
+        "statements": slow_queries.top(limit, include_plans=request.args.get('plans', 'true') != 'false')
+    }), 200
+
+
+@admin.route('/slow_queries', methods=['DELETE'])
+@require_admin
+def reset_slow_queries():
+    """
+    Clear the slow-query log, e.g. after deploying an index.
+    """
+    from db.slow_queries import slow_queries
+    slow_queries.reset()
+    return jsonify({"success": True}), 200
@@ -2,38 +2,75 @@
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils import logger
+from utils import logger, get_config, contact_search_term, contact_prefix
 logger_instance = logger
 import os
-import dotenv
-import json
+import time
 import flask
-from flask import request, jsonify, render_template, send_from_directory, Response
+from flask import request, jsonify, render_template, send_from_directory, Response, g
 from datetime import datetime
-from uuid import uuid4
+from uuid import UUID
 from sqlalchemy import text, func, case
 
 
 from data_model.application_model import twilioSMS, hatchMessage, MessageType, SMSMessage, EmailMessage
 from data_model.database_model import Message,  User, dbEmail
 from data_model.api_message_handler import APIMessageHandler, generate_conversation_id
-from providers.rest_connector import twilioAPI
-from db.postgres_connector import hatchPostgres
+from db.postgres_connector import get_pg
+from db import queries
+from api.streaming import stream_rows, STREAM_BATCH_SIZE
+from api.admin import admin
+from utils.metrics import registry, http_requests_total, http_request_duration
+from utils.tracing import start_trace, end_trace, span
+from utils.ids import uuid7, parse_timeline_cursor
 
 
-dotenv.load_dotenv()
-dotenv_secrets = os.path.join(os.path.dirname(__file__), '..', '.secrets', '.secrets')
-dotenv.load_dotenv(dotenv_secrets, override=True)
+config = get_config()
 
-
-FLASK_HOST = os.getenv('FLASK_HOST', '0.0.0.0')
-FLASK_PORT = int(os.getenv('FLASK_PORT', 5000))
+FLASK_HOST = config.flask_host
+FLASK_PORT = config.flask_port
 
 
 app = flask.Flask(__name__)
+app.register_blueprint(admin)
+
+# Shared database handle; the engine and pool are created on first use
+pg = get_pg()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    start_trace(f"{request.method} {route}", **{"http.method": request.method, "http.route": route})
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Per-route request counts and latency (time to response headers for streamed bodies)."""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        http_request_duration.labels(route, request.method).observe(time.perf_counter() - start)
+        http_requests_total.labels(route, request.method, response.status_code).inc()
+    trace = end_trace(response.status_code)
+    if trace is not None:
+        response.headers['Server-Timing'] = trace.server_timing()
+    return response
+
 
-# Initialize database connection
-pg = hatchPostgres()
+@app.teardown_request
+def discard_trace(exc):
+    # Unhandled exceptions skip after_request; make sure the trace does not leak to the next request
+    end_trace(500 if exc is not None else None)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus text exposition of this process's metrics.
+    """
+    return Response(registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 
 @app.route('/', methods=['GET'])
@@ -48,97 +85,164 @@ def get_conversations():
     """
     API endpoint to get all conversations with latest message info.
     Returns: List of conversations with conversation_id, participants, and last message date.
+    Streams the response; pass ?format=ndjson for newline-delimited JSON.
     """
+    conn = None
     try:
-        session = pg.start_connection()
-        if not session:
-            return jsonify({"error": "Database connection failed"}), 500
-
-        # Get all conversations (grouped by conversation_id)
-        convs = (
-            session.query(
-                Message.conversation_id,
-                case(
-                    (Message.direction == 'inbound-api', Message.from_contact ),
-                    else_=(Message.to_contact )
-                ).label('reply_to'),
-                case(
-                    (Message.direction == 'inbound-api', Message.from_contact + '->' + Message.to_contact),
-                    else_=(Message.to_contact + '->' + Message.from_contact)
-                ).label('participants'),
-                func.max(Message.timestamp).label('last_message_date'),
-                func.count(Message.id).label('messages')
-            )
-            .group_by(
-                Message.conversation_id,
-                case(
-                    (Message.direction == 'inbound-api', Message.from_contact ),
-                    else_=(Message.to_contact )
-                ),
-                case(
-                    (Message.direction == 'inbound-api', Message.from_contact + '->' + Message.to_contact),
-                    else_=(Message.to_contact + '->' + Message.from_contact)
-                )
-            )
-            .order_by(func.max(Message.timestamp).desc())
-            .all()
-        )
-        session.close()
-
-        conversation_response = APIMessageHandler.conversation_tuples_to_dicts(convs)
+        # Core: grouped conversation summary rows, no ORM hydration
+        conn = pg.get_engine().connect().execution_options(yield_per=STREAM_BATCH_SIZE)
+        convs = conn.execute(queries.conversations_stmt)
 
-
-       
-        return jsonify({"conversations": conversation_response}), 200
+        conversation_response = APIMessageHandler.iter_conversation_dicts(convs)
+        return stream_rows("conversations", conversation_response, on_close=conn.close)
 
     except Exception as e:
+        if conn is not None:
+            conn.close()
         logger_instance.error("Failed to get conversations", error=str(e))
         return jsonify({"error": str(e)}), 500
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def page_args() -> tuple[UUID, int] | None:
+    """
+    Keyset paging parameters from the query string: ?after=<last id seen>&limit=<n>.
+
+    Returns:
+        tuple | None: (after id, page size capped at MAX_PAGE_SIZE), or None when neither is given.
+
+    Raises:
+        ValueError: If `after` is not a UUID or `limit` is not a positive integer.
+    """
+    after, limit = request.args.get('after'), request.args.get('limit')
+    if after is None and limit is None:
+        return None
+    page_size = int(limit) if limit else DEFAULT_PAGE_SIZE
+    if page_size < 1:
+        raise ValueError(f"limit must be positive, got {page_size}")
+    return (UUID(after) if after else queries.FIRST_PAGE), min(page_size, MAX_PAGE_SIZE)
+
+
 @app.route('/api/conversation/<conversation_id>/messages', methods=['GET'])
 def get_conversation_messages(conversation_id):
     """
     API endpoint to get all messages for a specific conversation.
+    Streams the response; pass ?format=ndjson for newline-delimited JSON.
+    Pass ?limit=<n> (and ?after=<last message id> for the next page) to page by id.
     """
+    conn = None
     try:
-        session = pg.start_connection()
-        if not session:
-            return jsonify({"error": "Database connection failed"}), 500
-
-        # ORM: Get all messages for this conversation
-        messages_query = (
-            session.query(Message)
-            .filter(Message.conversation_id == conversation_id)
-            .order_by(Message.timestamp.asc())
-            .all()
-        )
-        messages = []
-        for row in messages_query:
-            messages.append({
-                'id': str(row.id),
-                'to_contact': row.to_contact,
-                'from_contact': row.from_contact,
-                'body': row.body,
-                'type': row.type,
-                'timestamp': row.timestamp.isoformat() if row.timestamp else None,
-                'status': row.status,
-                'external_sid': row.external_sid,
-                'direction': row.direction,
-                'error_code': row.error_code,
-                'error_message': row.error_message,
-                'is_delivered': row.status in ['delivered', 'sent'] if row.status else False
-            })
-
-        session.close()
-        return jsonify({"messages": messages}), 200
+        try:
+            conversation_uuid = UUID(conversation_id)
+        except ValueError:
+            return jsonify({"error": f"Invalid conversation id: {conversation_id}"}), 400
+        try:
+            page = page_args()
+        except ValueError as e:
+            return jsonify({"error": f"Invalid paging parameters: {e}"}), 400
+
+        # Core: stream the message columns for this conversation from a server-side cursor
+        conn = pg.get_engine().connect().execution_options(yield_per=STREAM_BATCH_SIZE)
+        if page is None:
+            rows = conn.execute(queries.conversation_messages_stmt, {"conversation_id": conversation_uuid})
+        else:
+            rows = conn.execute(queries.conversation_messages_page_stmt,
+                                {"conversation_id": conversation_uuid, "after": page[0], "limit": page[1]})
+
+        messages = APIMessageHandler.iter_message_dicts(rows)
+        return stream_rows("messages", messages, on_close=conn.close)
 
     except Exception as e:
+        if conn is not None:
+            conn.close()
         logger_instance.error("Failed to get conversation messages", error=str(e), conversation_id=conversation_id)
         return jsonify({"error": str(e)}), 500
 
 
 
 
+BATCH_PAGE_SIZE = 20
+MAX_BATCH_CONVERSATIONS = 100
+
+
+@app.route('/api/conversations/messages', methods=['POST'])
+def get_conversations_messages():
+    """
+    API endpoint for the latest messages of many conversations in one request and one query.
+    Body: {"conversations": [{"conversation_id": "...", "before": "<oldest id already shown>"}, ...], "limit": <n>}
+    ("before" is optional and bare id strings are accepted too). Returns, per conversation id,
+    up to `limit` messages oldest first, and `before` to pass for the next (older) page.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        wanted = data.get('conversations')
+        if not isinstance(wanted, list) or not wanted:
+            return jsonify({"error": "Expected a non-empty 'conversations' list"}), 400
+        if len(wanted) > MAX_BATCH_CONVERSATIONS:
+            return jsonify({"error": f"At most {MAX_BATCH_CONVERSATIONS} conversations per request"}), 400
+        try:
+            cursors = {}
+            for item in wanted:
+                if isinstance(item, str):
+                    item = {"conversation_id": item}
+                before = item.get('before')
+                cursors[UUID(item['conversation_id'])] = UUID(before) if before else queries.LATEST_PAGE
+            limit = int(data.get('limit', BATCH_PAGE_SIZE))
+            if limit < 1:
+                raise ValueError(f"limit must be positive, got {limit}")
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            return jsonify({"error": f"Invalid conversations or limit: {e}"}), 400
+
+        with pg.get_engine().connect() as conn:
+            stmt, params = queries.latest_messages(conn.dialect.name, cursors)
+            rows = conn.execute(stmt, {**params, "limit": min(limit, MAX_PAGE_SIZE)})
+            conversations = APIMessageHandler.group_conversation_messages(rows, cursors)
+        return jsonify({"conversations": conversations}), 200
+
+    except Exception as e:
+        logger_instance.error("Failed to get messages for conversations", error=str(e))
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/conversation/<conversation_id>/timeline', methods=['GET'])
+def get_conversation_timeline(conversation_id):
+    """
+    API endpoint for a conversation's SMS and emails in one timeline, oldest first.
+    Always paged: ?limit=<n> (default 100), and ?after=<cursor of the last item> for the next page.
+    Both tables are merged by a single indexed query; emails carry their subject and a body preview.
+    """
+    conn = None
+    try:
+        try:
+            conversation_uuid = UUID(conversation_id)
+        except ValueError:
+            return jsonify({"error": f"Invalid conversation id: {conversation_id}"}), 400
+        try:
+            after = request.args.get('after')
+            after_timestamp, after_id = parse_timeline_cursor(after) if after else queries.TIMELINE_START
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+            if limit < 1:
+                raise ValueError(f"limit must be positive, got {limit}")
+        except ValueError as e:
+            return jsonify({"error": f"Invalid paging parameters: {e}"}), 400
+
+        conn = pg.get_engine().connect().execution_options(yield_per=STREAM_BATCH_SIZE)
+        rows = conn.execute(queries.conversation_timeline_stmt,
+                            {"conversation_id": conversation_uuid, "after_timestamp": after_timestamp,
+                             "after_id": after_id, "limit": min(limit, MAX_PAGE_SIZE)})
+
+        timeline = APIMessageHandler.iter_timeline_dicts(rows)
+        return stream_rows("timeline", timeline, on_close=conn.close)
+
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+        logger_instance.error("Failed to get conversation timeline", error=str(e), conversation_id=conversation_id)
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/api/send_message', methods=['POST'])
 def send_message():
     """
@@ -160,6 +264,7 @@ def send_message():
             # Send via Twilio
             logger_instance.info("Sending SMS via Twilio", to=to_contact, from_=from_contact)
 
+            from providers.rest_connector import twilioAPI
             twilio_client = twilioAPI()
             sms = twilioSMS(to=to_contact, from_=from_contact, body=body)
 
@@ -181,7 +286,7 @@ def send_message():
             logger_instance.info("Saving message directly to database", to=to_contact, from_=from_contact)
 
             message = Message(
-                id=uuid4(),
+                id=uuid7(),
                 to_contact=to_contact,
                 from_contact=from_contact,
                 body=body,
@@ -193,9 +298,15 @@ def send_message():
             )
 
             session = pg.start_connection()
-            session.add(message)
-            session.commit()
-            session.close()
+            try:
+                with span('db.commit'):
+                    session.add(message)
+                    session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
 
             return jsonify({
                 "success": True,
@@ -215,48 +326,227 @@ def get_new_messages(conversation_id):
     API endpoint to get new messages for a conversation since a given timestamp.
     Used for real-time updates.
     """
+    conn = None
     try:
         since_timestamp = request.args.get('since')
         if not since_timestamp:
             return jsonify({"error": "Missing 'since' parameter"}), 400
+        try:
+            since = datetime.fromisoformat(since_timestamp.replace('Z', '+00:00'))
+        except ValueError:
+            return jsonify({"error": f"Invalid 'since' timestamp: {since_timestamp}"}), 400
+        try:
+            conversation_uuid = UUID(conversation_id)
+        except ValueError:
+            return jsonify({"error": f"Invalid conversation id: {conversation_id}"}), 400
+
+        # Core: query for messages newer than the given timestamp
+        conn = pg.get_engine().connect().execution_options(yield_per=STREAM_BATCH_SIZE)
+        rows = conn.execute(queries.new_messages_stmt, {"conversation_id": conversation_uuid, "since": since})
+
+        messages = APIMessageHandler.iter_message_dicts(rows)
+        return stream_rows("messages", messages, on_close=conn.close)
 
-        session = pg.start_connection()
-        if not session:
-            return jsonify({"error": "Database connection failed"}), 500
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+        logger_instance.error("Failed to get new messages", error=str(e), conversation_id=conversation_id)
+        return jsonify({"error": str(e)}), 500
 
-        # ORM: Query for messages newer than the given timestamp
-        messages_query = (
-            session.query(Message)
-            .filter(
-                Message.conversation_id == conversation_id,
-                Message.timestamp > since_timestamp
-            )
-            .order_by(Message.timestamp.asc())
-            .all()
-        )
+@app.route('/api/conversation/<conversation_id>/emails', methods=['GET'])
+def get_conversation_emails(conversation_id):
+    """
+    API endpoint to list emails for a conversation.
+    Only lightweight columns are read; fetch the full body, HTML and provider
+    response through /api/email/<email_id>/content.
+    Pages by id with ?limit=<n>&after=<last email id>, like the messages listing.
+    """
+    conn = None
+    try:
+        try:
+            conversation_uuid = UUID(conversation_id)
+        except ValueError:
+            return jsonify({"error": f"Invalid conversation id: {conversation_id}"}), 400
+        try:
+            page = page_args()
+        except ValueError as e:
+            return jsonify({"error": f"Invalid paging parameters: {e}"}), 400
+
+        conn = pg.get_engine().connect().execution_options(yield_per=STREAM_BATCH_SIZE)
+        if page is None:
+            rows = conn.execute(queries.conversation_emails_stmt, {"conversation_id": conversation_uuid})
+        else:
+            rows = conn.execute(queries.conversation_emails_page_stmt,
+                                {"conversation_id": conversation_uuid, "after": page[0], "limit": page[1]})
 
-        messages = []
-        for row in messages_query:
-            messages.append({
-                'id': str(row.id),
-                'to_contact': row.to_contact,
-                'from_contact': row.from_contact,
-                'body': row.body,
-                'type': row.type,
-                'timestamp': row.timestamp.isoformat() if row.timestamp else None,
-                'status': row.status,
-                'external_sid': row.external_sid,
-                'direction': row.direction,
-                'error_code': row.error_code,
-                'error_message': row.error_message,
-                'is_delivered': row.status in ['delivered', 'sent'] if row.status else False
-            })
-
-        session.close()
-        return jsonify({"messages": messages}), 200
+        emails = APIMessageHandler.iter_email_dicts(rows)
+        return stream_rows("emails", emails, on_close=conn.close)
 
     except Exception as e:
-        logger_instance.error("Failed to get new messages", error=str(e), conversation_id=conversation_id)
+        if conn is not None:
+            conn.close()
+        logger_instance.error("Failed to get conversation emails", error=str(e), conversation_id=conversation_id)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/emails', methods=['GET'])
+def find_emails():
+    """
+    API endpoint to find emails by their JSON metadata, across conversations.
+    ?cc=<address> and ?bcc=<address> match recipients; ?status_code=<n> matches the
+    provider response. Filters combine; results page by id (?limit, ?after).
+    """
+    conn = None
+    try:
+        fragments = {}
+        for field in ('cc', 'bcc'):
+            if request.args.get(field):
+                fragments[field] = [request.args[field]]
+        try:
+            if request.args.get('status_code'):
+                fragments['provider_response'] = {"status_code": int(request.args['status_code'])}
+            after, limit = page_args() or (queries.FIRST_PAGE, DEFAULT_PAGE_SIZE)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid parameters: {e}"}), 400
+        if not fragments:
+            return jsonify({"error": "Pass at least one of 'cc', 'bcc' or 'status_code'"}), 400
+
+        stmt = queries.emails_containing(**fragments).where(queries.emails.c.id > after).limit(limit)
+        conn = pg.get_engine().connect().execution_options(yield_per=STREAM_BATCH_SIZE)
+        rows = conn.execute(stmt)
+
+        emails = APIMessageHandler.iter_email_dicts(rows)
+        return stream_rows("emails", emails, on_close=conn.close)
+
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+        logger_instance.error("Failed to find emails", error=str(e))
+        return jsonify({"error": str(e)}), 500
+
+MAX_SEARCH_OFFSET = 10000
+
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """
+    API endpoint for full-text search over SMS bodies and email subjects and bodies.
+    ?q=<query> (web-search syntax on Postgres), ?type=all|sms|email, ?limit=<n> and
+    ?offset=<n> for pages. Hits are ranked by relevance, newest first among equals.
+    """
+    conn = None
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Missing 'q' parameter"}), 400
+        kind = request.args.get('type', 'all')
+        if kind not in queries.SEARCH_STATEMENTS:
+            return jsonify({"error": f"Invalid type {kind!r}; expected one of {', '.join(queries.SEARCH_STATEMENTS)}"}), 400
+        try:
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+            offset = int(request.args.get('offset', 0))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid paging parameters: {e}"}), 400
+        if limit < 1 or not 0 <= offset <= MAX_SEARCH_OFFSET:
+            return jsonify({"error": f"limit must be positive and offset between 0 and {MAX_SEARCH_OFFSET}"}), 400
+
+        conn = pg.get_engine().connect().execution_options(yield_per=STREAM_BATCH_SIZE)
+        rows = conn.execute(queries.SEARCH_STATEMENTS[kind],
+                            {"q": query, "limit": min(limit, MAX_PAGE_SIZE), "offset": offset})
+
+        results = APIMessageHandler.iter_search_dicts(rows)
+        return stream_rows("results", results, on_close=conn.close)
+
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+        logger_instance.error("Search failed", error=str(e))
+        return jsonify({"error": str(e)}), 500
+
+CONTACT_SUGGESTIONS = 10
+MAX_CONTACT_SUGGESTIONS = 50
+
+
+@app.route('/api/contacts', methods=['GET'])
+def get_contacts():
+    """
+    API endpoint for contact autocomplete in the compose forms.
+    ?prefix=<typed text> matches anywhere in previously used phone numbers and
+    email addresses (prefix matches first); ?kind=phone|email narrows it, ?limit caps it.
+    """
+    try:
+        term = contact_search_term(request.args.get('prefix', ''))
+        if not term:
+            return jsonify({"contacts": []}), 200
+        kind = request.args.get('kind') or None
+        try:
+            limit = min(int(request.args.get('limit', CONTACT_SUGGESTIONS)), MAX_CONTACT_SUGGESTIONS)
+        except ValueError:
+            return jsonify({"error": f"Invalid limit: {request.args.get('limit')}"}), 400
+
+        with pg.get_engine().connect() as conn:
+            rows = conn.execute(queries.contacts_stmt, {"substring": f"%{queries.like_escape(term)}%",
+                                                        "prefix": f"{queries.like_escape(contact_prefix(term))}%",
+                                                        "kind": kind, "limit": max(limit, 1)})
+            contacts = [{"contact": contact, "kind": kind_, "last_seen": last_seen.isoformat() if last_seen else None}
+                        for contact, kind_, last_seen in rows]
+        return jsonify({"contacts": contacts}), 200
+
+    except Exception as e:
+        logger_instance.error("Failed to look up contacts", error=str(e))
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/email/<email_id>/content', methods=['GET'])
+def get_email_content(email_id):
+    """
+    API endpoint to fetch the heavy content of a single email on demand:
+    full plain-text body, HTML content and the stored provider response.
+    """
+    try:
+        try:
+            email_uuid = UUID(email_id)
+        except ValueError:
+            return jsonify({"error": f"Invalid email id: {email_id}"}), 400
+
+        with pg.get_engine().connect() as conn:
+            row = conn.execute(queries.email_content_stmt, {"email_id": email_uuid}).first()
+
+        if row is None:
+            return jsonify({"error": f"Email not found: {email_id}"}), 404
+
+        return jsonify({
+            "id": str(row.id),
+            "body": row.body,
+            "html_content": row.html_content,
+            "provider_response": row.provider_response
+        }), 200
+
+    except Exception as e:
+        logger_instance.error("Failed to get email content", error=str(e), email_id=email_id)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/telemetry/<provider>', methods=['GET'])
+def get_provider_telemetry(provider):
+    """
+    API endpoint reporting a provider's latency over time, split into
+    provider-side processing time and network time, rolled up per minute.
+    Query params: minutes (default 60).
+    Covers this process's in-memory buffer only.
+    """
+    try:
+        try:
+            minutes = int(request.args.get('minutes', 60))
+        except ValueError:
+            return jsonify({"error": f"Invalid 'minutes': {request.args.get('minutes')}"}), 400
+
+        from providers.telemetry import telemetry
+        return jsonify({
+            "provider": provider,
+            "minutes": minutes,
+            "rollups": telemetry.rollup(provider, minutes)
+        }), 200
+
+    except Exception as e:
+        logger_instance.error("Failed to get provider telemetry", error=str(e), provider=provider)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/health', methods=['GET'])
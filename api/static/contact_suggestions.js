@@ -0,0 +1,29 @@
+// Contact autocomplete for recipient fields, shared by the inbox and the email composer.
+// Suggests previously used addresses (GET /api/contacts) into a <datalist> as the recipient is typed.
+function attachContactSuggestions(inputId, listId, kind) {
+    const input = document.getElementById(inputId);
+    const list = document.getElementById(listId);
+    let timer = null;
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        const prefix = input.value.trim();
+        if (prefix.length < 2) {
+            list.innerHTML = '';
+            return;
+        }
+        timer = setTimeout(async () => {
+            try {
+                const response = await fetch(`/api/contacts?kind=${kind}&prefix=${encodeURIComponent(prefix)}`);
+                const data = await response.json();
+                list.innerHTML = '';
+                (data.contacts || []).forEach(c => {
+                    const option = document.createElement('option');
+                    option.value = c.contact;
+                    list.appendChild(option);
+                });
+            } catch (error) {
+                console.error('Error loading contact suggestions:', error);
+            }
+        }, 150);
+    });
+}
@@ -0,0 +1,98 @@
+"""
+Streaming response helpers for large listings and exports.
+
+Rows are pulled from a server-side cursor and encoded as they arrive, so peak
+memory stays flat regardless of result size and the first byte goes out before
+the query has been fully consumed.
+"""
+
+import json
+from typing import Callable, Iterable, Iterator
+
+from flask import Response, request
+
+from utils import logger, get_config
+
+logger_instance = logger
+
+# Rows fetched per round-trip from the server-side cursor, and rows encoded per chunk written to the socket.
+STREAM_BATCH_SIZE = get_config().stream_batch_size
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_ndjson() -> bool:
+    """True when the client asked for newline-delimited JSON via ?format=ndjson or the Accept header."""
+    if request.args.get('format', '').lower() == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def iter_json_object_list(key: str, items: Iterable[dict], batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """
+    Encode `{"<key>": [item, item, ...]}` incrementally.
+
+    The output is byte-for-byte compatible with jsonify({key: list(items)}) consumers,
+    but items are encoded in batches as they are produced.
+    """
+    yield '{"%s": [' % key
+    buffer = []
+    first = True
+    for item in items:
+        if first:
+            buffer.append(json.dumps(item))
+            first = False
+        else:
+            buffer.append(',' + json.dumps(item))
+        if len(buffer) >= batch_size:
+            yield ''.join(buffer)
+            buffer.clear()
+    if buffer:
+        yield ''.join(buffer)
+    yield ']}'
+
+
+def iter_ndjson(items: Iterable[dict], batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """Encode items as newline-delimited JSON, one object per line."""
+    buffer = []
+    for item in items:
+        buffer.append(json.dumps(item) + '\n')
+        if len(buffer) >= batch_size:
+            yield ''.join(buffer)
+            buffer.clear()
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_rows(key: str, items: Iterable[dict], on_close: Callable[[], None] | None = None) -> Response:
+    """
+    Build a streaming Flask response for a listing.
+
+    Args:
+        key (str): Top-level key for the JSON envelope (ignored for NDJSON).
+        items (Iterable[dict]): Lazily produced response rows.
+        on_close (Callable, optional): Cleanup hook (e.g. conn.close) run once when the server
+            closes the response: after the stream is exhausted or fails, or when the client
+            disconnects, even before the first chunk was produced.
+
+    Returns:
+        Response: A chunked response in JSON or NDJSON depending on the request.
+    """
+    ndjson = wants_ndjson()
+    encoded = iter_ndjson(items) if ndjson else iter_json_object_list(key, items)
+
+    def generate():
+        try:
+            yield from encoded
+        except Exception as e:
+            # Headers are already sent; the truncated body is the client's failure signal.
+            logger_instance.error("Streaming response failed", error=str(e), key=key)
+            raise
+
+    mimetype = NDJSON_MIMETYPE if ndjson else 'application/json'
+    response = Response(generate(), status=200, mimetype=mimetype)
+    if on_close is not None:
+        # The WSGI server always calls close() on the response; a generator that never
+        # started would skip its own finally block
+        response.call_on_close(on_close)
+    return response
@@ -2,8 +2,14 @@
 """
 Main application entry point for the Lean Hatch API server.
 This file imports and runs the Flask application defined in api/api.py.
+
+    python app.py                 # Flask development server (debug, reloader)
+    python app.py --production    # Gunicorn with preforked workers (see gunicorn.conf.py)
+
+Production mode is also selected by FLASK_ENV=production.
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -13,7 +19,34 @@ sys.path.insert(0, str(project_root))
 
 # Import the Flask app from the api module
 from api import app, FLASK_HOST, FLASK_PORT
+from utils import get_config
+
+GUNICORN_CONFIG = project_root / 'gunicorn.conf.py'
+
+
+def run_production():
+    """Serve the app with Gunicorn using gunicorn.conf.py (workers, threads, preload, graceful drain)."""
+    from gunicorn.app.base import Application
+
+    class hatchServer(Application):
+        def load_config(self):
+            self.load_config_from_file(str(GUNICORN_CONFIG))
+
+        def load(self):
+            return app
+
+    hatchServer().run()
+
 
 if __name__ == '__main__':
-    print(f"Starting Lean Hatch API server on {FLASK_HOST}:{FLASK_PORT}")
-    app.run(host=FLASK_HOST, port=FLASK_PORT, debug=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Lean Hatch API server")
+    parser.add_argument('--production', action='store_true',
+                        help="Run under Gunicorn instead of the Flask development server")
+    args = parser.parse_args()
+
+    if args.production or get_config().is_production:
+        print(f"Starting Lean Hatch API server (production) on {FLASK_HOST}:{FLASK_PORT}")
+        run_production()
+    else:
+        print(f"Starting Lean Hatch API server on {FLASK_HOST}:{FLASK_PORT}")
+        app.run(host=FLASK_HOST, port=FLASK_PORT, debug=True)
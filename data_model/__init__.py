@@ -1,6 +1,6 @@
 from .application_model import (twilioSMS, twilioSMSResponse, twilioResponseHeader, hatchUser, MessageType,MessageDirection, MessageStatus, hatchMessage, SMSMessage, EmailMessage, apiMessage, MessageStatus)
 from .api_message_handler import APIMessageHandler, createTwilioSMS, twilioHeaderHandler, twilioSMSResponseHandler
-from .database_model import (modelMetaData, User, Message, dbEmail)
+from .database_model import (modelMetaData, User, Message, dbEmail, ProviderTelemetry, Contact)
 
 
 __all__ = [
@@ -26,6 +26,8 @@ __all__ = [
     "Message",
     "User",
     "dbEmail",
+    "ProviderTelemetry",
+    "Contact",
 
     #Handlers
     "APIMessageHandler","createTwilioSMS","twilioSMSResponseHandler","twilioHeaderHandler"
@@ -1,5 +1,4 @@
 from pydantic import BaseModel
-from uuid import uuid4
 from datetime import datetime
 from pathlib import Path
 import sys
@@ -7,13 +6,15 @@ import sys
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from utils import logger
+from utils import logger, parse_provider_datetime
+from utils.tracing import span
+from utils.ids import uuid7, timeline_cursor
 from data_model.application_model import (
     twilioSMS, twilioResponseHeader, twilioSMSResponse,
     MessageType, hatchMessage, SMSMessage, EmailMessage, apiMessage, MessageStatus, MessageDirection
 )
 from data_model.database_model import (
-    Message, dbEmail
+    Message, dbEmail, UNDATED
 )
 from data_model.application_model import generate_conversation_id
 
@@ -44,104 +45,52 @@ class twilioHeaderHandler(BaseModel):
     
     @staticmethod
     def from_headers_dict(headers_dict: dict) -> twilioResponseHeader:
-        """Converts response headers dictionary to twilioResponseHeader model."""
-        # Map header keys to model fields (handle case variations and formatting)
-        # Parse date field which can be in HTTP date format (e.g., 'Mon, 26 May 2025 19:22:31 GMT')
-        date_value = headers_dict.get('date', headers_dict.get('Date'))
-        if date_value:
-            try:
-                # Try parsing HTTP date format first
-                from email.utils import parsedate_to_datetime
-                parsed_date = parsedate_to_datetime(date_value)
-            except (ValueError, TypeError):
-                try:
-                    # Fallback to ISO format
-                    parsed_date = datetime.fromisoformat(date_value)
-                except (ValueError, TypeError):
-                    # Last resort - use current time
-                    parsed_date = datetime.now()
-        else:
-            parsed_date = datetime.now()
-        
-        return twilioResponseHeader(
-            content_type=headers_dict.get('content-type', headers_dict.get('Content-Type', '')),
-            content_length=int(headers_dict.get('content-length', headers_dict.get('Content-Length', 0))),
-            connection=headers_dict.get('connection', headers_dict.get('Connection', '')),
-            date=parsed_date,
-            twilio_concurrent_requests=int(headers_dict.get('twilio-concurrent-requests', headers_dict.get('Twilio-Concurrent-Requests', 0))),
-            twilio_request_id=headers_dict.get('twilio-request-id', headers_dict.get('Twilio-Request-Id', '')),
-            twilio_request_duration=float(headers_dict.get('twilio-request-duration', headers_dict.get('Twilio-Request-Duration', 0.0))),
-            x_home_region=headers_dict.get('x-home-region', headers_dict.get('X-Home-Region', '')),
-            x_api_domain=headers_dict.get('x-api-domain', headers_dict.get('X-Api-Domain', '')),
-            strict_transport_security=headers_dict.get('strict-transport-security', headers_dict.get('Strict-Transport-Security', '')),
-            x_cache=headers_dict.get('x-cache', headers_dict.get('X-Cache', '')),
-            via=headers_dict.get('via', headers_dict.get('Via', '')),
-            x_amz_cf_pop=headers_dict.get('x-amz-cf-pop', headers_dict.get('X-Amz-Cf-Pop', '')),
-            x_amz_cf_id=headers_dict.get('x-amz-cf-id', headers_dict.get('X-Amz-Cf-Id', '')),
-            x_powered_by=headers_dict.get('x-powered-by', headers_dict.get('X-Powered-By', '')),
-            x_shenanigans=headers_dict.get('x-shenanigans', headers_dict.get('X-Shenanigans')),
-            vary=headers_dict.get('vary', headers_dict.get('Vary'))
-        )
+        """
+        Converts response headers to a twilioResponseHeader model.
+
+        One pass over the headers, matching names case-insensitively against the
+        model's fields (Twilio-Request-Id -> twilio_request_id). Missing headers
+        get empty defaults; an absent or unparseable Date falls back to now.
+        """
+        values = dict(_HEADER_DEFAULTS)
+        for name, value in headers_dict.items():
+            field = _HEADER_FIELDS.get(name.lower())
+            if field is not None:
+                values[field] = value
+        date_value = values.get('date')
+        values['date'] = (parse_provider_datetime(date_value) if isinstance(date_value, str) else date_value) or datetime.now()
+        return twilioResponseHeader(**values)
+
+
+# Lowercase header name -> twilioResponseHeader field
+_HEADER_FIELDS = {name.replace('_', '-'): name for name in twilioResponseHeader.model_fields}
+_HEADER_DEFAULTS = {
+    name: (field.default if not field.is_required() else 0 if field.annotation in (int, float) else '')
+    for name, field in twilioResponseHeader.model_fields.items() if name != 'date'
+}
 
 
 class twilioSMSResponseHandler(BaseModel):
     """Handler specifically for Twilio SMS API responses."""
+
+    @staticmethod
+    def from_response_bytes(content: bytes | str) -> twilioSMSResponse:
+        """
+        Validates a raw Twilio message resource (response.content) straight into the model.
+
+        The JSON is parsed and validated in one pass by the model's compiled
+        validator, with no intermediate dict. Dates are read by the cached
+        provider date parser.
+
+        Raises:
+            pydantic.ValidationError: If the payload is not a valid message resource.
+        """
+        return twilioSMSResponse.model_validate_json(content)
     
     @staticmethod
     def from_response_dict(response_dict: dict) -> twilioSMSResponse:
-        """Converts SMS response dictionary to twilioSMSResponse model."""
-        # Parse datetime fields properly with multiple format support
-        def parse_datetime_field(date_value):
-            """Parse datetime from various formats including HTTP date format."""
-            if not date_value or not isinstance(date_value, str):
-                return None
-            
-            try:
-                # Try parsing HTTP date format first (e.g., 'Mon, 26 May 2025 19:22:31 GMT')
-                from email.utils import parsedate_to_datetime
-                return parsedate_to_datetime(date_value)
-            except (ValueError, TypeError):
-                try:
-                    # Fallback to ISO format with Z replacement
-                    return datetime.fromisoformat(date_value.replace('Z', '+00:00'))
-                except (ValueError, TypeError):
-                    try:
-                        # Try direct ISO format
-                        return datetime.fromisoformat(date_value)
-                    except (ValueError, TypeError):
-                        # Last resort - return None for optional fields
-                        return None
-        
-        date_created = parse_datetime_field(response_dict.get('date_created'))
-        date_sent = parse_datetime_field(response_dict.get('date_sent'))
-        date_updated = parse_datetime_field(response_dict.get('date_updated'))
-        
-        # Handle price conversion safely
-        price_value = response_dict.get('price')
-        price = float(price_value) if price_value is not None else None
-        
-        return twilioSMSResponse(
-            account_sid=response_dict.get('account_sid', ''),
-            api_version=response_dict.get('api_version', ''),
-            body=response_dict.get('body', ''),
-            date_created=date_created or datetime.now(),
-            date_sent=date_sent,
-            date_updated=date_updated or datetime.now(),
-            direction=response_dict.get('direction', ''),
-            error_code=response_dict.get('error_code'),
-            error_message=response_dict.get('error_message'),
-            **{'from': response_dict.get('from', '')},  # Use alias for 'from' field
-            messaging_service_sid=response_dict.get('messaging_service_sid'),
-            num_media=int(response_dict.get('num_media', 0)),
-            num_segments=int(response_dict.get('num_segments', 1)),
-            price=price,
-            price_unit=response_dict.get('price_unit', 'USD'),
-            sid=response_dict.get('sid', ''),
-            status=str(response_dict.get('status', '')),
-            subresource_uris=response_dict.get('subresource_uris', {}),
-            to=response_dict.get('to', ''),
-            uri=response_dict.get('uri', '')
-        )
+        """Converts an already-decoded SMS response dictionary to twilioSMSResponse model."""
+        return twilioSMSResponse.model_validate(response_dict)
     
     @classmethod
     def process_sms_response(cls, response_json: dict, headers_dict: dict) -> tuple[twilioSMSResponse, twilioResponseHeader]:
@@ -160,27 +109,11 @@ class sendgridEmailResponseHandler(BaseModel):
         """Converts SendGrid response to EmailMessage model."""
         from data_model.application_model import generate_conversation_id
         
-        # Parse datetime fields properly
-        def parse_datetime_field(date_value):
-            """Parse datetime from various formats including HTTP date format."""
-            if not date_value or not isinstance(date_value, str):
-                return datetime.now()
-            
-            try:
-                # Try parsing HTTP date format first
-                from email.utils import parsedate_to_datetime
-                return parsedate_to_datetime(date_value)
-            except (ValueError, TypeError):
-                try:
-                    # Try ISO format
-                    return datetime.fromisoformat(date_value)
-                except (ValueError, TypeError):
-                    return datetime.now()
-        
         # Extract essential fields from response
         status_code = response_dict.get('status_code', 202)
         message_id = headers_dict.get('X-Message-Id', headers_dict.get('x-message-id'))
-        date_sent = parse_datetime_field(headers_dict.get('Date', headers_dict.get('date')))
+        date_value = headers_dict.get('Date', headers_dict.get('date'))
+        date_sent = (parse_provider_datetime(date_value) if isinstance(date_value, str) else None) or datetime.now()
         
         # Create conversation ID from from/to emails
         from_email = response_dict.get('from_email', '')
@@ -188,7 +121,7 @@ class sendgridEmailResponseHandler(BaseModel):
         conversation_id = generate_conversation_id(to_email, from_email)
         
         return EmailMessage(
-            id=uuid4(),
+            id=uuid7(),
             to_contact=to_email,
             from_contact=from_email,
             body=response_dict.get('content', ''),
@@ -229,10 +162,10 @@ class APIMessageHandler:
     """Handler for API messages, responsible for converting and saving messages."""
     
     def __init__(self):
-        # Initialize database connection
-        from db.postgres_connector import hatchPostgres
-        self.pg = hatchPostgres()
-        self.session = self.pg.start_connection()  # <-- fix here
+        # Reuse the process-wide engine and pool; only the session is per handler
+        from db.postgres_connector import get_pg
+        self.pg = get_pg()
+        self.session = self.pg.start_connection()
         
         if self.session is None:
             raise Exception("Failed to establish database connection in APIMessageHandler")
@@ -243,7 +176,7 @@ class APIMessageHandler:
         """Converts JSON dictionary to apiMessage model."""
         # Map the JSON format to apiMessage format
         api_data = {
-            'id': uuid4(),
+            'id': uuid7(),
             'to': data.get('to'),
             'from': data.get('from_'),  # Note: using 'from' as the field name
             'body': data.get('message'),
@@ -257,25 +190,32 @@ class APIMessageHandler:
     
     @staticmethod
     def to_application_model(api_msg: apiMessage, message_type: MessageType = MessageType.SMS) -> hatchMessage:
-        """Converts apiMessage to application model (hatchMessage or subclass)."""
-        
+        """
+        Converts apiMessage to application model (hatchMessage or subclass).
+
+        api_msg has already been validated, so the application model is built
+        through the trusted path instead of validating every field again.
+        """
         # Generate conversation_id explicitly
         conversation_id = generate_conversation_id(api_msg.to, api_msg.from_)
+        # Application models store status and direction as plain strings
+        status = api_msg.status.value if api_msg.status else MessageStatus.RECEIVED.value
+        direction = api_msg.direction.value if api_msg.direction else None
         
         if message_type == MessageType.SMS:
-            return SMSMessage(
-                id=uuid4(),
+            return SMSMessage.trusted(
+                id=uuid7(),
                 to_contact=api_msg.to,
                 from_contact=api_msg.from_,
                 body=api_msg.body,
                 type=api_msg.type,
                 timestamp=api_msg.timestamp,
-                status=api_msg.status or MessageStatus.RECEIVED.value,
-                direction=api_msg.direction,
+                status=status,
+                direction=direction,
                 conversation_id=conversation_id
             )
         elif message_type == MessageType.EMAIL:
-            return EmailMessage(
+            return EmailMessage.trusted(
                 id=api_msg.id,
                 to_contact=api_msg.to,
                 from_contact=api_msg.from_,
@@ -283,33 +223,31 @@ class APIMessageHandler:
                 subject=getattr(api_msg, 'subject', 'No Subject'),  # Add default subject
                 type=api_msg.type,
                 timestamp=api_msg.timestamp,
-                status=api_msg.status or MessageStatus.RECEIVED.value,
-                direction=api_msg.direction,
+                status=status,
+                direction=direction,
                 conversation_id=conversation_id
             )
         else:
-            return hatchMessage(
+            return hatchMessage.trusted(
                 id=api_msg.id,
                 to_contact=api_msg.to,
                 from_contact=api_msg.from_,
                 body=api_msg.body,
                 type=api_msg.type,
                 timestamp=api_msg.timestamp,
-                status = api_msg.status or MessageStatus.RECEIVED.value,
-                direction=api_msg.direction,
+                status=status,
+                direction=direction,
                 conversation_id=conversation_id
             )
     
     @staticmethod
     def twilio_to_application_model(twilio_response: 'twilioSMSResponse') -> hatchMessage:
-        """Converts Twilio SMS response to application model with all Twilio fields."""
-        from data_model.application_model import generate_conversation_id
-        
+        """Converts a validated Twilio SMS response to application model with all Twilio fields (trusted path)."""
         # Generate conversation_id explicitly
         conversation_id = generate_conversation_id(twilio_response.to, twilio_response.from_)
         
-        return hatchMessage(
-            id=uuid4(),
+        return hatchMessage.trusted(
+            id=uuid7(),
             to_contact=twilio_response.to,
             from_contact=twilio_response.from_,
             body=twilio_response.body,
@@ -357,7 +295,8 @@ class APIMessageHandler:
             try:
                 self.session.add(db_message)
                 if auto_commit:
-                    self.session.commit()
+                    with span('db.commit', entity='message'):
+                        self.session.commit()
                     logger_instance.info("Message saved to database successfully", 
                           message_id=str(db_message.id),
                           conversation_id=str(db_message.conversation_id),
@@ -376,8 +315,6 @@ class APIMessageHandler:
     
     def save_email(self, email: EmailMessage, auto_commit: bool = True) -> dbEmail:
         """Converts EmailMessage application model to Email database model and saves to PostgreSQL."""
-        import json
-        
         db_email = dbEmail(
             id=email.id,
             to_contact=email.to_contact,
@@ -390,13 +327,14 @@ class APIMessageHandler:
             status=email.status,
             conversation_id=email.conversation_id,
             direction=email.direction,
-            cc=json.dumps(email.cc) if email.cc else None,
-            bcc=json.dumps(email.bcc) if email.bcc else None,
+            # JSON columns serialize these themselves
+            cc=email.cc or None,
+            bcc=email.bcc or None,
             reply_to=email.reply_to,
-            attachments=json.dumps(email.attachments) if email.attachments else None,
+            attachments=email.attachments or None,
             external_message_id=email.external_sid,
             provider='sendgrid',
-            provider_response=json.dumps(email.provider_response) if email.provider_response else None,
+            provider_response=email.provider_response or None,
             date_sent=email.date_sent,
             date_updated=email.date_updated,
             error_code=email.error_code,
@@ -408,7 +346,8 @@ class APIMessageHandler:
             try:
                 self.session.add(db_email)
                 if auto_commit:
-                    self.session.commit()
+                    with span('db.commit', entity='email'):
+                        self.session.commit()
                     logger_instance.info("Email saved to database successfully", 
                           email_id=str(db_email.id),
                           conversation_id=str(db_email.conversation_id),
@@ -437,7 +376,11 @@ class APIMessageHandler:
         
         # Step 3: Convert to database model and optionally save
         handler = cls()
-        db_msg = handler.save_message(app_msg, auto_commit=save_to_db)
+        try:
+            db_msg = handler.save_message(app_msg, auto_commit=save_to_db)
+        finally:
+            # Return the connection to the pool even when the save fails
+            handler.close_connection()
         
         return api_msg, app_msg, db_msg
     
@@ -445,11 +388,16 @@ class APIMessageHandler:
     def process_twilio_response(cls, twilio_response: 'twilioSMSResponse', save_to_db: bool = True) -> tuple[hatchMessage, Message]:
         """Complete pipeline: Twilio response -> Application model -> Database model (with automatic save)."""
         # Step 1: Convert Twilio response to application model
-        app_data = cls.twilio_to_application_model(twilio_response)
+        with span('serialize.application_model'):
+            app_data = cls.twilio_to_application_model(twilio_response)
         
         # Step 2: Convert to database model and optionally save
         handler = cls()
-        db_msg = handler.save_message(app_data, auto_commit=save_to_db)
+        try:
+            db_msg = handler.save_message(app_data, auto_commit=save_to_db)
+        finally:
+            # Return the connection to the pool even when the save fails
+            handler.close_connection()
         
         return app_data, db_msg
     
@@ -457,11 +405,16 @@ class APIMessageHandler:
     def process_sendgrid_response(cls, response_dict: dict, headers_dict: dict, save_to_db: bool = True) -> tuple[EmailMessage, dbEmail]:
         """Complete pipeline: SendGrid response -> Application model -> Database model (with automatic save)."""
         # Step 1: Convert SendGrid response to EmailMessage application model
-        email_msg = sendgridEmailResponseHandler.from_response_dict(response_dict, headers_dict)
+        with span('serialize.application_model'):
+            email_msg = sendgridEmailResponseHandler.from_response_dict(response_dict, headers_dict)
         
         # Step 2: Convert to database model and optionally save to Email table
         handler = cls()
-        db_email = handler.save_email(email_msg, auto_commit=save_to_db)
+        try:
+            db_email = handler.save_email(email_msg, auto_commit=save_to_db)
+        finally:
+            # Return the connection to the pool even when the save fails
+            handler.close_connection()
         
         return email_msg, db_email
     
@@ -488,17 +441,17 @@ class APIMessageHandler:
             # Initialize SendGrid connector
             connector = SendGridEmailConnector()
             
-            # Send email through connector
-            email_msg, response_data = connector.send_email(
-                from_email=from_email,
-                to_email=to_email,
-                subject=subject,
-                content=body,
-                save_to_db=save_to_db
-            )
-            
-            # Close connector connection
-            connector.close_connection()
+            # Send email through connector, closing its session whether or not the send succeeds
+            try:
+                email_msg, response_data = connector.send_email(
+                    from_email=from_email,
+                    to_email=to_email,
+                    subject=subject,
+                    content=body,
+                    save_to_db=save_to_db
+                )
+            finally:
+                connector.close_connection()
             
             logger_instance.info(
                 "Email sent successfully via SendGrid",
@@ -518,7 +471,7 @@ class APIMessageHandler:
         """Close the database session."""
         if self.session:
             self.session.close()
-            logger_instance.info("Database session closed")
+            logger_instance.debug("Database session closed")
 
     def __dict__(self):
         return {
@@ -532,15 +485,14 @@ class APIMessageHandler:
     """Handler for formatting conversation tuples into dicts for API responses."""
 
     @staticmethod
-    def conversation_tuples_to_dicts(convs):
+    def iter_conversation_dicts(convs):
         """
-        Convert a list of conversation tuples to a list of dicts.
-        Each tuple: (conversation_id, participants, last_message_date, message_count)
+        Lazily convert conversation tuples to dicts, one row at a time.
+        Each tuple: (conversation_id, reply_to, participants, last_message_date, message_count)
         """
-        result = []
         for row in convs:
             ph = any(participant.startswith('+') for participant in row[1])
-            result.append({
+            yield {
                 "conversation_id": str(row[0]),
                 "reply_to": row[1],
                 "participants": row[2].replace("->", ' 📱 ' if ph else ' 👥 '),
@@ -548,6 +500,152 @@ class APIMessageHandler:
                 "last_message_date": row[3].isoformat() if row[3] else None,
                 "message_count": row[4],
                 "has_phone_numbers": ph
-            })
-        return result
+            }
 
+    @staticmethod
+    def conversation_tuples_to_dicts(convs):
+        """
+        Convert a list of conversation tuples to a list of dicts.
+        Each tuple: (conversation_id, reply_to, participants, last_message_date, message_count)
+        """
+        return list(APIMessageHandler.iter_conversation_dicts(convs))
+
+    @staticmethod
+    def message_row_to_dict(row) -> dict:
+        """
+        Convert a Core messages row to the API response dict.
+        Row order follows db.queries.MESSAGE_LIST_COLUMNS:
+        (id, to_contact, from_contact, body, type, timestamp, status, external_sid, direction, error_code, error_message)
+        """
+        (id_, to_contact, from_contact, body, type_, timestamp,
+         status, external_sid, direction, error_code, error_message) = row
+        return {
+            'id': str(id_),
+            'to_contact': to_contact,
+            'from_contact': from_contact,
+            'body': body,
+            'type': type_,
+            'timestamp': timestamp.isoformat() if timestamp else None,
+            'status': status,
+            'external_sid': external_sid,
+            'direction': direction,
+            'error_code': error_code,
+            'error_message': error_message,
+            'is_delivered': status in ('delivered', 'sent') if status else False
+        }
+
+    @staticmethod
+    def iter_message_dicts(rows):
+        """Lazily convert Core message rows to API response dicts."""
+        to_dict = APIMessageHandler.message_row_to_dict
+        for row in rows:
+            yield to_dict(row)
+
+    @staticmethod
+    def group_conversation_messages(rows, conversation_ids) -> dict:
+        """
+        Group batch rows (conversation_id, then db.queries.MESSAGE_LIST_COLUMNS) by conversation.
+        Every requested id gets an entry, with `before` set to its oldest message id (None if empty).
+        """
+        to_dict = APIMessageHandler.message_row_to_dict
+        grouped = {str(conversation_id): {"messages": [], "before": None} for conversation_id in conversation_ids}
+        for row in rows:
+            entry = grouped[str(row[0])]
+            entry["messages"].append(to_dict(row[1:]))
+        for entry in grouped.values():
+            if entry["messages"]:
+                entry["before"] = entry["messages"][0]["id"]
+        return grouped
+
+    @staticmethod
+    def email_row_to_dict(row) -> dict:
+        """
+        Convert a lightweight Core emails row to the API listing dict.
+        Row order follows db.queries.EMAIL_LIST_COLUMNS.
+        """
+        (id_, conversation_id, to_contact, from_contact, subject, body_preview, has_html, type_,
+         timestamp, status, direction, external_message_id, error_code, error_message) = row
+        return {
+            'id': str(id_),
+            'conversation_id': str(conversation_id) if conversation_id else None,
+            'to_contact': to_contact,
+            'from_contact': from_contact,
+            'subject': subject,
+            'body_preview': body_preview,
+            'has_html': bool(has_html),
+            'type': type_,
+            'timestamp': timestamp.isoformat() if timestamp else None,
+            'status': status,
+            'direction': direction,
+            'external_message_id': external_message_id,
+            'error_code': error_code,
+            'error_message': error_message,
+        }
+
+    @staticmethod
+    def iter_email_dicts(rows):
+        """Lazily convert lightweight Core email rows to API listing dicts."""
+        to_dict = APIMessageHandler.email_row_to_dict
+        for row in rows:
+            yield to_dict(row)
+
+    @staticmethod
+    def search_row_to_dict(row) -> dict:
+        """
+        Convert a search hit to the API response dict.
+        Row order follows db.queries._search_select:
+        (kind, id, conversation_id, to_contact, from_contact, subject, snippet, timestamp, rank)
+        """
+        kind, id_, conversation_id, to_contact, from_contact, subject, snippet, timestamp, rank = row
+        return {
+            'type': kind,
+            'id': str(id_),
+            'conversation_id': str(conversation_id) if conversation_id else None,
+            'to_contact': to_contact,
+            'from_contact': from_contact,
+            'subject': subject,
+            'snippet': snippet,
+            'timestamp': timestamp.isoformat() if timestamp else None,
+            'rank': float(rank),
+        }
+
+    @staticmethod
+    def iter_search_dicts(rows):
+        """Lazily convert search hits to API response dicts."""
+        to_dict = APIMessageHandler.search_row_to_dict
+        for row in rows:
+            yield to_dict(row)
+
+    @staticmethod
+    def timeline_row_to_dict(row) -> dict:
+        """
+        Convert a unified timeline row (SMS or email) to the API response dict.
+        Row order follows db.queries._timeline_select:
+        (kind, id, to_contact, from_contact, subject, body, type, timestamp, status, direction, error_code, error_message)
+        `cursor` is the `after` value for the page that follows this row (undated rows page as UNDATED).
+        """
+        (kind, id_, to_contact, from_contact, subject, body, type_, timestamp,
+         status, direction, error_code, error_message) = row
+        return {
+            'kind': kind,
+            'id': str(id_),
+            'to_contact': to_contact,
+            'from_contact': from_contact,
+            'subject': subject,
+            'body': body,
+            'type': type_,
+            'timestamp': timestamp.isoformat() if timestamp else None,
+            'status': status,
+            'direction': direction,
+            'error_code': error_code,
+            'error_message': error_message,
+            'is_delivered': status in ('delivered', 'sent') if status else False,
+            'cursor': timeline_cursor(timestamp or UNDATED, id_),
+        }
+
+    @staticmethod
+    def iter_timeline_dicts(rows):
+        """Lazily convert unified timeline rows to API response dicts."""
+        to_dict = APIMessageHandler.timeline_row_to_dict
+        for row in rows:
+            yield to_dict(row)
@@ -1,22 +1,115 @@
-from pydantic import BaseModel, Field, ConfigDict
-from uuid import UUID, uuid4
+from pydantic import BaseModel, BeforeValidator, Field, ConfigDict
+from uuid import UUID
 from enum import Enum
 from datetime import datetime
+from typing import Annotated, Iterable, Self
+from functools import lru_cache
 import hashlib
 
+from utils.contacts import normalize_contact
+from utils.dates import parse_provider_datetime
+from utils.ids import uuid7
+
+# Bounded: one entry per (to, from) pair seen recently, roughly 300 bytes each
+CONVERSATION_ID_CACHE_SIZE = 16384
+
+
+def _hash_conversation(to: str, from_: str) -> UUID:
+    """Hash the normalised, sorted contacts; the first 16 bytes of the SHA-256 become the UUID."""
+    first, second = sorted((normalize_contact(to), normalize_contact(from_)))
+    return UUID(bytes=hashlib.sha256(f"{first}{second}".encode()).digest()[:16])
+
+
+@lru_cache(maxsize=CONVERSATION_ID_CACHE_SIZE)
 def generate_conversation_id(to: str, from_: str) -> UUID:
-    """Generate a conversation ID by sorting to/from IDs, concatenating, and hashing to UUID."""
-    # Sort the IDs to ensure consistent conversation IDs regardless of message direction
-    sorted_ids = sorted([to, from_])
-    concatenated = ''.join(sorted_ids)
-    
-    # Hash the concatenated string and convert to UUID
-    hash_object = hashlib.sha256(concatenated.encode())
-    hash_hex = hash_object.hexdigest()
-    
-    # Use first 32 characters of hash to create UUID
-    uuid_string = f"{hash_hex[:8]}-{hash_hex[8:12]}-{hash_hex[12:16]}-{hash_hex[16:20]}-{hash_hex[20:32]}"
-    return UUID(uuid_string)
+    """
+    Conversation ID for a pair of contacts, the same in either direction.
+
+    Contacts are normalised first (utils.contacts), so '(833) 345-0761' and
+    '+18333450761' share a conversation. Results are memoized; the cache is
+    bounded and UUIDs are immutable, so callers can share them.
+    """
+    return _hash_conversation(to, from_)
+
+
+def generate_conversation_ids(pairs: Iterable[tuple[str, str]]) -> list[UUID]:
+    """
+    Conversation IDs for many (to, from) pairs, in order, for bulk import and backfill.
+
+    Each distinct pair is hashed once. A local memo is used instead of the
+    shared LRU so a large backfill doesn't evict the live request path's entries.
+    """
+    memo: dict[tuple[str, str], UUID] = {}
+    ids = []
+    for pair in pairs:
+        conversation_id = memo.get(pair)
+        if conversation_id is None:
+            conversation_id = memo[pair] = _hash_conversation(*pair)
+        ids.append(conversation_id)
+    return ids
+
+
+class trustedModel(BaseModel):
+    """
+    Base for models that are validated at the edge and trusted internally.
+
+    Calling the class validates its input: use it for request bodies and raw
+    provider payloads. `trusted()` skips validation for data that has already
+    been through it (a validated provider response, another model's fields, our
+    own DB rows) and only fills defaults and derived fields (model_post_init).
+    """
+
+    @classmethod
+    def trusted(cls, **data) -> Self:
+        """
+        Build from already-valid data without validating it again.
+
+        Keys are field names (not aliases). Values are stored as given, with no
+        coercion: pass the field types (plain str for str fields, not enum members).
+        """
+        defaults, factories, post_init = _trusted_defaults.get(cls) or _precompute_defaults(cls)
+        values = defaults.copy()
+        values.update(data)
+        for name, factory in factories:
+            if name not in data:
+                values[name] = factory()
+        m = cls.__new__(cls)
+        _object_setattr(m, '__dict__', values)
+        _object_setattr(m, '__pydantic_fields_set__', set(data))
+        _object_setattr(m, '__pydantic_extra__', None)
+        _object_setattr(m, '__pydantic_private__', None)
+        if post_init:
+            m.model_post_init(None)
+        return m
+
+
+_object_setattr = object.__setattr__
+
+# Per model class: (static defaults in field order, ((name, default_factory), ...), has model_post_init)
+_trusted_defaults: dict[type, tuple[dict, tuple, bool]] = {}
+
+
+def _precompute_defaults(cls: type[BaseModel]) -> tuple[dict, tuple, bool]:
+    """Defaults are read from the field definitions once per class instead of on every trusted() call."""
+    defaults, factories = {}, []
+    for name, field in cls.model_fields.items():
+        if field.default_factory is not None:
+            factories.append((name, field.default_factory))
+        elif not field.is_required():
+            defaults[name] = field.default
+    _trusted_defaults[cls] = (defaults, tuple(factories), bool(cls.__pydantic_post_init__))
+    return _trusted_defaults[cls]
+
+
+def _provider_datetime(value):
+    # Strings go through the cached format-detecting parser; anything it rejects is left for pydantic to report
+    if isinstance(value, str):
+        return parse_provider_datetime(value) or value
+    return value
+
+
+# A datetime that also accepts RFC 2822/HTTP dates as sent by Twilio, besides ISO 8601
+ProviderDatetime = Annotated[datetime, BeforeValidator(_provider_datetime)]
 
 
 class twilioResponseHeader(BaseModel):
@@ -42,16 +135,16 @@ class twilioResponseHeader(BaseModel):
     vary: str | None = None  # Optional field for additional headers
 
 
-class twilioSMSResponse(BaseModel):
+class twilioSMSResponse(trustedModel):
     """Model for Twilio API message response."""
     model_config = ConfigDict(from_attributes=True, validate_by_name=True)
     
     account_sid: str
     api_version: str
     body: str
-    date_created: datetime
-    date_sent: datetime | None = None
-    date_updated: datetime
+    date_created: ProviderDatetime
+    date_sent: ProviderDatetime | None = None
+    date_updated: ProviderDatetime
     direction: str
     error_code: int | None = None
     error_message: str | None = None
@@ -69,7 +162,7 @@ class twilioSMSResponse(BaseModel):
 
 
 
-class twilioSMS(BaseModel):
+class twilioSMS(trustedModel):
     """Model for Twilio API messages."""
     model_config = ConfigDict(from_attributes=True)
     
@@ -81,8 +174,8 @@ class twilioSMS(BaseModel):
 
 
 
-    def __init__(self, **data):
-        super().__init__(**data)
+    def model_post_init(self, context):
+        # Runs once after validation (or after trusted()), instead of re-entering __init__
         if self.conversation_id is None:
             self.conversation_id = generate_conversation_id(self.to, self.from_)
 
@@ -118,10 +211,10 @@ class MessageType(str, Enum):
     MMS = "mms"
     EMAIL = "email"
 
-class apiMessage(BaseModel):
+class apiMessage(trustedModel):
     """Base model for API messages."""
     
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = Field(default_factory=uuid7)
     to: str
     from_: str = Field(..., alias='from')
     body: str
@@ -131,17 +224,16 @@ class apiMessage(BaseModel):
     timestamp: datetime | None = None
     conversation_id: UUID | None = None
     
-    def __init__(self, **data):
-        super().__init__(**data)
+    def model_post_init(self, context):
         if self.timestamp is None:
             self.timestamp = datetime.now()
         if self.conversation_id is None:
             self.conversation_id = generate_conversation_id(self.to, self.from_)
 
-class hatchMessage(BaseModel):
+class hatchMessage(trustedModel):
     model_config = ConfigDict(from_attributes=True)
     
-    id: UUID = Field(default_factory=uuid4)
+    id: UUID = Field(default_factory=uuid7)
     to_contact: str
     from_contact: str
     body: str
@@ -162,8 +254,7 @@ class hatchMessage(BaseModel):
     date_sent: datetime | None = None  # When message was actually sent
     date_updated: datetime | None = None  # When message was last updated
 
-    def __init__(self, **data):
-        super().__init__(**data)
+    def model_post_init(self, context):
         if self.timestamp is None:
             self.timestamp = datetime.now()
         if self.conversation_id is None:
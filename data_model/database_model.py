@@ -1,10 +1,23 @@
-from sqlalchemy import Column, Integer, String, Uuid, DateTime, Float, Text
+from datetime import datetime
 
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, Integer, String, Uuid, DateTime, Float, Text, Index, JSON, DDL, event, func, literal_column
+from sqlalchemy.dialects.postgresql import JSONB
+
+from sqlalchemy.orm import declarative_base, deferred
 from sqlalchemy.schema import MetaData
 
 
 modelMetaData = MetaData(schema="public")
+
+# JSON documents: JSONB on Postgres (GIN-indexable, queryable with @>), JSON text on SQLite.
+# The column type serializes on write and parses on read; None is stored as SQL NULL, not JSON null.
+JsonDocument = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql')
+
+
+def gin_index(name: str, column: str) -> Index:
+    """Postgres-only GIN index (jsonb_path_ops: smaller and faster, serves @> containment)."""
+    return Index(name, column, postgresql_using='gin',
+                 postgresql_ops={column: 'jsonb_path_ops'}).ddl_if(dialect='postgresql')
 Base = declarative_base(metadata=modelMetaData)
 
 class User(Base):
@@ -17,6 +30,12 @@ class User(Base):
 
 class Message(Base):
     __tablename__ = 'messages'
+    # Keyset paging: ids are UUIDv7 (time-ordered), so (conversation_id, id) serves
+    # "this conversation's messages after <id>" as a single index range scan
+    __table_args__ = (
+        Index('ix_messages_conversation_id_id', 'conversation_id', 'id'),
+    )
+
     id = Column(Uuid, primary_key=True)
     to_contact = Column(String)
     from_contact = Column(String)
@@ -44,13 +63,20 @@ class Message(Base):
 
 class dbEmail(Base):
     __tablename__ = 'emails'
+    __table_args__ = (
+        Index('ix_emails_conversation_id_id', 'conversation_id', 'id'),
+        # "all emails CC'd to X", "all responses with status_code 500" (db.queries.json_contains)
+        gin_index('ix_emails_cc_gin', 'cc'),
+        gin_index('ix_emails_bcc_gin', 'bcc'),
+        gin_index('ix_emails_provider_response_gin', 'provider_response'),
+    )
     
     id = Column(Uuid, primary_key=True)
     to_contact = Column(String, nullable=False)
     from_contact = Column(String, nullable=False)
     subject = Column(String, nullable=False)
     body = Column(Text)  # Plain text content
-    html_content = Column(Text)  # HTML content
+    html_content = deferred(Column(Text), group='content')  # HTML content, loaded on demand
     type = Column(String, default='email')
     timestamp = Column(DateTime)
     status = Column(String)
@@ -58,15 +84,15 @@ class dbEmail(Base):
     direction = Column(String)  # inbound-api, outbound-api, etc.
     
     # Email-specific fields
-    cc = Column(String)  # JSON string for list of CC emails
-    bcc = Column(String)  # JSON string for list of BCC emails
+    cc = Column(JsonDocument)  # List of CC emails
+    bcc = Column(JsonDocument)  # List of BCC emails
     reply_to = Column(String)
-    attachments = Column(String)  # JSON string for list of attachments
+    attachments = Column(JsonDocument)  # List of attachments
     
     # Provider-specific fields
     external_message_id = Column(String)  # SendGrid message ID
     provider = Column(String, default='sendgrid')
-    provider_response = Column(Text)  # JSON string for full provider response
+    provider_response = deferred(Column(JsonDocument), group='content')  # Full provider response, loaded on demand
     
     # Tracking fields
     date_sent = Column(DateTime)
@@ -78,3 +104,88 @@ class dbEmail(Base):
         return f"<dbEmail(id={self.id}, from={self.from_contact}, to={self.to_contact}, subject={self.subject}, status={self.status}, message_id={self.external_message_id})>"
 
 
+# The unified timeline (db.queries.conversation_timeline_stmt) pages on (timeline_position, id).
+# Legacy rows without a timestamp sort first, as UNDATED, instead of dropping out of
+# the row-value comparison. The constant is inlined (not a bind parameter) so queries
+# match the expression indexes below, and carries microseconds so it compares
+# correctly with SQLite's stored datetime strings.
+UNDATED = datetime.min
+_UNDATED_SQL = f"'{UNDATED.isoformat(sep=' ', timespec='microseconds')}'"
+
+
+def timeline_position(timestamp):
+    """coalesce(timestamp, UNDATED): the timeline sort key for a timestamp column."""
+    return func.coalesce(timestamp, literal_column(_UNDATED_SQL, DateTime))
+
+
+Index('ix_messages_conversation_timeline', Message.conversation_id, timeline_position(Message.timestamp), Message.id)
+Index('ix_emails_conversation_timeline', dbEmail.conversation_id, timeline_position(dbEmail.timestamp), dbEmail.id)
+
+
+class ProviderTelemetry(Base):
+    """One provider API call, as reported by its response headers and our client timing."""
+    __tablename__ = 'provider_telemetry'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    recorded_at = Column(DateTime, nullable=False)
+    provider = Column(String, nullable=False)  # twilio, sendgrid
+    operation = Column(String, nullable=False)  # send_sms, check_delivery
+    status_code = Column(Integer)
+    total_ms = Column(Float)  # Client-observed time to response headers
+    provider_ms = Column(Float)  # Provider-reported processing time (Twilio-Request-Duration)
+    network_ms = Column(Float)  # total_ms - provider_ms
+    concurrent_requests = Column(Integer)  # Twilio-Concurrent-Requests
+    home_region = Column(String)  # X-Home-Region
+    request_id = Column(String)  # Twilio-Request-Id
+
+    def __repr__(self):
+        return f"<ProviderTelemetry(provider={self.provider}, operation={self.operation}, total_ms={self.total_ms}, provider_ms={self.provider_ms})>"
+
+
+class Contact(Base):
+    """Distinct phone numbers and email addresses seen in messages and emails, for autocomplete (db/contacts.py)."""
+    __tablename__ = 'contacts'
+    __table_args__ = (
+        # Substring and prefix lookups (ILIKE '%...%') on Postgres
+        Index('ix_contacts_contact_trgm', 'contact', postgresql_using='gin',
+              postgresql_ops={'contact': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+    contact = Column(String, primary_key=True)  # Normalised (utils.normalize_contact)
+    kind = Column(String)  # phone, email or other
+    first_seen = Column(DateTime)  # Naive UTC
+    last_seen = Column(DateTime)  # Naive UTC
+
+    def __repr__(self):
+        return f"<Contact(contact={self.contact}, kind={self.kind}, last_seen={self.last_seen})>"
+
+
+event.listen(Contact.__table__, 'before_create',
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql'))
+
+
+# Full-text search (Postgres). Each searchable table gets a generated tsvector
+# column, recomputed by Postgres on every insert/update, and a GIN index on it.
+# They are added by DDL when the table is created rather than declared on the
+# model, so the ORM never reads or writes them and SQLite keeps the same schema.
+SEARCH_CONFIG = 'english'
+SEARCH_DOCUMENTS = {
+    Message.__table__: f"to_tsvector('{SEARCH_CONFIG}', coalesce(body, ''))",
+    # Subject matches rank above body matches
+    dbEmail.__table__: (f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(subject, '')), 'A') || "
+                        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(body, '')), 'B')"),
+}
+
+
+def search_vector_ddl(table) -> list[DDL]:
+    """Statements adding `search_vector` and its GIN index to a table (idempotent)."""
+    return [
+        DDL(f"ALTER TABLE %(fullname)s ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_DOCUMENTS[table]}) STORED"),
+        DDL(f"CREATE INDEX IF NOT EXISTS ix_{table.name}_search_vector ON %(fullname)s USING gin (search_vector)"),
+    ]
+
+
+for _table in SEARCH_DOCUMENTS:
+    for _ddl in search_vector_ddl(_table):
+        event.listen(_table, 'after_create', _ddl.execute_if(dialect='postgresql'))
@@ -1,8 +1,17 @@
-from .postgres_connector import hatchPostgres
+from .postgres_connector import hatchPostgres, get_pg
+from .backends import storageBackend, postgresBackend, sqliteBackend, get_backend, backend_for_url
+from .contacts import rebuild_contacts
 
 
 
 __all__ = [
     'hatchPostgres',
+    'get_pg',
+    'storageBackend',
+    'postgresBackend',
+    'sqliteBackend',
+    'get_backend',
+    'backend_for_url',
+    'rebuild_contacts',
 ]
 
@@ -0,0 +1,159 @@
+"""
+Storage backends behind hatchPostgres.
+
+A backend knows how to build the engine for one kind of database: its URL,
+pool settings and per-connection setup. The API, handlers and db/queries.py
+only see the SQLAlchemy engine, so the same Core statements and ORM models run
+on either backend.
+
+* postgres (default): POSTGRES_* settings, pooled connections.
+* sqlite: HATCH_SQLITE_PATH, a file or `:memory:` (the default). Needs no
+  external services, for tests, benchmarks and local development. The models'
+  `public` schema is mapped away, and each connection gets foreign keys, a busy
+  timeout and, for files, WAL journaling so readers don't block the writer.
+  An in-memory database lives in one shared connection (StaticPool) and
+  disappears with the process, so use a file with more than one worker.
+
+HATCH_DB_BACKEND picks the backend. DATABASE_URL, when set, takes precedence,
+and its scheme picks the backend.
+"""
+
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.pool import StaticPool
+
+from utils import get_config
+
+SQLITE_MEMORY = ':memory:'
+
+
+class storageBackend:
+    """Engine construction for one kind of database."""
+
+    name = 'base'
+    supports_create_database = False
+
+    def __init__(self, url: str):
+        self.url = url
+
+    @property
+    def database_name(self) -> str:
+        return self.url.rsplit('/', 1)[-1]
+
+    def engine_options(self) -> dict:
+        return {}
+
+    def configure_engine(self, engine):
+        """Install per-connection setup on a freshly created engine."""
+
+    def create_engine(self):
+        engine = create_engine(self.url, future=True, **self.engine_options())
+        self.configure_engine(engine)
+        return engine
+
+    def __repr__(self):
+        return f"<{type(self).__name__}({self.database_name})>"
+
+
+class postgresBackend(storageBackend):
+    """PostgreSQL through the pooled engine, one pool per worker process."""
+
+    name = 'postgres'
+    supports_create_database = True
+
+    @classmethod
+    def from_config(cls, config=None) -> 'postgresBackend':
+        config = config or get_config()
+        return cls(f"postgresql://{config.postgres_user}:{config.postgres_password}"
+                   f"@{config.postgres_host}:{config.postgres_port}/{config.postgres_db}")
+
+    def engine_options(self) -> dict:
+        """Connection pool sizing from the DB_POOL_* settings; the pool is per process (per worker)."""
+        config = get_config()
+        return {
+            'pool_size': config.db_pool_size,
+            'max_overflow': config.db_max_overflow,
+            'pool_timeout': config.db_pool_timeout,
+            'pool_recycle': config.db_pool_recycle,
+            'pool_pre_ping': True,
+        }
+
+
+class sqliteBackend(storageBackend):
+    """SQLite file or in-memory database with the same schema as Postgres."""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str = SQLITE_MEMORY):
+        self.path = path
+        super().__init__('sqlite://' if path == SQLITE_MEMORY else f"sqlite:///{path}")
+
+    @classmethod
+    def from_url(cls, url: str) -> 'sqliteBackend':
+        return cls(make_url(url).database or SQLITE_MEMORY)
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path == SQLITE_MEMORY
+
+    @property
+    def database_name(self) -> str:
+        return self.path
+
+    def engine_options(self) -> dict:
+        options = {
+            # Models are declared in the `public` schema; SQLite has no schemas
+            'execution_options': {'schema_translate_map': {'public': None}},
+            # Request threads share pooled connections
+            'connect_args': {'check_same_thread': False},
+        }
+        if self.in_memory:
+            # Every checkout must see the same database, which only exists inside one connection
+            options['poolclass'] = StaticPool
+        return options
+
+    def configure_engine(self, engine):
+        in_memory = self.in_memory
+
+        @event.listens_for(engine, 'connect')
+        def _sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            if not in_memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+
+BACKENDS = {
+    'postgres': postgresBackend,
+    'sqlite': sqliteBackend,
+}
+
+
+def backend_for_url(url: str) -> storageBackend:
+    """Backend for an explicit SQLAlchemy URL, chosen by its scheme."""
+    if url.startswith('sqlite'):
+        return sqliteBackend.from_url(url)
+    return postgresBackend(url)
+
+
+def get_backend(config=None) -> storageBackend:
+    """
+    Backend selected by the application config.
+
+    Returns:
+        storageBackend: From DATABASE_URL if set, otherwise HATCH_DB_BACKEND (default postgres).
+
+    Raises:
+        ValueError: If HATCH_DB_BACKEND names an unknown backend.
+    """
+    config = config or get_config()
+    if config.database_url:
+        return backend_for_url(config.database_url)
+    name = (config.db_backend or 'postgres').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HATCH_DB_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+    if name == 'sqlite':
+        return sqliteBackend(config.sqlite_path)
+    return postgresBackend.from_config(config)
@@ -0,0 +1,193 @@
+"""
+The contacts table: distinct phone numbers and email addresses for autocomplete.
+
+It is maintained incrementally by a session hook. Whenever messages or emails
+are flushed, their to/from contacts are upserted (normalised, with first and
+last seen times) in the same transaction. A business number takes part in every
+conversation, so refreshing its row on every write would serialise all writes
+on that one row's lock. Instead each worker remembers which contacts it recorded
+recently, and only writes again once LAST_SEEN_GRANULARITY has passed.
+`last_seen` is therefore accurate to about that window, which is plenty for
+ranking suggestions. Seen times are stored, cached and compared as naive UTC:
+provider rows carry aware timestamps and API rows naive local ones.
+
+Core bulk inserts (tests/generate_dataset.py) bypass the hook. Rebuild the
+table from the message history with:
+
+    python -m db.contacts
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, select, union_all, case, or_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from data_model.database_model import Contact, Message, dbEmail
+from utils import logger, normalize_contact, contact_kind, to_naive_utc
+
+logger_instance = logger
+
+contacts = Contact.__table__
+
+LAST_SEEN_GRANULARITY = timedelta(hours=1)
+RECENT_CONTACTS_SIZE = 10000
+REBUILD_BATCH_SIZE = 5000
+
+_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+
+class recentContacts:
+    """Bounded, thread-safe map of contact -> last_seen this worker last wrote."""
+
+    def __init__(self, size: int = RECENT_CONTACTS_SIZE):
+        self.size = size
+        self._seen: OrderedDict[str, datetime] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stale(self, contact: str, seen: datetime) -> bool:
+        """True if `contact` should be written for a message at `seen`."""
+        with self._lock:
+            recorded = self._seen.get(contact)
+            if recorded is not None and seen - recorded < LAST_SEEN_GRANULARITY:
+                self._seen.move_to_end(contact)
+                return False
+            return True
+
+    def remember(self, rows: list[dict]):
+        with self._lock:
+            for row in rows:
+                self._seen[row['contact']] = row['last_seen']
+                self._seen.move_to_end(row['contact'])
+            while len(self._seen) > self.size:
+                self._seen.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._seen.clear()
+
+
+recent_contacts = recentContacts()
+
+
+def merge_contacts(sightings) -> list[dict]:
+    """
+    Fold (contact, first_seen, last_seen) sightings into one row per normalised contact.
+    Seen times may be aware or naive (local); rows carry them as naive UTC.
+
+    Returns:
+        list[dict]: Contacts rows, sorted by contact so concurrent upserts lock rows in the same order.
+    """
+    merged: dict[str, dict] = {}
+    for raw, first_seen, last_seen in sightings:
+        if not raw:
+            continue
+        contact = normalize_contact(raw)
+        first_seen = to_naive_utc(first_seen) if first_seen is not None else None
+        last_seen = to_naive_utc(last_seen) if last_seen is not None else None
+        row = merged.get(contact)
+        if row is None:
+            merged[contact] = {'contact': contact, 'kind': contact_kind(contact),
+                               'first_seen': first_seen, 'last_seen': last_seen}
+            continue
+        if first_seen is not None and (row['first_seen'] is None or first_seen < row['first_seen']):
+            row['first_seen'] = first_seen
+        if last_seen is not None and (row['last_seen'] is None or last_seen > row['last_seen']):
+            row['last_seen'] = last_seen
+    return [merged[contact] for contact in sorted(merged)]
+
+
+def upsert_contacts(connection, rows: list[dict]):
+    """Insert new contacts; move last_seen (and first_seen) of existing ones outwards only."""
+    if not rows:
+        return
+    insert = _INSERTS[connection.dialect.name](contacts)
+    excluded = insert.excluded
+    connection.execute(
+        insert.on_conflict_do_update(
+            index_elements=[contacts.c.contact],
+            set_={
+                'last_seen': case((or_(contacts.c.last_seen.is_(None), excluded.last_seen > contacts.c.last_seen),
+                                   excluded.last_seen), else_=contacts.c.last_seen),
+                'first_seen': case((or_(contacts.c.first_seen.is_(None), excluded.first_seen < contacts.c.first_seen),
+                                    excluded.first_seen), else_=contacts.c.first_seen),
+            },
+            # Leave rows that already cover this sighting untouched
+            where=or_(contacts.c.last_seen.is_(None), contacts.c.last_seen < excluded.last_seen,
+                      contacts.c.first_seen.is_(None), contacts.c.first_seen > excluded.first_seen),
+        ),
+        rows,
+    )
+
+
+def _record_flushed_contacts(session, flush_context):
+    """after_flush hook: upsert the contacts of newly added messages and emails."""
+    sightings = []
+    for obj in session.new:
+        if isinstance(obj, (Message, dbEmail)):
+            seen = obj.timestamp or datetime.now()
+            sightings.append((obj.to_contact, seen, seen))
+            sightings.append((obj.from_contact, seen, seen))
+    if not sightings:
+        return
+    rows = [row for row in merge_contacts(sightings) if recent_contacts.stale(row['contact'], row['last_seen'])]
+    if not rows:
+        return
+    connection = session.connection()
+    if connection.dialect.name not in _INSERTS:
+        return
+    upsert_contacts(connection, rows)
+    session.info.setdefault('written_contacts', []).extend(rows)
+
+
+def _remember_committed_contacts(session):
+    recent_contacts.remember(session.info.pop('written_contacts', ()))
+
+
+def _forget_rolled_back_contacts(session):
+    session.info.pop('written_contacts', None)
+
+
+def install_contact_tracking(session_factory):
+    """Keep the contacts table current for sessions made by `session_factory`."""
+    event.listen(session_factory, 'after_flush', _record_flushed_contacts)
+    # Only a committed write lets later flushes skip the contact
+    event.listen(session_factory, 'after_commit', _remember_committed_contacts)
+    event.listen(session_factory, 'after_rollback', _forget_rolled_back_contacts)
+
+
+def rebuild_contacts(engine) -> int:
+    """
+    Upsert every contact in the message and email history; returns distinct contacts written.
+
+    Contacts are grouped in SQL first, so only one row per raw spelling comes back
+    to be normalised and merged.
+    """
+    sightings = union_all(*(
+        select(column.label('contact'), table.c.timestamp)
+        for table in (Message.__table__, dbEmail.__table__)
+        for column in (table.c.to_contact, table.c.from_contact)
+    )).subquery('sightings')
+    grouped = (
+        select(sightings.c.contact, func.min(sightings.c.timestamp), func.max(sightings.c.timestamp))
+        .group_by(sightings.c.contact)
+    )
+    with engine.connect() as conn:
+        rows = merge_contacts(conn.execute(grouped))
+    for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+        with engine.begin() as conn:
+            upsert_contacts(conn, rows[start:start + REBUILD_BATCH_SIZE])
+    recent_contacts.clear()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from db.postgres_connector import get_pg
+
+    pg = get_pg()
+    engine = pg.get_engine()
+    Contact.__table__.create(engine, checkfirst=True)
+    written = rebuild_contacts(engine)
+    logger_instance.info("Contacts rebuilt", contacts=written, backend=pg.backend.name)
@@ -4,49 +4,100 @@ from data_model import hatchUser, MessageType, Message, SMSMessage, EmailMessage
 
 l = logger
 import os
-import dotenv
+import re
+import time
+from functools import lru_cache
 
 import sqlalchemy
-from sqlalchemy import create_engine, exc, Executable, text, Connection
+from sqlalchemy import create_engine, exc, Executable, text, Connection, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from utils.metrics import registry, db_statement_duration, db_statement_errors_total
+from utils.tracing import record_span
+from db.slow_queries import slow_queries
+from db.backends import storageBackend, get_backend
+from db.contacts import install_contact_tracking
 
-dotenv.load_dotenv()
-dotenv_secrets = os.path.join('.secrets', '.secrets')
-dotenv.load_dotenv(dotenv_secrets, override=True)
 
 
 
+
+_STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+([\w."]+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_class(statement: str) -> str:
+    """Low-cardinality label for a SQL statement: verb plus first table, e.g. 'SELECT messages'."""
+    stripped = statement.lstrip()
+    verb = stripped.split(None, 1)[0].upper() if stripped else 'UNKNOWN'
+    match = _STATEMENT_TABLE.search(stripped)
+    if match is None:
+        return verb
+    table = match.group(1).replace('"', '').split('.')[-1]
+    return f"{verb} {table}"
+
+
+def install_engine_hooks(engine):
+    """
+    Time every cursor execution into the statement-class latency histogram, a db.query
+    trace span and the slow-query log (which captures EXPLAIN plans past its threshold).
+    """
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+        label = statement_class(statement)
+        db_statement_duration.labels(label).observe(elapsed)
+        end_ns = time.time_ns()
+        record_span('db.query', end_ns - int(elapsed * 1_000_000_000), end_ns, statement=label)
+        slow_queries.observe(conn, cursor, statement, parameters, elapsed, executemany)
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_start_time'):
+            conn.info['query_start_time'].pop()
+        if exception_context.statement:
+            db_statement_errors_total.labels(statement_class(exception_context.statement)).inc()
+
+
 class hatchPostgres():
-    def __init__(self):
+    def __init__(self, backend: storageBackend | None = None):
+        """
+        Args:
+            backend (storageBackend): Database to use; defaults to the configured one (see db/backends.py).
+        """
+        self.backend = backend
         self.engine = None
         self.session = None
+        self.session_factory = None
         self.conn: Connection | None = None
-        self.start_connection()
 
     def get_database_url(self) -> str:
-        """Retrieves the database URL from environment variables."""
-        db_user = os.environ.get('POSTGRES_USER')
-        db_password = os.environ.get('POSTGRES_PASSWORD')
-        db_host = os.environ.get('POSTGRES_HOST')
-        db_port = os.environ.get('POSTGRES_PORT', '5432')
-        self.db_name = os.environ.get('POSTGRES_DB')
-
-            
-        return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}"
-    
-
+        """Resolves the storage backend (from the application config unless one was given) and returns its URL."""
+        if self.backend is None:
+            self.backend = get_backend()
+        self.db_name = self.backend.database_name
+        return self.backend.url
 
     def start_connection(self, debug=False):
-        """Creates a PostgreSQL database engine and session."""
+        """Returns a new session on the shared engine, creating the engine and its pool on first use."""
         try:
-            db_url = self.get_database_url()
-            # Keep the engine as the actual SQLAlchemy engine
-            self.engine = create_engine(f"{db_url}/{self.db_name}", future=True)
+            if self.engine is None:
+                self.get_database_url()
+                # Keep the engine as the actual SQLAlchemy engine; it owns the connection pool
+                self.engine = self.backend.create_engine()
+                install_engine_hooks(self.engine)
+                # Keep committed objects readable after their session is closed (handlers return them)
+                self.session_factory = sessionmaker(bind=self.engine, expire_on_commit=False)
+                install_contact_tracking(self.session_factory)
             
             # Create session
-            Session = sessionmaker(bind=self.engine)
-            self.session = Session()
+            self.session = self.session_factory()
             
             if debug:
                 # Test the connection using ORM
@@ -55,9 +106,20 @@ class hatchPostgres():
             
             return self.session
         except exc.OperationalError as e:
-            l.error(f"Failed to connect to the PostgreSQL database: {e}")
+            l.error(f"Failed to connect to the {self.backend.name} database: {e}")
             return None
 
+    def reset_after_fork(self):
+        """
+        Give a forked worker its own connection pool.
+
+        Connections inherited from the parent process are dropped without being closed
+        (the parent still owns the sockets); the pool then reconnects lazily in the child.
+        """
+        if self.engine is not None:
+            self.engine.dispose(close=False)
+            l.info("Database pool reset after fork", pid=os.getpid())
+
     def get_engine(self):
         """Return the SQLAlchemy engine for raw connections."""
         # Make sure we have connected first to initialize the engine
@@ -67,7 +129,7 @@ class hatchPostgres():
 
     def create_tables(self):
         """Create all tables using ORM metadata (CREATE IF NOT EXISTS behavior)."""
-        if self.engine is None:
+        if self.get_engine() is None:
             l.error("No engine available. Connect first.")
             return False
             
@@ -88,6 +150,10 @@ class hatchPostgres():
         if self.engine is None:
             l.error("No engine available. Cannot create database.")
             return False
+
+        if not self.backend.supports_create_database:
+            l.error(f"CREATE DATABASE is not supported by the {self.backend.name} backend")
+            return False
         
         try:
             with self.engine.connect() as conn:
@@ -102,6 +168,29 @@ class hatchPostgres():
 
 
 
+@lru_cache(maxsize=1)
+def get_pg() -> hatchPostgres:
+    """Process-wide database handle shared by the API and message handlers."""
+    return hatchPostgres()
+
+
+def _pool_usage():
+    """Connection pool usage of the shared engine, if it has been created."""
+    engine = get_pg().engine
+    pool = engine.pool if engine is not None else None
+    if pool is None or not hasattr(pool, 'checkedout'):
+        return None
+    return {
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'size': pool.size(),
+    }
+
+
+registry.gauge_callback('hatch_db_pool_connections', 'Database pool connections by state.', _pool_usage, ('state',))
+
+
 if __name__ == "__main__":
     # Example usage
     pg = hatchPostgres()
@@ -0,0 +1,430 @@
+"""
+Core (non-ORM) statements for the hot read endpoints.
+
+These select exactly the columns the API serializes and return plain tuple rows,
+skipping ORM entity hydration and the identity map. The statements are built once
+at import and bound with parameters per request, so SQLAlchemy's compiled-statement
+cache is hit on every call after the first.
+"""
+
+from uuid import UUID
+
+from sqlalchemy import (select, bindparam, func, case, cast, and_, or_, tuple_, true, Boolean, DateTime, Float,
+                        String, Uuid, column, literal, null, union_all)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from data_model.database_model import (Message, dbEmail, Contact, JsonDocument, SEARCH_CONFIG, UNDATED,
+                                       timeline_position)
+
+
+messages = Message.__table__
+emails = dbEmail.__table__
+
+# Column order is the contract for APIMessageHandler.message_row_to_dict
+MESSAGE_LIST_COLUMNS = (
+    messages.c.id,
+    messages.c.to_contact,
+    messages.c.from_contact,
+    messages.c.body,
+    messages.c.type,
+    messages.c.timestamp,
+    messages.c.status,
+    messages.c.external_sid,
+    messages.c.direction,
+    messages.c.error_code,
+    messages.c.error_message,
+)
+
+# Conversation summaries cover SMS and email: both tables carry conversation_id, and
+# emails use the same direction values, so one grouped query over their union
+# lists every thread.
+_threads = union_all(*(
+    select(table.c.conversation_id, table.c.to_contact, table.c.from_contact,
+           table.c.direction, table.c.timestamp, table.c.id)
+    for table in (messages, emails)
+)).subquery('threads')
+
+_reply_to = case(
+    (_threads.c.direction == 'inbound-api', _threads.c.from_contact),
+    else_=_threads.c.to_contact
+)
+_participants = case(
+    (_threads.c.direction == 'inbound-api', _threads.c.from_contact + '->' + _threads.c.to_contact),
+    else_=_threads.c.to_contact + '->' + _threads.c.from_contact
+)
+
+# Column order is the contract for APIMessageHandler.iter_conversation_dicts
+conversations_stmt = (
+    select(
+        _threads.c.conversation_id,
+        _reply_to.label('reply_to'),
+        _participants.label('participants'),
+        func.max(_threads.c.timestamp).label('last_message_date'),
+        func.count(_threads.c.id).label('messages')
+    )
+    .group_by(_threads.c.conversation_id, _reply_to, _participants)
+    .order_by(func.max(_threads.c.timestamp).desc())
+)
+
+conversation_messages_stmt = (
+    select(*MESSAGE_LIST_COLUMNS)
+    .where(messages.c.conversation_id == bindparam('conversation_id'))
+    .order_by(messages.c.timestamp.asc())
+)
+
+new_messages_stmt = (
+    select(*MESSAGE_LIST_COLUMNS)
+    .where(
+        messages.c.conversation_id == bindparam('conversation_id'),
+        messages.c.timestamp > bindparam('since')
+    )
+    .order_by(messages.c.timestamp.asc())
+)
+
+# Keyset pages: ids are UUIDv7, so id order is creation order and the next page
+# starts after the last id seen. Served by ix_messages_conversation_id_id; pass
+# FIRST_PAGE as `after` for the first page.
+FIRST_PAGE = UUID(int=0)
+
+conversation_messages_page_stmt = (
+    select(*MESSAGE_LIST_COLUMNS)
+    .where(
+        messages.c.conversation_id == bindparam('conversation_id'),
+        messages.c.id > bindparam('after')
+    )
+    .order_by(messages.c.id.asc())
+    .limit(bindparam('limit'))
+)
+
+
+# --- Batch reads ----------------------------------------------------------------
+# The latest `limit` messages of many conversations in one query. Each conversation
+# has its own cursor: pass the oldest id already shown as its `before`, or
+# LATEST_PAGE for the newest messages. On Postgres the (conversation_id, before)
+# pairs are unnested and every pair drives a LATERAL subquery, which is a backwards
+# range scan of ix_messages_conversation_id_id that stops after `limit` rows. Other
+# dialects (SQLite) have no LATERAL, so they number each conversation's rows with
+# ROW_NUMBER() and keep the first `limit`.
+LATEST_PAGE = UUID(int=(1 << 128) - 1)
+
+_wanted = func.unnest(
+    bindparam('conversation_ids', type_=ARRAY(Uuid)),
+    bindparam('before_ids', type_=ARRAY(Uuid)),
+).table_valued(column('conversation_id', Uuid), column('before_id', Uuid)).render_derived(name='wanted')
+
+_latest = (
+    select(messages.c.conversation_id, *MESSAGE_LIST_COLUMNS)
+    .where(messages.c.conversation_id == _wanted.c.conversation_id, messages.c.id < _wanted.c.before_id)
+    .order_by(messages.c.id.desc())
+    .limit(bindparam('limit'))
+    .lateral('latest')
+)
+
+# Column order: conversation_id, then MESSAGE_LIST_COLUMNS; oldest first within each conversation
+latest_messages_lateral_stmt = (
+    select(*_latest.c)
+    .select_from(_wanted)
+    .join(_latest, true())
+    .order_by(_latest.c.conversation_id, _latest.c.id)
+)
+
+
+def _latest_messages_ranked(cursors: dict[UUID, UUID]):
+    wanted = or_(*(
+        and_(messages.c.conversation_id == conversation_id, messages.c.id < before)
+        for conversation_id, before in cursors.items()
+    ))
+    position = func.row_number().over(partition_by=messages.c.conversation_id, order_by=messages.c.id.desc())
+    ranked = select(messages.c.conversation_id, *MESSAGE_LIST_COLUMNS, position.label('position')).where(wanted).subquery('ranked')
+    return (
+        select(*(c for c in ranked.c if c.name != 'position'))
+        .where(ranked.c.position <= bindparam('limit'))
+        .order_by(ranked.c.conversation_id, ranked.c.id)
+    )
+
+
+def latest_messages(dialect_name: str, cursors: dict[UUID, UUID]):
+    """
+    One statement for the latest messages of several conversations.
+
+    Args:
+        dialect_name (str): The connection's dialect; Postgres gets the LATERAL form.
+        cursors (dict[UUID, UUID]): Conversation id -> only return messages with ids below this one.
+
+    Returns:
+        tuple[Select, dict]: The statement and its parameters; add `limit` (messages per conversation).
+    """
+    if dialect_name == 'postgresql':
+        return latest_messages_lateral_stmt, {'conversation_ids': list(cursors), 'before_ids': list(cursors.values())}
+    return _latest_messages_ranked(cursors), {}
+
+
+# Lightweight email listing: html_content and provider_response are never read here,
+# and the plain-text body is cut down to a preview.
+EMAIL_BODY_PREVIEW_LENGTH = 200
+
+# Column order is the contract for APIMessageHandler.email_row_to_dict
+EMAIL_LIST_COLUMNS = (
+    emails.c.id,
+    emails.c.conversation_id,
+    emails.c.to_contact,
+    emails.c.from_contact,
+    emails.c.subject,
+    func.substr(emails.c.body, 1, EMAIL_BODY_PREVIEW_LENGTH).label('body_preview'),
+    (emails.c.html_content.is_not(None)).label('has_html'),
+    emails.c.type,
+    emails.c.timestamp,
+    emails.c.status,
+    emails.c.direction,
+    emails.c.external_message_id,
+    emails.c.error_code,
+    emails.c.error_message,
+)
+
+conversation_emails_stmt = (
+    select(*EMAIL_LIST_COLUMNS)
+    .where(emails.c.conversation_id == bindparam('conversation_id'))
+    .order_by(emails.c.timestamp.asc())
+)
+
+conversation_emails_page_stmt = (
+    select(*EMAIL_LIST_COLUMNS)
+    .where(
+        emails.c.conversation_id == bindparam('conversation_id'),
+        emails.c.id > bindparam('after')
+    )
+    .order_by(emails.c.id.asc())
+    .limit(bindparam('limit'))
+)
+
+email_content_stmt = (
+    select(emails.c.id, emails.c.body, emails.c.html_content, emails.c.provider_response)
+    .where(emails.c.id == bindparam('email_id'))
+)
+
+
+# --- Unified timeline -----------------------------------------------------------
+# SMS and email in one conversation, oldest first, keyset-paged on
+# (coalesce(timestamp, UNDATED), id), so rows without a timestamp come first
+# instead of disappearing. Each branch is its own ordered, limited range scan of
+# the ix_<table>_conversation_timeline expression index, so the outer sort only
+# merges 2 * limit rows, whatever the size of the conversation. Pass
+# TIMELINE_START as the first (after_timestamp, after_id); utils.ids.timeline_cursor
+# encodes the last row seen (with UNDATED for a missing timestamp) for the next page.
+TIMELINE_START = (UNDATED, FIRST_PAGE)
+TIMELINE_BODY_LENGTH = EMAIL_BODY_PREVIEW_LENGTH
+
+_after_timestamp = bindparam('after_timestamp', type_=DateTime)
+_after_id = bindparam('after_id', type_=Uuid)
+
+
+def _timeline_select(kind: str, table, subject, body):
+    """One branch of the timeline; columns are the contract for APIMessageHandler.timeline_row_to_dict."""
+    branch = (
+        select(
+            literal(kind).label('kind'),
+            table.c.id,
+            table.c.to_contact,
+            table.c.from_contact,
+            subject.label('subject'),
+            body.label('body'),
+            table.c.type,
+            table.c.timestamp,
+            table.c.status,
+            table.c.direction,
+            table.c.error_code,
+            table.c.error_message,
+        )
+        .where(
+            table.c.conversation_id == bindparam('conversation_id'),
+            # The plain bound lets SQLite seek the expression index; the row comparison does the rest
+            timeline_position(table.c.timestamp) >= _after_timestamp,
+            tuple_(timeline_position(table.c.timestamp), table.c.id) > tuple_(_after_timestamp, _after_id),
+        )
+        .order_by(timeline_position(table.c.timestamp).asc(), table.c.id.asc())
+        .limit(bindparam('limit'))
+    ).subquery(f'{kind}_page')
+    # A compound select can't order and limit its members directly (SQLite), so select from each page
+    return select(*branch.c)
+
+
+_timeline = union_all(
+    _timeline_select('sms', messages, cast(null(), String), messages.c.body),
+    _timeline_select('email', emails, emails.c.subject, func.substr(emails.c.body, 1, TIMELINE_BODY_LENGTH)),
+).subquery('timeline')
+
+conversation_timeline_stmt = (
+    select(*_timeline.c)
+    .order_by(timeline_position(_timeline.c.timestamp).asc(), _timeline.c.id.asc())
+    .limit(bindparam('limit'))
+)
+
+
+class json_contains(FunctionElement):
+    """
+    `column @> fragment` for JSON columns: the column contains the fragment.
+
+    On Postgres this is JSONB containment, served by the GIN indexes on the
+    emails JSON columns. Elsewhere (SQLite) it is evaluated with json_each,
+    for top-level containment only: every element of an array fragment is in
+    the array, or every key of an object fragment has an equal value.
+    """
+    type = Boolean()
+    name = 'json_contains'
+    inherit_cache = True
+
+
+@compiles(json_contains, 'postgresql')
+def _json_contains_postgresql(element, compiler, **kw):
+    column, fragment = (compiler.process(clause, **kw) for clause in element.clauses)
+    # The fragment is bound as JSONB (JsonDocument), so no cast is needed
+    return f"{column} @> {fragment}"
+
+
+@compiles(json_contains)
+def _json_contains_json_each(element, compiler, **kw):
+    column, fragment = (compiler.process(clause, **kw) for clause in element.clauses)
+    return (
+        f"CASE json_type({fragment}) "
+        f"WHEN 'array' THEN NOT EXISTS (SELECT 1 FROM json_each({fragment}) AS f "
+        f"WHERE f.value NOT IN (SELECT c.value FROM json_each({column}) AS c)) "
+        f"ELSE NOT EXISTS (SELECT 1 FROM json_each({fragment}) AS f "
+        f"WHERE f.value IS NOT (SELECT c.value FROM json_each({column}) AS c WHERE c.key = f.key)) END"
+    )
+
+
+def emails_containing(**fragments):
+    """
+    Lightweight email rows whose JSON columns contain the given fragments, in id order.
+
+    Args:
+        **fragments: Column name to JSON fragment, e.g. cc=['x@example.com'] or
+            provider_response={'status_code': 500}.
+
+    Returns:
+        Select: EMAIL_LIST_COLUMNS rows; add keyset paging with `emails.c.id > after` and a limit.
+    """
+    stmt = select(*EMAIL_LIST_COLUMNS)
+    for name, fragment in fragments.items():
+        stmt = stmt.where(json_contains(emails.c[name], bindparam(name, fragment, type_=JsonDocument)))
+    return stmt.order_by(emails.c.id.asc())
+
+
+# --- Full-text search -----------------------------------------------------------
+# On Postgres, matching and ranking use each table's generated `search_vector`
+# column (see database_model.SEARCH_DOCUMENTS) and its GIN index; the query
+# string is parsed with websearch_to_tsquery ("quoted phrases", -exclusions, or).
+# Elsewhere (SQLite, tests) the query is matched as a case-insensitive substring
+# of the searchable columns and every hit ranks 0, so results fall back to newest first.
+
+class fulltext_match(FunctionElement):
+    """fulltext_match(query, *searchable_columns): the row matches the search query."""
+    type = Boolean()
+    name = 'fulltext_match'
+    inherit_cache = True
+
+
+class fulltext_rank(FunctionElement):
+    """fulltext_rank(query, *searchable_columns): relevance of a matching row, higher is better."""
+    type = Float()
+    name = 'fulltext_rank'
+    inherit_cache = True
+
+
+def _search_query(element, compiler, **kw) -> str:
+    query = compiler.process(element.clauses.clauses[0], **kw)
+    return f"websearch_to_tsquery('{SEARCH_CONFIG}', {query})"
+
+
+@compiles(fulltext_match, 'postgresql')
+def _fulltext_match_postgresql(element, compiler, **kw):
+    return f"search_vector @@ {_search_query(element, compiler, **kw)}"
+
+
+@compiles(fulltext_rank, 'postgresql')
+def _fulltext_rank_postgresql(element, compiler, **kw):
+    return f"ts_rank_cd(search_vector, {_search_query(element, compiler, **kw)})"
+
+
+@compiles(fulltext_match)
+def _fulltext_match_substring(element, compiler, **kw):
+    query, *columns = (compiler.process(clause, **kw) for clause in element.clauses)
+    return '(' + ' OR '.join(f"instr(lower({column}), lower({query})) > 0" for column in columns) + ')'
+
+
+@compiles(fulltext_rank)
+def _fulltext_rank_substring(element, compiler, **kw):
+    return '0.0'
+
+
+MESSAGE_SEARCH_LENGTH = 200
+_search_query_param = bindparam('q', type_=String)
+
+
+def _search_select(kind: str, table, subject, text_columns):
+    """One branch of the search union; columns are the contract for APIMessageHandler.search_row_to_dict."""
+    return (
+        select(
+            literal(kind).label('kind'),
+            table.c.id,
+            table.c.conversation_id,
+            table.c.to_contact,
+            table.c.from_contact,
+            subject.label('subject'),
+            func.substr(table.c.body, 1, MESSAGE_SEARCH_LENGTH).label('snippet'),
+            table.c.timestamp,
+            fulltext_rank(_search_query_param, *text_columns).label('rank'),
+        )
+        .where(fulltext_match(_search_query_param, *text_columns))
+    )
+
+
+def _ranked(*branches):
+    """Union the branches, best match first, newest first among equals, one page at a time."""
+    combined = union_all(*branches).subquery('hits') if len(branches) > 1 else branches[0].subquery('hits')
+    return (
+        select(*combined.c)
+        .order_by(combined.c.rank.desc(), combined.c.timestamp.desc(), combined.c.id)
+        .limit(bindparam('limit'))
+        .offset(bindparam('offset'))
+    )
+
+
+_message_hits = _search_select('sms', messages, cast(null(), String), (messages.c.body,))
+_email_hits = _search_select('email', emails, emails.c.subject, (emails.c.subject, emails.c.body))
+
+# Keyed by the /api/search `type` parameter
+SEARCH_STATEMENTS = {
+    'all': _ranked(_message_hits, _email_hits),
+    'sms': _ranked(_message_hits),
+    'email': _ranked(_email_hits),
+}
+
+
+# --- Contact autocomplete -------------------------------------------------------
+# ILIKE '%term%' is served by the pg_trgm GIN index on Postgres (SQLite compiles it
+# to lower() LIKE and scans the small contacts table). Prefix matches come first,
+# then the most recently used contacts.
+contacts = Contact.__table__
+
+
+def like_escape(term: str) -> str:
+    """Escape LIKE wildcards in user input (used with escape='\\')."""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+contacts_stmt = (
+    select(contacts.c.contact, contacts.c.kind, contacts.c.last_seen)
+    .where(
+        contacts.c.contact.ilike(bindparam('substring'), escape='\\'),
+        or_(bindparam('kind', type_=String).is_(None), contacts.c.kind == bindparam('kind', type_=String)),
+    )
+    .order_by(
+        case((contacts.c.contact.ilike(bindparam('prefix'), escape='\\'), 0), else_=1),
+        contacts.c.last_seen.desc(),
+        contacts.c.contact,
+    )
+    .limit(bindparam('limit'))
+)
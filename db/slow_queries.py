@@ -0,0 +1,181 @@
+"""
+Slow-query log with automatic EXPLAIN capture.
+
+The engine hooks in db/postgres_connector.py pass every executed statement to
+`slow_queries.observe`. Statements slower than HATCH_SLOW_QUERY_MS are grouped
+by normalized SQL (literals and bind parameters replaced with `?`, IN lists
+collapsed) and the worst HATCH_SLOW_QUERY_TOP fingerprints are kept, ranked by
+total time spent in them.
+
+The first time a read statement is seen as slow (and again after
+HATCH_SLOW_QUERY_EXPLAIN_INTERVAL seconds), its plan is captured on a separate
+raw DBAPI cursor of the same connection, with the original parameters:
+
+* PostgreSQL: EXPLAIN (FORMAT JSON), adding ANALYZE and BUFFERS when
+  HATCH_SLOW_QUERY_ANALYZE=true. ANALYZE runs the query a second time.
+* SQLite: EXPLAIN QUERY PLAN.
+
+The plan runs inside a savepoint so a failing EXPLAIN cannot abort the
+caller's transaction. Results are served at /admin/slow_queries.
+"""
+
+import json
+import re
+import threading
+import time
+from functools import lru_cache
+
+from utils import logger, get_config
+
+l = logger
+
+_config = get_config()
+SLOW_QUERY_MS = _config.slow_query_ms
+SLOW_QUERY_TOP = _config.slow_query_top
+EXPLAIN_ANALYZE = _config.slow_query_analyze
+EXPLAIN_INTERVAL = _config.slow_query_explain_interval
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND_PARAM = re.compile(r"%\([^)]+\)s|%s|(?<![:\w]):\w+|\$\d+|\?")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """Fingerprint a statement: literals and parameters become ?, IN lists collapse, whitespace folds."""
+    normalized = _STRING_LITERAL.sub('?', statement)
+    normalized = _BIND_PARAM.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    normalized = _IN_LIST.sub('(?...)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+class slowQueryLog:
+    """Bounded top-N of slow statements by fingerprint, with captured plans."""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, top_n: int = SLOW_QUERY_TOP,
+                 analyze: bool = EXPLAIN_ANALYZE, explain_interval: float = EXPLAIN_INTERVAL):
+        self.threshold_ms = threshold_ms
+        self.top_n = top_n
+        self.analyze = analyze
+        self.explain_interval = explain_interval
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, conn, cursor, statement: str, parameters, elapsed_seconds: float, executemany: bool = False):
+        """
+        Record a statement if it ran over the threshold, capturing its plan when due.
+
+        Args:
+            conn: SQLAlchemy Connection the statement ran on.
+            cursor: DBAPI cursor it ran on (not reused for EXPLAIN).
+            statement (str): SQL as sent to the driver.
+            parameters: Driver parameters for the statement.
+            elapsed_seconds (float): Execution time.
+            executemany (bool): Whether this was a batched executemany call (never explained).
+        """
+        elapsed_ms = elapsed_seconds * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        fingerprint = normalize_sql(statement)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                entry = self._entries[fingerprint] = {
+                    "fingerprint": fingerprint,
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "last_ms": 0.0,
+                    "last_seen": None,
+                    "example": statement,
+                    "plan": None,
+                    "plan_captured_at": None,
+                    "plan_error": None,
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_ms"] = elapsed_ms
+            entry["last_seen"] = now
+            self._evict()
+            due = (fingerprint in self._entries and not executemany and _EXPLAINABLE.match(statement) is not None
+                   and (entry["plan_captured_at"] is None or now - entry["plan_captured_at"] >= self.explain_interval))
+            if due:
+                # Claim the capture so concurrent slow calls of the same query don't all EXPLAIN it
+                entry["plan_captured_at"] = now
+
+        if due:
+            plan, error = self._explain(conn, statement, parameters)
+            with self._lock:
+                entry["plan"], entry["plan_error"] = plan, error
+            l.info("Slow query plan captured", elapsed_ms=round(elapsed_ms, 1),
+                   fingerprint=fingerprint[:200], plan_error=error)
+
+    def _evict(self):
+        # Keep the top_n fingerprints by total time; called with the lock held
+        while len(self._entries) > self.top_n:
+            coolest = min(self._entries.values(), key=lambda e: e["total_ms"])
+            del self._entries[coolest["fingerprint"]]
+
+    def _explain(self, conn, statement: str, parameters) -> tuple[object, str | None]:
+        """Run the dialect's EXPLAIN on a fresh raw cursor of the same connection."""
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            options = "FORMAT JSON, ANALYZE, BUFFERS" if self.analyze else "FORMAT JSON"
+            explain = f"EXPLAIN ({options}) {statement}"
+        elif dialect == 'sqlite':
+            explain = f"EXPLAIN QUERY PLAN {statement}"
+        else:
+            return None, f"EXPLAIN capture not supported for {dialect}"
+
+        raw = conn.connection.dbapi_connection
+        cursor = raw.cursor()
+        savepoint = dialect == 'postgresql' and not raw.autocommit
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT hatch_explain")
+            try:
+                cursor.execute(explain, parameters or ())
+                rows = cursor.fetchall()
+            except Exception as e:
+                if savepoint:
+                    cursor.execute("ROLLBACK TO SAVEPOINT hatch_explain")
+                return None, f"{type(e).__name__}: {e}"
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT hatch_explain")
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+        finally:
+            cursor.close()
+
+        if dialect == 'postgresql':
+            plan = rows[0][0]
+            return (json.loads(plan) if isinstance(plan, str) else plan), None
+        # SQLite rows: (id, parent, notused, detail)
+        return [row[-1] for row in rows], None
+
+    def top(self, limit: int | None = None, include_plans: bool = True) -> list[dict]:
+        """Slow statements ordered by total time, worst first."""
+        with self._lock:
+            entries = [dict(entry) for entry in self._entries.values()]
+        entries.sort(key=lambda e: e["total_ms"], reverse=True)
+        for entry in entries:
+            entry["total_ms"] = round(entry["total_ms"], 2)
+            entry["max_ms"] = round(entry["max_ms"], 2)
+            entry["last_ms"] = round(entry["last_ms"], 2)
+            entry["mean_ms"] = round(entry["total_ms"] / entry["calls"], 2)
+            if not include_plans:
+                entry.pop("plan")
+        return entries[:limit] if limit else entries
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_queries = slowQueryLog()
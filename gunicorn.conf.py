@@ -0,0 +1,72 @@
+"""
+Gunicorn configuration for the production run mode.
+
+Used by `python app.py --production` and directly via:
+    gunicorn -c gunicorn.conf.py app:app
+
+Every setting can be overridden from the environment (see README and utils/config.py).
+"""
+
+from utils import logger, get_config
+
+l = logger
+app_config = get_config()
+
+# --- Socket ---
+bind = f"{app_config.flask_host}:{app_config.flask_port}"
+backlog = app_config.gunicorn_backlog
+
+# --- Workers ---
+# Preforked processes, each running a thread pool. Sends block on Twilio and
+# delivery polling, so threads keep a worker responsive while requests wait on I/O.
+workers = app_config.gunicorn_workers
+worker_class = 'gthread'
+threads = app_config.gunicorn_threads
+
+# Import the app once in the master and fork it, instead of importing per worker.
+preload_app = app_config.gunicorn_preload
+
+# Recycle workers periodically to bound slow leaks in long-lived processes.
+max_requests = app_config.gunicorn_max_requests
+max_requests_jitter = app_config.gunicorn_max_requests_jitter
+
+# --- Timeouts ---
+# An SMS send with delivery polling can take tens of seconds.
+timeout = app_config.gunicorn_timeout
+# SIGTERM: stop accepting, let in-flight requests finish for up to this long, then exit.
+graceful_timeout = app_config.gunicorn_graceful_timeout
+keepalive = app_config.gunicorn_keepalive
+
+# --- Logging ---
+accesslog = app_config.gunicorn_access_log
+errorlog = '-'
+loglevel = app_config.gunicorn_log_level
+
+
+def post_fork(server, worker):
+    """Each worker gets its own DB pool; sockets inherited from the master are never shared."""
+    from api.api import pg
+    pg.reset_after_fork()
+    l.info("Worker started", worker_pid=worker.pid)
+
+
+def post_worker_init(worker):
+    """Runs after the worker has set up its own signal handlers, so ours is not reset."""
+    from utils.profiling import install_profile_signal_handler
+    install_profile_signal_handler()
+
+
+def worker_int(worker):
+    l.info("Worker interrupted", worker_pid=worker.pid)
+
+
+def worker_exit(server, worker):
+    """Close pooled connections once the worker has drained."""
+    from api.api import pg
+    if pg.engine is not None:
+        pg.engine.dispose()
+    l.info("Worker exited", worker_pid=worker.pid)
+
+
+def on_exit(server):
+    l.info("Server shut down")
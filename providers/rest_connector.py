@@ -1,10 +1,11 @@
 import requests
 
-from utils import logger
+from utils import logger, get_config
+from utils.metrics import time_provider_call
+from utils.tracing import span, SPAN_KIND_CLIENT
+from providers.telemetry import telemetry
 from data_model import hatchMessage, twilioSMS, createTwilioSMS, twilioHeaderHandler, twilioSMSResponse, twilioResponseHeader, twilioSMSResponseHandler, APIMessageHandler
-import os
 import sys
-import dotenv
 from pathlib import Path
 import time
 
@@ -14,16 +15,17 @@ if __name__ == "__main__":
     sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
-dotenv.load_dotenv()  # Load environment variables from .env file
-dotenv.load_dotenv(os.path.join('.secrets', '.secrets'))
+config = get_config()
 
-# Environment variables will be read by get_twilio_client() or are used directly
-DEFAULT_TWILIO_NUMBER = os.getenv('TWILIO_NUMBER')
-TEST_DESTINATION_NUMBER = os.getenv('TEST_NUMBER', DEFAULT_TWILIO_NUMBER)  
-TWILIO_SID = os.getenv('TWILIO_SID')
-TWILIO_SECRET = os.getenv('TWILIO_SECRET')
+# Settings are read once from the cached application config
+DEFAULT_TWILIO_NUMBER = config.twilio_number
+TEST_DESTINATION_NUMBER = config.test_number
+TWILIO_SID = config.twilio_sid
+TWILIO_SECRET = config.twilio_secret
 
-TWILIO_URL = "https://api.twilio.com/2010-04-01"
+# Overridable so load tests can point at a local simulator (TWILIO_API_URL, TWILIO_BACKOFF_BASE)
+TWILIO_URL = config.twilio_api_url
+BACKOFF_BASE = config.twilio_backoff_base
 
 
 
@@ -38,13 +40,13 @@ class twilioAPI():
         self.session.auth=(TWILIO_SID, TWILIO_SECRET)
         return self.session
     
-    def exponential_backoff(self, retries: int = 5, base_delay: float = 1.0):
+    def exponential_backoff(self, retries: int = 5, base_delay: float = BACKOFF_BASE):
         """
         Exponential backoff strategy for retrying requests.
         
         Args:
             retries (int): Number of retries before giving up.
-            base_delay (float): Base delay in seconds for the first retry.
+            base_delay (float): Base delay in seconds for the first retry (TWILIO_BACKOFF_BASE).
         
         Returns:
             None
@@ -53,7 +55,8 @@ class twilioAPI():
         
         delay = base_delay * (2 ** retries)
         l.info(f"Waiting {delay} seconds...")
-        time.sleep(delay)
+        with span('twilio.backoff_sleep', delay_seconds=delay):
+            time.sleep(delay)
 
     def send_sms(self, msg:twilioSMS) -> tuple[hatchMessage, twilioResponseHeader]:
         """
@@ -72,13 +75,11 @@ class twilioAPI():
         request_data = createTwilioSMS.twilioRequest(msg)
         
         try:
-            response = client.post(url=f"{TWILIO_URL}/Accounts/{TWILIO_SID}/Messages.json",
-                                data=request_data)
-            rc = response.json()
+            response, header = self.post_message(client, request_data)
             
             retry_counter =0
             while response.status_code == 429 and retry_counter < 5:
-                
+                rc = response.json()
                 l.warn("Rate limited...", 
                     code=rc['code'],
                     message=rc['message'],
@@ -86,33 +87,36 @@ class twilioAPI():
                     status=rc['status'])
                 retry_counter += 1
                 self.exponential_backoff(retry_counter)
-
+                response, header = self.post_message(client, request_data)
+
+            if response.status_code >= 400:
+                rc = response.json()
+                l.error(f"Twilio rejected the message: {rc.get('message', 'Unknown error')}",
+                    code=rc.get('code', 'Unknown'),
+                    more_info=rc.get('more_info', 'Unknown'),
+                    status=response.status_code,
+                    retries=retry_counter)
+                raise Exception(f"Failed to send SMS: {rc.get('message', 'Unknown error')}")
             
-            sms_response = twilioSMSResponseHandler.from_response_dict(rc)
+            with span('twilio.parse_response'):
+                # Validate the raw body straight into the model; no intermediate dict
+                sms_response = twilioSMSResponseHandler.from_response_bytes(response.content)
 
             delivery_status = sms_response.status
 
             delivery_counter = 0 
             while delivery_status not in ['delivered', 'undelivered', 'failed'] and delivery_counter < 5:
                 self.exponential_backoff(delivery_counter+1)
-                status_check = self.check_delivery(sms_response.sid)
-                delivery_status = status_check.json().get('status', delivery_status)
+                status_check, header = self.check_delivery(sms_response.sid)
                 delivery_counter += 1
-                if status_check.status_code == 200:
-                    sms_response = twilioSMSResponseHandler.from_response_dict(status_check.json())
-                    header = twilioHeaderHandler.from_headers_dict(status_check.headers)
-
-            if status_check.status_code != 200:
-                l.error(f"Failed to retrieve message status: {status_check.json().get('message', 'Unknown error')}", 
-                    code=status_check.json().get('code', 'Unknown'),
-                    more_info=status_check.json().get('more_info', 'Unknown'),
-                    status=status_check.status_code)
-                raise Exception(f"Failed to retrieve message status: {status_check.json().get('message', 'Unknown error')}")
+                sms_response = twilioSMSResponseHandler.from_response_bytes(status_check.content)
+                delivery_status = sms_response.status
             
             
             msg_object, db_message = APIMessageHandler.process_twilio_response(sms_response, save_to_db=True)
 
-            l.info(f"Message sent successfully! SID: {sms_response.sid}", 
+            l.info("Message sent successfully",
+            sid=sms_response.sid,
             conversation_id=str(msg_object.conversation_id), 
             application_message_id=str(msg_object.id),
             database_message_id=str(db_message.id),
@@ -128,7 +132,25 @@ class twilioAPI():
         
         return msg_object, header
 
-    def check_delivery(self, sid):
+    def post_message(self, client, request_data: dict) -> tuple[requests.Response, twilioResponseHeader]:
+        """
+        POST one message to Twilio and record its header telemetry.
+
+        The body is left unparsed; callers decode it once, as a model on success
+        or as an error dict otherwise.
+
+        Returns:
+            tuple: The raw response and the parsed headers.
+        """
+        with time_provider_call('twilio', 'send_sms') as call, span('twilio.post', SPAN_KIND_CLIENT):
+            response = client.post(url=f"{TWILIO_URL}/Accounts/{TWILIO_SID}/Messages.json",
+                                data=request_data)
+            call.record_status(response.status_code)
+        header = twilioHeaderHandler.from_headers_dict(response.headers)
+        telemetry.record_twilio('send_sms', response, header)
+        return response, header
+
+    def check_delivery(self, sid) -> tuple[requests.Response, twilioResponseHeader]:
         """
         Check the delivery status of a message using its SID.
         GET https://serverless.twilio.com/Logs/{Sid}
@@ -137,24 +159,30 @@ class twilioAPI():
             sid (str): The SID of the message to check.
         
         Returns:
-            twilioSMSResponse: The response from the Twilio API containing the message status.
+            tuple: The raw response (body left unparsed) and its parsed headers.
+
+        Raises:
+            Exception: If Twilio does not answer with 200.
         """
         client = self.get_client()
         
         try:
-            response = client.get(url=f"{TWILIO_URL}/Accounts/{TWILIO_SID}/Messages/{sid}.json", 
-                                  auth=(TWILIO_SID, TWILIO_SECRET))
-            rc = response.json()
+            with time_provider_call('twilio', 'check_delivery') as call, span('twilio.check_delivery', SPAN_KIND_CLIENT, sid=sid):
+                response = client.get(url=f"{TWILIO_URL}/Accounts/{TWILIO_SID}/Messages/{sid}.json", 
+                                      auth=(TWILIO_SID, TWILIO_SECRET))
+                call.record_status(response.status_code)
+            header = twilioHeaderHandler.from_headers_dict(response.headers)
+            telemetry.record_twilio('check_delivery', response, header)
             
             if response.status_code != 200:
-                
+                rc = response.json()
                 l.error(f"Failed to retrieve message status: {rc['message']}", 
                     code=rc['code'], 
                     more_info=rc['more_info'], 
                     status=rc['status'])
                 raise Exception(f"Failed to retrieve message status: {rc['message']}")
             
-            return response
+            return response, header
         
         except requests.RequestException as e:
             l.error(f"Request to Twilio API failed: {e}", exc_info=True)
@@ -10,16 +10,14 @@ across all email clients.
 
 import sys
 from pathlib import Path
-import os
-import dotenv
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Content
 
 # Add parent directory to path for imports
 if __name__ == "__main__":
     sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from utils import logger
+from utils import logger, get_config
+from utils.metrics import time_provider_call
+from utils.tracing import span, SPAN_KIND_CLIENT
 from data_model.api_message_handler import APIMessageHandler
 from data_model.application_model import EmailMessage
 
@@ -31,11 +29,13 @@ class SendGridEmailConnector:
     
     def __init__(self):
         """Initialize the SendGrid API client."""
-        self.api_key = os.getenv('SENDGRID_TOKEN')
+        # Deferred: the sendgrid SDK is only needed once an email is actually sent
+        from sendgrid import SendGridAPIClient
+        self.api_key = get_config().sendgrid_token
         if not self.api_key:
             logger_instance.error("SENDGRID_TOKEN environment variable is not set.")
             raise ValueError("SENDGRID_TOKEN is required for SendGridEmailConnector")
-        self.sgc = SendGridAPIClient(self.api_key)
+        self.sgc = SendGridAPIClient(self.api_key, host=get_config().sendgrid_api_host)
         self.message_handler = APIMessageHandler()
 
     def send_email(self, from_email: str, to_email: str, subject: str, 
@@ -55,6 +55,8 @@ class SendGridEmailConnector:
         Returns:
             tuple[EmailMessage, dict]: Application model and response data
         """
+        from sendgrid.helpers.mail import Mail, Content
+
         try:
             # Create SendGrid mail object
             mail = Mail(
@@ -72,7 +74,9 @@ class SendGridEmailConnector:
                 mail.content = Content("text/plain", "No content provided")
                 
             # Send email via SendGrid
-            response = self.sgc.send(mail)
+            with time_provider_call('sendgrid', 'send') as call, span('sendgrid.send', SPAN_KIND_CLIENT):
+                response = self.sgc.send(mail)
+                call.record_status(response.status_code)
             
             # Prepare data for application message handler
             response_data = {
@@ -92,7 +96,9 @@ class SendGridEmailConnector:
             )
             
             logger_instance.info(
-                f"Email sent successfully to {to_email} with subject '{subject}'",
+                "Email sent successfully",
+                to=to_email,
+                subject=subject,
                 response_code=response.status_code,
                 message_id=headers_data.get('X-Message-Id'),
                 email_id=str(email_msg.id)
@@ -170,9 +176,6 @@ class SendGridEmailConnector:
 
 
 if __name__ == "__main__":
-    dotenv.load_dotenv()  # Load environment variables from .env file
-    dotenv.load_dotenv(os.path.join('.secrets', '.secrets'))
-
     connector = SendGridEmailConnector()
     logger_instance.info("SendGridEmailConnector initialized successfully.")
 
@@ -0,0 +1,243 @@
+"""
+Provider call telemetry from response headers.
+
+Twilio reports its own processing time (`Twilio-Request-Duration`), the
+account's in-flight request count (`Twilio-Concurrent-Requests`) and the
+serving region (`X-Home-Region`) on every response. Each call is recorded as a
+sample next to the client-observed time to headers, so send time can be split
+into provider time and network/TLS time (`total - provider`).
+
+Samples live in a fixed-size in-memory ring buffer per process and are rolled
+up into per-minute percentiles on demand (`/api/telemetry/<provider>`). When
+HATCH_TELEMETRY_FLUSH_SECONDS is set, a background thread bulk-inserts new
+samples into the `provider_telemetry` table on that interval.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from utils import logger, get_config
+
+l = logger
+
+TELEMETRY_BUFFER_SIZE = get_config().telemetry_buffer_size
+TELEMETRY_FLUSH_SECONDS = get_config().telemetry_flush_seconds
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class telemetrySample(NamedTuple):
+    """A single provider call."""
+    seq: int
+    recorded_at: float  # epoch seconds
+    provider: str
+    operation: str
+    status_code: int
+    total_ms: float
+    provider_ms: float | None
+    network_ms: float | None
+    concurrent_requests: int | None
+    home_region: str | None
+    request_id: str | None
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """Nearest-rank q-quantile (0..1) of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(q * len(sorted_values) + 0.999999) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(values: list[float]) -> dict:
+    """p50/p95/p99/max of a list of milliseconds, rounded for display."""
+    ordered = sorted(v for v in values if v is not None)
+    if not ordered:
+        return {"count": 0}
+    summary = {"count": len(ordered)}
+    for q in PERCENTILES:
+        summary[f"p{int(q * 100)}"] = round(percentile(ordered, q), 2)
+    summary["max"] = round(ordered[-1], 2)
+    return summary
+
+
+class providerTelemetry:
+    """Ring buffer of provider call samples with per-minute rollups and optional DB flush."""
+
+    def __init__(self, maxlen: int = TELEMETRY_BUFFER_SIZE, flush_seconds: float = TELEMETRY_FLUSH_SECONDS):
+        self._samples: deque[telemetrySample] = deque(maxlen=maxlen)
+        self._seq = 0
+        self._flushed_seq = 0
+        self._lock = threading.Lock()
+        self.flush_seconds = flush_seconds
+        self._flusher: threading.Thread | None = None
+        self._flusher_pid: int | None = None
+
+    # --- Recording ------------------------------------------------------
+
+    def record(self, provider: str, operation: str, status_code: int, elapsed_seconds: float,
+               provider_seconds: float | None = None, concurrent_requests: int | None = None,
+               home_region: str | None = None, request_id: str | None = None,
+               recorded_at: float | None = None) -> telemetrySample:
+        """
+        Record one provider call.
+
+        Args:
+            provider (str): Provider name, e.g. 'twilio'.
+            operation (str): Call type, e.g. 'send_sms'.
+            status_code (int): HTTP status of the response.
+            elapsed_seconds (float): Client-observed time from sending the request to parsing the headers.
+            provider_seconds (float): Provider-reported processing time, if the response carried it.
+            concurrent_requests (int): Provider-reported in-flight requests for the account.
+            home_region (str): Region that served the request.
+            request_id (str): Provider request id, for correlating with provider logs.
+            recorded_at (float): Epoch seconds of the call; defaults to now.
+
+        Returns:
+            telemetrySample: The stored sample.
+        """
+        total_ms = elapsed_seconds * 1000
+        provider_ms = provider_seconds * 1000 if provider_seconds else None
+        network_ms = max(total_ms - provider_ms, 0.0) if provider_ms is not None else None
+        if recorded_at is None:
+            recorded_at = time.time()
+        with self._lock:
+            self._seq += 1
+            sample = telemetrySample(self._seq, recorded_at, provider, operation, status_code, total_ms,
+                                     provider_ms, network_ms, concurrent_requests, home_region or None,
+                                     request_id or None)
+            self._samples.append(sample)
+        if self.flush_seconds > 0:
+            self._ensure_flusher()
+        return sample
+
+    def record_twilio(self, operation: str, response, header) -> telemetrySample:
+        """
+        Record a Twilio call from its `requests` response and parsed twilioResponseHeader.
+        """
+        return self.record('twilio', operation, response.status_code, response.elapsed.total_seconds(),
+                           provider_seconds=header.twilio_request_duration,
+                           concurrent_requests=header.twilio_concurrent_requests,
+                           home_region=header.x_home_region,
+                           request_id=header.twilio_request_id)
+
+    def samples(self, provider: str | None = None, since: float | None = None) -> list[telemetrySample]:
+        """Snapshot of buffered samples, optionally filtered by provider and start time (epoch seconds)."""
+        with self._lock:
+            snapshot = list(self._samples)
+        return [s for s in snapshot
+                if (provider is None or s.provider == provider) and (since is None or s.recorded_at >= since)]
+
+    # --- Rollups --------------------------------------------------------
+
+    def rollup(self, provider: str | None = None, minutes: int = 60) -> list[dict]:
+        """
+        Per-minute percentiles of total, provider and network latency, oldest minute first.
+
+        Args:
+            provider (str): Only include this provider's samples.
+            minutes (int): How far back to look.
+
+        Returns:
+            list[dict]: One entry per minute that had samples.
+        """
+        since = time.time() - minutes * 60
+        buckets: dict[int, list[telemetrySample]] = {}
+        for sample in self.samples(provider, since):
+            buckets.setdefault(int(sample.recorded_at // 60), []).append(sample)
+
+        rollups = []
+        for minute in sorted(buckets):
+            group = buckets[minute]
+            regions: dict[str, int] = {}
+            for sample in group:
+                if sample.home_region:
+                    regions[sample.home_region] = regions.get(sample.home_region, 0) + 1
+            concurrency = [s.concurrent_requests for s in group if s.concurrent_requests is not None]
+            rollups.append({
+                "minute": datetime.fromtimestamp(minute * 60, tz=timezone.utc).isoformat(),
+                "calls": len(group),
+                "errors": sum(1 for s in group if s.status_code >= 400),
+                "total_ms": summarize([s.total_ms for s in group]),
+                "provider_ms": summarize([s.provider_ms for s in group]),
+                "network_ms": summarize([s.network_ms for s in group]),
+                "max_concurrent_requests": max(concurrency) if concurrency else None,
+                "home_regions": regions,
+            })
+        return rollups
+
+    # --- Flushing -------------------------------------------------------
+
+    def pending(self) -> list[telemetrySample]:
+        """Buffered samples not yet written to the database."""
+        with self._lock:
+            flushed = self._flushed_seq
+            return [s for s in self._samples if s.seq > flushed]
+
+    def flush_to_db(self, pg=None) -> int:
+        """
+        Bulk-insert samples recorded since the last flush into provider_telemetry.
+
+        Samples that fell out of the ring buffer before a flush are lost; size the
+        buffer for (calls per second * flush interval).
+
+        Returns:
+            int: Number of rows written.
+        """
+        from sqlalchemy import insert
+        from data_model.database_model import ProviderTelemetry
+
+        batch = self.pending()
+        if not batch:
+            return 0
+        if pg is None:
+            from db.postgres_connector import get_pg
+            pg = get_pg()
+
+        rows = [{
+            "recorded_at": datetime.fromtimestamp(s.recorded_at, tz=timezone.utc).replace(tzinfo=None),
+            "provider": s.provider,
+            "operation": s.operation,
+            "status_code": s.status_code,
+            "total_ms": s.total_ms,
+            "provider_ms": s.provider_ms,
+            "network_ms": s.network_ms,
+            "concurrent_requests": s.concurrent_requests,
+            "home_region": s.home_region,
+            "request_id": s.request_id,
+        } for s in batch]
+
+        with pg.get_engine().begin() as conn:
+            conn.execute(insert(ProviderTelemetry.__table__), rows)
+
+        with self._lock:
+            self._flushed_seq = max(self._flushed_seq, batch[-1].seq)
+        return len(rows)
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork, so a Gunicorn worker starts its own on first record
+        if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._flush_loop, name='telemetry-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                written = self.flush_to_db()
+                if written:
+                    l.debug("Provider telemetry flushed", rows=written)
+            except Exception as e:
+                l.error("Failed to flush provider telemetry", error=str(e))
+
+
+telemetry = providerTelemetry()
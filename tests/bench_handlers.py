@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the hot handler conversions and model construction.
+
+Each case runs one conversion over the repo's JSON fixtures
+(tests/test_*messages.json for API messages and conversations,
+tests/test_twilio_response.json for a Twilio send response and its headers)
+and reports:
+
+* ops/sec: median over several timed repeats, each auto-sized to ~0.2 s
+* peak_bytes: average transient memory (tracemalloc peak) per call
+* retained_bytes: memory still held per call after a batch, i.e. leaks or caches
+
+hatch_message_validated / hatch_message_trusted build the same hatchMessage
+through validation and through the trusted (model_construct) path; the gap is
+the per-message saving for data that was already validated.
+
+Baselines live in tests/bench_handlers_results.json. --save writes the current
+numbers there; --compare checks the current numbers against it and exits
+non-zero when any case's ops/sec dropped more than --tolerance.
+
+Usage:
+    python tests/bench_handlers.py
+    python tests/bench_handlers.py --save
+    python tests/bench_handlers.py --compare --tolerance 0.15
+    python tests/bench_handlers.py --case generate_conversation_id --case from_headers_dict
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import gc
+from array import array
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from itertools import cycle
+
+from requests.structures import CaseInsensitiveDict
+
+from utils import logger
+from data_model.application_model import MessageType, hatchMessage, generate_conversation_id, generate_conversation_ids
+from data_model.api_message_handler import APIMessageHandler, twilioHeaderHandler, twilioSMSResponseHandler
+
+logger_instance = logger
+
+TESTS_DIR = Path(__file__).parent
+RESULTS_FILE = TESTS_DIR / 'bench_handlers_results.json'
+MESSAGE_FIXTURES = ('test_messages.json', 'test_more_messages.json', 'test_jess_messages.json')
+TWILIO_FIXTURE = 'test_twilio_response.json'
+
+
+# --- Fixtures -------------------------------------------------------------------
+
+def load_messages() -> list[dict]:
+    messages = []
+    for name in MESSAGE_FIXTURES:
+        with open(TESTS_DIR / name) as f:
+            messages.extend(json.load(f))
+    return messages
+
+
+def load_twilio() -> tuple[dict, CaseInsensitiveDict]:
+    with open(TESTS_DIR / TWILIO_FIXTURE) as f:
+        fixture = json.load(f)
+    # requests hands the handlers a case-insensitive header mapping
+    return fixture['response'], CaseInsensitiveDict(fixture['headers'])
+
+
+def conversation_rows(messages: list[dict]) -> list[tuple]:
+    """Rows shaped like queries.conversations_stmt: (id, reply_to, participants, last_message_date, count)."""
+    grouped: dict = {}
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i, msg in enumerate(messages):
+        conversation_id = generate_conversation_id(msg['to'], msg['from_'])
+        outbound = msg.get('direction') == 'outbound-api'
+        reply_to = msg['from_'] if outbound else msg['to']
+        participants = f"{msg['from_']}->{msg['to']}" if outbound else f"{msg['to']}->{msg['from_']}"
+        key = (conversation_id, reply_to, participants)
+        last, count = grouped.get(key, (start, 0))
+        grouped[key] = (max(last, start + timedelta(minutes=i)), count + 1)
+    return [(cid, reply_to, participants, last, count)
+            for (cid, reply_to, participants), (last, count) in grouped.items()]
+
+
+# --- Cases ----------------------------------------------------------------------
+# Each builder returns a zero-argument callable performing one operation.
+
+def case_from_response_dict():
+    response, _ = load_twilio()
+    return lambda: twilioSMSResponseHandler.from_response_dict(response)
+
+
+def case_from_response_json():
+    """Old send path: decode the body to a dict, then validate the dict."""
+    response, _ = load_twilio()
+    content = json.dumps(response).encode()
+    return lambda: twilioSMSResponseHandler.from_response_dict(json.loads(content))
+
+
+def case_from_response_bytes():
+    response, _ = load_twilio()
+    content = json.dumps(response).encode()
+    return lambda: twilioSMSResponseHandler.from_response_bytes(content)
+
+
+def case_from_headers_dict():
+    _, headers = load_twilio()
+    return lambda: twilioHeaderHandler.from_headers_dict(headers)
+
+
+def case_to_application_model():
+    api_messages = cycle([APIMessageHandler.from_json_dict(m) for m in load_messages()])
+    return lambda: APIMessageHandler.to_application_model(next(api_messages), MessageType.SMS)
+
+
+def case_twilio_to_application_model():
+    response, _ = load_twilio()
+    sms_response = twilioSMSResponseHandler.from_response_dict(response)
+    return lambda: APIMessageHandler.twilio_to_application_model(sms_response)
+
+
+def _twilio_message_fields() -> dict:
+    """hatchMessage fields taken from the Twilio fixture, as the handlers build them."""
+    response, _ = load_twilio()
+    sms_response = twilioSMSResponseHandler.from_response_dict(response)
+    return APIMessageHandler.twilio_to_application_model(sms_response).model_dump()
+
+
+def case_hatch_message_validated():
+    fields = _twilio_message_fields()
+    return lambda: hatchMessage(**fields)
+
+
+def case_hatch_message_trusted():
+    fields = _twilio_message_fields()
+    return lambda: hatchMessage.trusted(**fields)
+
+
+def case_conversation_tuples_to_dicts():
+    rows = conversation_rows(load_messages())
+    return lambda: APIMessageHandler.conversation_tuples_to_dicts(rows)
+
+
+def case_generate_conversation_id():
+    pairs = cycle([(m['to'], m['from_']) for m in load_messages()])
+
+    def run():
+        to, from_ = next(pairs)
+        return generate_conversation_id(to, from_)
+    return run
+
+
+def case_generate_conversation_ids_batch():
+    """One backfill-sized batch per call: every fixture pair, both directions."""
+    pairs = [(m['to'], m['from_']) for m in load_messages()]
+    pairs += [(from_, to) for to, from_ in pairs]
+    return lambda: generate_conversation_ids(pairs)
+
+
+CASES = {
+    'from_response_dict': case_from_response_dict,
+    'from_response_json': case_from_response_json,
+    'from_response_bytes': case_from_response_bytes,
+    'from_headers_dict': case_from_headers_dict,
+    'to_application_model': case_to_application_model,
+    'twilio_to_application_model': case_twilio_to_application_model,
+    'hatch_message_validated': case_hatch_message_validated,
+    'hatch_message_trusted': case_hatch_message_trusted,
+    'conversation_tuples_to_dicts': case_conversation_tuples_to_dicts,
+    'generate_conversation_id': case_generate_conversation_id,
+    'generate_conversation_ids_batch': case_generate_conversation_ids_batch,
+}
+
+
+# --- Measurement ----------------------------------------------------------------
+
+def ops_per_sec(fn, repeats: int, target_seconds: float = 0.2) -> float:
+    """Median ops/sec over `repeats` timed runs, each sized to roughly target_seconds."""
+    # Size the loop from a short calibration run
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target_seconds / 10:
+            break
+        loops *= 2
+    loops = max(int(loops * target_seconds / max(elapsed, 1e-9)), 1)
+
+    rates = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            rates.append(loops / (time.perf_counter() - start))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return statistics.median(rates)
+
+
+def allocations(fn, calls: int = 200) -> tuple[float, float]:
+    """Average (peak transient bytes, retained bytes) per call, measured with tracemalloc."""
+    fn()  # warm caches so one-time setup is not attributed to every call
+    gc.collect()
+    # Preallocated so the bookkeeping itself is not counted as retained memory
+    peaks = array('q', bytes(8 * calls))
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for i in range(calls):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            result = fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[i] = peak - before
+            del result
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks), max(retained - baseline, 0) / calls
+
+
+def run_cases(names: list[str], repeats: int) -> dict:
+    results = {}
+    for name in names:
+        fn = CASES[name]()
+        rate = ops_per_sec(fn, repeats)
+        peak, retained = allocations(fn)
+        results[name] = {
+            'ops_per_sec': round(rate, 1),
+            'peak_bytes': round(peak),
+            'retained_bytes': round(retained, 1),
+        }
+        logger_instance.info("Benchmark", case=name, **results[name])
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Names of cases whose ops/sec fell more than `tolerance` below the baseline."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            logger_instance.info("No baseline for case", case=name)
+            continue
+        change = current['ops_per_sec'] / base['ops_per_sec'] - 1
+        fields = dict(case=name, baseline_ops=base['ops_per_sec'], current_ops=current['ops_per_sec'],
+                      change_pct=round(change * 100, 1),
+                      peak_bytes_change=current['peak_bytes'] - base['peak_bytes'])
+        if change < -tolerance:
+            regressions.append(name)
+            logger_instance.error("Regression", **fields)
+        else:
+            logger_instance.info("Within tolerance", **fields)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark handler conversions and model construction")
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help="Run only this case (repeatable)")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per case; the median is reported")
+    parser.add_argument('--results', type=Path, default=RESULTS_FILE, help="Baseline results file")
+    parser.add_argument('--save', action='store_true', help="Write these results as the new baseline")
+    parser.add_argument('--compare', action='store_true', help="Compare against the baseline; exit 1 on regression")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Allowed ops/sec drop before --compare fails")
+    args = parser.parse_args()
+
+    names = args.case or list(CASES)
+    results = run_cases(names, args.repeats)
+
+    if args.compare:
+        if not args.results.exists():
+            logger_instance.error("No baseline to compare against; run with --save first", path=str(args.results))
+            sys.exit(2)
+        with open(args.results) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+    if args.save:
+        existing = {}
+        if args.results.exists():
+            with open(args.results) as f:
+                existing = json.load(f).get('results', {})
+        with open(args.results, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'saved_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'results': {**existing, **results},
+            }, f, indent=2)
+            f.write('\n')
+        logger_instance.info("Baseline saved", path=str(args.results), cases=len(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Cold-start import-time benchmark.
+
+Imports a module in fresh interpreters with `-X importtime` and reports the
+median cumulative import time in milliseconds, plus the slowest modules of the
+last run. With --budget-ms the script exits non-zero when the median exceeds
+the budget, so it can guard against regressions in CI.
+
+Usage:
+    python tests/bench_import_time.py
+    python tests/bench_import_time.py --module api --runs 7 --budget-ms 600
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import logger
+
+logger_instance = logger
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def import_profile(module: str) -> list[tuple[str, int, int]]:
+    """Return (module, self_us, cumulative_us) for every import in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the application")
+    parser.add_argument('--module', type=str, default='api', help="Module to import")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to sample")
+    parser.add_argument('--top', type=int, default=10, help="Slowest modules (cumulative) to list")
+    parser.add_argument('--budget-ms', type=float, default=None, help="Fail if the median exceeds this")
+    args = parser.parse_args()
+
+    samples_ms = []
+    rows = []
+    for _ in range(args.runs):
+        rows = import_profile(args.module)
+        total_us = next(cumulative for name, _, cumulative in rows if name == args.module)
+        samples_ms.append(total_us / 1000)
+
+    median_ms = statistics.median(samples_ms)
+    logger_instance.info("Import time",
+                         module=args.module,
+                         runs=args.runs,
+                         median_ms=round(median_ms, 1),
+                         min_ms=round(min(samples_ms), 1),
+                         max_ms=round(max(samples_ms), 1))
+
+    top_level = {}
+    for name, _, cumulative in rows:
+        root = name.split('.')[0]
+        top_level[root] = max(top_level.get(root, 0), cumulative)
+    for name, cumulative in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        logger_instance.info("Slowest package", package=name, cumulative_ms=round(cumulative / 1000, 1))
+
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        logger_instance.error("Import time over budget", median_ms=round(median_ms, 1), budget_ms=args.budget_ms)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Per-log-call cost microbenchmark for the development and production logging profiles.
+
+Times the caller-side cost of a structured `info` call shaped like the
+"Message saved to database successfully" log in APIMessageHandler.save_message.
+Output goes to /dev/null so terminal speed is not measured; for the production
+profile the queue is drained before the next measurement.
+
+Usage:
+    python tests/bench_logging.py --calls 20000
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import os
+import time
+from uuid import uuid4
+
+import structlog
+
+from utils.logger_config import configure_logging, stop_queue_listener
+
+
+def time_profile(profile: str, calls: int, sink) -> float:
+    """Return mean microseconds per logger.info call for a profile."""
+    configure_logging(profile, stream=sink)
+    log = structlog.get_logger("bench")
+    message_id, conversation_id = str(uuid4()), str(uuid4())
+
+    # Warm up the cached logger and processor chain
+    for _ in range(100):
+        log.info("Message saved to database successfully", message_id=message_id,
+                 conversation_id=conversation_id, to='+15550000001', from_='+15550000002')
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        log.info("Message saved to database successfully", message_id=message_id,
+                 conversation_id=conversation_id, to='+15550000001', from_='+15550000002')
+    elapsed = time.perf_counter() - start
+
+    # Drain the background writer before the next profile is measured
+    stop_queue_listener()
+    return elapsed / calls * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-call logging cost by profile")
+    parser.add_argument('--calls', type=int, default=20_000, help="Log calls per profile")
+    args = parser.parse_args()
+
+    results = {}
+    with open(os.devnull, 'w') as sink:
+        for profile in ('development', 'production'):
+            results[profile] = time_profile(profile, args.calls, sink)
+
+    configure_logging('development')
+    log = structlog.get_logger("bench")
+    log.info("Per-call logging cost",
+             calls=args.calls,
+             development_us=round(results['development'], 2),
+             production_us=round(results['production'], 2),
+             speedup=round(results['development'] / results['production'], 2))
+
+
+if __name__ == "__main__":
+    main()
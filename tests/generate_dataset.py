@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for scale testing.
+
+Fills the messages and emails tables with millions of rows spread over a
+configurable number of conversations, so query plans and endpoint latency can
+be checked at realistic sizes:
+
+* Conversation sizes follow a power law (Zipf, --alpha): a few very long
+  threads and a long tail of short ones. Emails use the same skew.
+* Bodies, the inbound/outbound ratio and the base status per direction come
+  from the fixtures in tests/test_*messages.json. A small share of outbound
+  SMS ends up sent/queued/undelivered/failed, with Twilio error codes.
+* Most emails carry a small generated HTML part; --large-html-rate of them
+  carry one of the full templates in tests/html_email*.html (12-22 KB).
+
+Rows are written with Core executemany inserts in --batch-size chunks, one
+transaction per chunk. The same --seed produces the same rows, ids included.
+
+Usage:
+    python tests/generate_dataset.py --messages 2000000 --emails 200000 --conversations 20000
+    python tests/generate_dataset.py --database-url sqlite:////tmp/hatch_scale.db --messages 100000
+    python tests/generate_dataset.py --seed 7 --alpha 1.1 --days 730
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import random
+import time
+from bisect import bisect
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import insert
+
+from data_model.database_model import Message, dbEmail, modelMetaData
+from data_model.application_model import generate_conversation_ids
+from db import get_pg, backend_for_url
+from utils import logger
+from utils.ids import uuid7_at
+
+logger_instance = logger
+
+TESTS_DIR = Path(__file__).parent
+MESSAGE_FIXTURES = ('test_messages.json', 'test_more_messages.json', 'test_jess_messages.json')
+HTML_TEMPLATES = ('html_email.html', 'html_email_compatible.html', 'html_email_optimized.html')
+BUSINESS_NUMBERS = ('+18333450761', '+18333450762', '+18333450763')
+BUSINESS_EMAIL = 'ian@hapticpaper.com'
+
+# Outcomes layered on top of the fixtures' delivered/received statuses
+OUTBOUND_OUTCOMES = (('delivered', 0.90), ('sent', 0.04), ('queued', 0.01), ('undelivered', 0.03), ('failed', 0.02))
+TWILIO_ERRORS = ((30003, 'Unreachable destination handset'), (30005, 'Unknown destination handset'),
+                 (30006, 'Landline or unreachable carrier'), (30007, 'Message filtered'))
+EMAIL_OUTCOMES = (('delivered', 0.85), ('sent', 0.10), ('failed', 0.05))
+EMAIL_SUBJECTS = ('Your appointment is confirmed', 'Following up on our conversation', 'Invoice available',
+                  'Welcome to Hatch', 'Quick question', 'Reminder: reply to keep your booking', 'Weekly summary')
+
+
+class datasetShapes:
+    """Bodies and direction ratio sampled from the JSON message fixtures."""
+
+    def __init__(self):
+        messages = []
+        for name in MESSAGE_FIXTURES:
+            with open(TESTS_DIR / name) as f:
+                messages.extend(json.load(f))
+        self.bodies = [m['message'] for m in messages]
+        self.outbound_share = sum(m['direction'] == 'outbound-api' for m in messages) / len(messages)
+        self.html_templates = [(TESTS_DIR / name).read_text(encoding='utf-8') for name in HTML_TEMPLATES]
+
+
+def weighted(rng: random.Random, outcomes) -> str:
+    roll = rng.random()
+    for value, share in outcomes:
+        roll -= share
+        if roll < 0:
+            return value
+    return outcomes[-1][0]
+
+
+def zipf_weights(n: int, alpha: float) -> list[float]:
+    """Cumulative Zipf weights for ranks 1..n."""
+    return list(accumulate(1 / rank ** alpha for rank in range(1, n + 1)))
+
+
+def build_conversations(rng: random.Random, count: int) -> list[dict]:
+    """Participants for each conversation: one business number and one customer."""
+    conversations = []
+    for i in range(count):
+        conversations.append({
+            'business': BUSINESS_NUMBERS[i % len(BUSINESS_NUMBERS)],
+            'customer': f"+1{rng.randrange(200, 1000)}{rng.randrange(10**7):07d}",
+            'email': f"customer{i}@example.com",
+        })
+    sms_ids = generate_conversation_ids((c['customer'], c['business']) for c in conversations)
+    email_ids = generate_conversation_ids((c['email'], BUSINESS_EMAIL) for c in conversations)
+    for conversation, sms_id, email_id in zip(conversations, sms_ids, email_ids):
+        conversation['sms_id'] = sms_id
+        conversation['email_id'] = email_id
+    return conversations
+
+
+def message_rows(rng: random.Random, shapes: datasetShapes, conversations: list[dict], total: int,
+                 alpha: float, start: datetime, days: int):
+    """Yield message rows; conversation picked by Zipf rank so sizes follow a power law."""
+    cumulative = zipf_weights(len(conversations), alpha)
+    span_seconds = days * 86400
+    for _ in range(total):
+        conversation = conversations[bisect(cumulative, rng.random() * cumulative[-1])]
+        outbound = rng.random() < shapes.outbound_share
+        timestamp = start + timedelta(seconds=rng.randrange(span_seconds))
+        status = weighted(rng, OUTBOUND_OUTCOMES) if outbound else 'received'
+        error_code, error_message = rng.choice(TWILIO_ERRORS) if status in ('undelivered', 'failed') else (None, None)
+        body = rng.choice(shapes.bodies)
+        segments = 1 + len(body) // 160
+        yield {
+            'id': uuid7_at(timestamp, rng),
+            'to_contact': conversation['customer'] if outbound else conversation['business'],
+            'from_contact': conversation['business'] if outbound else conversation['customer'],
+            'body': body,
+            'type': 'sms',
+            'timestamp': timestamp,
+            'status': status,
+            'conversation_id': conversation['sms_id'],
+            'external_sid': f"SM{rng.getrandbits(128):032x}",
+            'direction': 'outbound-api' if outbound else 'inbound-api',
+            'error_code': error_code,
+            'error_message': error_message,
+            'num_media': 0,
+            'num_segments': segments,
+            'price': round(-0.0079 * segments, 4) if outbound else None,
+            'price_unit': 'USD',
+            'date_sent': timestamp if status != 'queued' else None,
+            'date_updated': timestamp + timedelta(seconds=rng.randrange(1, 30)),
+        }
+
+
+def email_rows(rng: random.Random, shapes: datasetShapes, conversations: list[dict], total: int,
+               alpha: float, start: datetime, days: int, large_html_rate: float):
+    """Yield email rows with the same conversation skew; some carry a full HTML template."""
+    cumulative = zipf_weights(len(conversations), alpha)
+    span_seconds = days * 86400
+    for _ in range(total):
+        conversation = conversations[bisect(cumulative, rng.random() * cumulative[-1])]
+        outbound = rng.random() < shapes.outbound_share
+        timestamp = start + timedelta(seconds=rng.randrange(span_seconds))
+        status = weighted(rng, EMAIL_OUTCOMES) if outbound else 'received'
+        subject = rng.choice(EMAIL_SUBJECTS)
+        body = ' '.join(rng.choices(shapes.bodies, k=rng.randrange(2, 8)))
+        if rng.random() < large_html_rate:
+            html = rng.choice(shapes.html_templates)
+        else:
+            html = f"<html><body><p>{body}</p></body></html>"
+        message_id = f"{rng.getrandbits(128):032x}"[:22]
+        failed = status == 'failed'
+        yield {
+            'id': uuid7_at(timestamp, rng),
+            'to_contact': conversation['email'] if outbound else BUSINESS_EMAIL,
+            'from_contact': BUSINESS_EMAIL if outbound else conversation['email'],
+            'subject': subject,
+            'body': body,
+            'html_content': html,
+            'type': 'email',
+            'timestamp': timestamp,
+            'status': status,
+            'conversation_id': conversation['email_id'],
+            'direction': 'outbound-api' if outbound else 'inbound-api',
+            'cc': None,
+            'bcc': None,
+            'reply_to': None,
+            'attachments': None,
+            'external_message_id': None if failed else message_id,
+            'provider': 'sendgrid',
+            'provider_response': {"status_code": 400 if failed else 202, "headers": {"X-Message-Id": message_id}},
+            'date_sent': None if failed else timestamp,
+            'date_updated': timestamp,
+            'error_code': 400 if failed else None,
+            'error_message': 'Bad Request' if failed else None,
+        }
+
+
+def bulk_insert(engine, table, rows, batch_size: int) -> int:
+    """executemany inserts of `batch_size` rows, one transaction per batch; returns rows written."""
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with engine.begin() as conn:
+                conn.execute(insert(table), batch)
+            written += len(batch)
+            batch = []
+            logger_instance.debug("Batch written", table=table.name, rows=written)
+    if batch:
+        with engine.begin() as conn:
+            conn.execute(insert(table), batch)
+        written += len(batch)
+    return written
+
+
+def build_engine(database_url: str | None):
+    """The app's configured database (DATABASE_URL or POSTGRES_*) unless a URL is given."""
+    if database_url is None:
+        return get_pg().get_engine()
+    return backend_for_url(database_url).create_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large synthetic messages/emails dataset")
+    parser.add_argument('--messages', type=int, default=1_000_000, help="SMS rows to generate")
+    parser.add_argument('--emails', type=int, default=100_000, help="Email rows to generate")
+    parser.add_argument('--conversations', type=int, default=10_000, help="Distinct contacts/conversations")
+    parser.add_argument('--alpha', type=float, default=1.2, help="Zipf exponent for conversation sizes")
+    parser.add_argument('--days', type=int, default=365, help="Spread timestamps over this many days")
+    parser.add_argument('--large-html-rate', type=float, default=0.02,
+                        help="Share of emails carrying a full HTML template")
+    parser.add_argument('--batch-size', type=int, default=10_000, help="Rows per insert transaction")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed gives the same rows")
+    parser.add_argument('--database-url', type=str, default=None,
+                        help="Write to this database instead of the app's configured one")
+    args = parser.parse_args()
+
+    engine = build_engine(args.database_url)
+    modelMetaData.create_all(engine, tables=[Message.__table__, dbEmail.__table__], checkfirst=True)
+
+    rng = random.Random(args.seed)
+    shapes = datasetShapes()
+    conversations = build_conversations(rng, args.conversations)
+    # Data ends "now" relative to a fixed date so reruns with the same seed match
+    start = datetime(2025, 1, 1) - timedelta(days=args.days)
+
+    started = time.perf_counter()
+    messages = bulk_insert(engine, Message.__table__,
+                           message_rows(rng, shapes, conversations, args.messages, args.alpha, start, args.days),
+                           args.batch_size)
+    message_seconds = time.perf_counter() - started
+    emails = bulk_insert(engine, dbEmail.__table__,
+                         email_rows(rng, shapes, conversations, args.emails, args.alpha, start, args.days,
+                                    args.large_html_rate),
+                         args.batch_size)
+    total_seconds = time.perf_counter() - started
+
+    # Expected sizes under the Zipf weights, for a quick sanity check of the skew
+    cumulative = zipf_weights(args.conversations, args.alpha)
+    top_share = cumulative[0] / cumulative[-1]
+    logger_instance.info("Dataset generated",
+                         dialect=engine.dialect.name,
+                         seed=args.seed,
+                         conversations=args.conversations,
+                         messages=messages,
+                         emails=emails,
+                         largest_conversation_messages=round(args.messages * top_share),
+                         message_rows_per_sec=round(messages / message_seconds) if message_seconds else None,
+                         total_seconds=round(total_seconds, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Twilio Messages API and SendGrid v3 mail send.
+
+Speaks just enough of both APIs for providers/rest_connector.py and
+providers/sendgrid_email_connector.py: message create/fetch with the Twilio
+telemetry headers, and POST /v3/mail/send returning X-Message-Id. Latency,
+server errors and 429s are injected at configurable rates. Messages are
+created as `queued` and report `delivered` after --polls-to-deliver fetches.
+
+Point the app at it with:
+    TWILIO_API_URL=http://127.0.0.1:<port>/2010-04-01
+    SENDGRID_API_HOST=http://127.0.0.1:<port>
+
+Usage:
+    python tests/mock_providers.py --port 8099 --latency-ms 120 --error-rate 0.01 --rate-limit-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+_CREATE_MESSAGE = re.compile(r'^/2010-04-01/Accounts/(?P<account>[^/]+)/Messages\.json$')
+_FETCH_MESSAGE = re.compile(r'^/2010-04-01/Accounts/(?P<account>[^/]+)/Messages/(?P<sid>[^/]+)\.json$')
+_SENDGRID_SEND = '/v3/mail/send'
+
+
+class providerSimulator:
+    """Shared state and fault injection for the request handler."""
+
+    def __init__(self, latency_ms: float = 100.0, jitter: float = 0.5, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, polls_to_deliver: int = 1, seed: int | None = None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.polls_to_deliver = polls_to_deliver
+        self.random = random.Random(seed)
+        self.messages: dict[str, dict] = {}
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Sleep for the configured latency (uniform +/- jitter) and return the seconds slept."""
+        with self.lock:
+            factor = self.random.uniform(1 - self.jitter, 1 + self.jitter)
+        seconds = max(self.latency_ms * factor, 0) / 1000
+        time.sleep(seconds)
+        return seconds
+
+    def fault(self) -> int | None:
+        """429 or 500 at the configured rates, else None."""
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+
+def make_handler(sim: providerSimulator):
+
+    class handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: dict | None, headers: dict | None = None):
+            payload = json.dumps(body).encode() if body is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json;charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.send_header('Date', formatdate(usegmt=True))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _twilio_headers(self, seconds: float) -> dict:
+            return {
+                'Twilio-Concurrent-Requests': str(sim.in_flight),
+                'Twilio-Request-Id': 'RQ' + uuid.uuid4().hex,
+                'Twilio-Request-Duration': f"{seconds:.3f}",
+                'X-Home-Region': 'us1',
+                'X-Api-Domain': 'api.twilio.com',
+            }
+
+        def _twilio_error(self, status: int, seconds: float):
+            code = 20429 if status == 429 else 20500
+            message = 'Too Many Requests' if status == 429 else 'Internal Server Error'
+            self._send(status, {"code": code, "message": message, "more_info": f"https://www.twilio.com/docs/errors/{code}",
+                                "status": status}, self._twilio_headers(seconds))
+
+        def _message_body(self, message: dict) -> dict:
+            return {
+                "account_sid": message['account'],
+                "api_version": "2010-04-01",
+                "body": message['body'],
+                "date_created": message['date_created'],
+                "date_sent": message['date_created'],
+                "date_updated": formatdate(usegmt=True),
+                "direction": "outbound-api",
+                "error_code": None,
+                "error_message": None,
+                "from": message['from'],
+                "messaging_service_sid": None,
+                "num_media": "0",
+                "num_segments": "1",
+                "price": None,
+                "price_unit": "USD",
+                "sid": message['sid'],
+                "status": message['status'],
+                "subresource_uris": {},
+                "to": message['to'],
+                "uri": f"/2010-04-01/Accounts/{message['account']}/Messages/{message['sid']}.json",
+            }
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+
+        def do_POST(self):
+            body = self._read_body()
+            with sim.lock:
+                sim.in_flight += 1
+            try:
+                seconds = sim.delay()
+                fault = sim.fault()
+                match = _CREATE_MESSAGE.match(self.path)
+                if match:
+                    if fault:
+                        return self._twilio_error(fault, seconds)
+                    form = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+                    message = {
+                        'sid': 'SM' + uuid.uuid4().hex,
+                        'account': match['account'],
+                        'to': form.get('To', ''),
+                        'from': form.get('From', ''),
+                        'body': form.get('Body', ''),
+                        'status': 'queued',
+                        'polls': 0,
+                        'date_created': formatdate(usegmt=True),
+                    }
+                    with sim.lock:
+                        sim.messages[message['sid']] = message
+                    return self._send(201, self._message_body(message), self._twilio_headers(seconds))
+
+                if self.path == _SENDGRID_SEND:
+                    if fault:
+                        return self._send(fault, {"errors": [{"message": "simulated failure", "field": None}]})
+                    return self._send(202, None, {'X-Message-Id': uuid.uuid4().hex[:22]})
+
+                self._send(404, {"message": f"No route for POST {self.path}"})
+            finally:
+                with sim.lock:
+                    sim.in_flight -= 1
+
+        def do_GET(self):
+            with sim.lock:
+                sim.in_flight += 1
+            try:
+                seconds = sim.delay()
+                match = _FETCH_MESSAGE.match(self.path)
+                if not match:
+                    return self._send(404, {"message": f"No route for GET {self.path}"})
+                with sim.lock:
+                    message = sim.messages.get(match['sid'])
+                    if message is not None:
+                        message['polls'] += 1
+                        if message['polls'] >= sim.polls_to_deliver:
+                            message['status'] = 'delivered'
+                        elif message['status'] == 'queued':
+                            message['status'] = 'sent'
+                if message is None:
+                    return self._send(404, {"code": 20404, "message": "The requested resource was not found",
+                                            "more_info": "https://www.twilio.com/docs/errors/20404", "status": 404},
+                                      self._twilio_headers(seconds))
+                self._send(200, self._message_body(message), self._twilio_headers(seconds))
+            finally:
+                with sim.lock:
+                    sim.in_flight -= 1
+
+    return handler
+
+
+def serve(port: int, sim: providerSimulator) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(sim))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Twilio/SendGrid simulator for load tests")
+    parser.add_argument('--port', type=int, default=0, help="Port to listen on (0 picks a free one)")
+    parser.add_argument('--latency-ms', type=float, default=100.0, help="Mean provider latency")
+    parser.add_argument('--jitter', type=float, default=0.5, help="Latency spread as a fraction of the mean")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of sends answered with 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of sends answered with 429")
+    parser.add_argument('--polls-to-deliver', type=int, default=1, help="Status fetches before a message is delivered")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for latency and fault injection")
+    args = parser.parse_args()
+
+    sim = providerSimulator(args.latency_ms, args.jitter, args.error_rate, args.rate_limit_rate,
+                            args.polls_to_deliver, args.seed)
+    server = serve(args.port, sim)
+    # The load harness reads this line to learn the port
+    print(f"listening {server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
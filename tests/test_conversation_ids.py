@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for contact normalisation and memoized/batched conversation IDs.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import normalize_contact
+from data_model.application_model import generate_conversation_id, generate_conversation_ids
+
+
+def test_normalize_contact():
+    assert normalize_contact(' +1 (833) 345-0761 ') == '+18333450761'
+    assert normalize_contact('833.345.0761') == '+18333450761'
+    assert normalize_contact('18333450761') == '+18333450761'
+    assert normalize_contact('+44 20 7946 0958') == '+442079460958'
+    assert normalize_contact(' Ian@HapticPaper.com') == 'ian@hapticpaper.com'
+    assert normalize_contact(' Alice ') == 'Alice'
+
+
+def test_equivalent_contacts_share_a_conversation():
+    canonical = generate_conversation_id('+18333450761', '+18777804236')
+    assert generate_conversation_id('(877) 780-4236', '833 345 0761') == canonical
+    assert generate_conversation_id('+18777804236', '+18333450761') == canonical
+
+    hits = generate_conversation_id.cache_info().hits
+    generate_conversation_id('+18333450761', '+18777804236')
+    assert generate_conversation_id.cache_info().hits == hits + 1
+
+
+def test_batch_matches_single():
+    pairs = [('Bob', 'Alice'), ('Alice', 'Bob'), ('8333450761', 'bob@example.com'), ('Bob', 'Alice')]
+    assert generate_conversation_ids(pairs) == [generate_conversation_id(to, from_) for to, from_ in pairs]
+    assert generate_conversation_ids([]) == []
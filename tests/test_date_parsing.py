@@ -9,8 +9,11 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from data_model.api_message_handler import twilioHeaderHandler
-from utils import logger
+import json
+from datetime import datetime, timezone
+
+from data_model.api_message_handler import twilioHeaderHandler, twilioSMSResponseHandler
+from utils import logger, parse_provider_datetime
 
 # Test headers with the GMT date format
 test_headers = {
@@ -101,6 +104,27 @@ def test_date_parsing():
         logger.error(f"Error testing date parsing: {e}", exc_info=True)
         return False
 
+def test_provider_formats_and_raw_bytes():
+    """RFC 2822 and ISO dates parse alike; raw response bytes give the same model as the decoded dict."""
+    expected = datetime(2025, 5, 26, 19, 22, 31, tzinfo=timezone.utc)
+    assert parse_provider_datetime("Mon, 26 May 2025 19:22:31 +0000") == expected
+    assert parse_provider_datetime("Mon, 26 May 2025 19:22:31 GMT") == expected
+    assert parse_provider_datetime("2025-05-26T19:22:31Z") == expected
+    assert parse_provider_datetime("not a date") is None
+
+    with open(Path(__file__).parent / 'test_twilio_response.json') as f:
+        fixture = json.load(f)
+    from_bytes = twilioSMSResponseHandler.from_response_bytes(json.dumps(fixture['response']).encode())
+    assert from_bytes == twilioSMSResponseHandler.from_response_dict(fixture['response'])
+    assert from_bytes.date_created == expected and from_bytes.from_ == fixture['response']['from']
+
+    # Header names match case-insensitively, in one pass; missing ones get empty defaults
+    headers = twilioHeaderHandler.from_headers_dict({'Date': 'Mon, 26 May 2025 19:22:31 GMT',
+                                                     'Twilio-Request-Id': 'RQ1', 'TWILIO-REQUEST-DURATION': '0.1'})
+    assert headers.date == expected and headers.twilio_request_id == 'RQ1' and headers.twilio_request_duration == 0.1
+    assert headers.content_length == 0 and headers.vary is None
+
+
 if __name__ == "__main__":
     success = test_date_parsing()
     if success:
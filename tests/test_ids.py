@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for time-ordered (version 7) UUIDs.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import random
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from utils.ids import uuid7, uuid7_at, uuid7_floor, uuid7_time
+
+
+def test_uuid7_is_ordered_and_versioned():
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    ids = [uuid7() for _ in range(20000)]
+    # More ids than the 12-bit counter allows in one millisecond: still strictly increasing
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert all(u.version == 7 and u.variant == 'specified in RFC 4122' for u in ids[:100])
+    assert uuid7_floor(before) < ids[0]
+    assert abs(uuid7_time(ids[0]) - before) < timedelta(seconds=5)
+    assert uuid7_time(uuid4()) is None
+
+
+def test_uuid7_at_is_reproducible_and_sorts_by_time():
+    moment = datetime(2025, 5, 26, 19, 22, 31, tzinfo=timezone.utc)
+    assert uuid7_at(moment, random.Random(7)) == uuid7_at(moment, random.Random(7))
+    assert uuid7_time(uuid7_at(moment)) == moment
+    assert uuid7_floor(moment) <= uuid7_at(moment) < uuid7_floor(moment + timedelta(milliseconds=1))
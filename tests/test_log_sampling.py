@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the log sampling / error collapsing processor.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dataclasses import replace
+
+import pytest
+import structlog
+
+from utils import get_config, logger_config
+from utils.log_sampling import LogSampler, sampler as shared_sampler
+
+
+def run(sampler, method_name, **event_dict):
+    """Return the processed event dict, or None when the sampler dropped it."""
+    try:
+        return sampler(None, method_name, dict(event_dict))
+    except structlog.DropEvent:
+        return None
+
+
+def test_sample_rates():
+    sampler = LogSampler(rates={"noisy": 0.0, "kept": 1.0})
+
+    assert run(sampler, "info", event="noisy") is None
+    assert run(sampler, "info", event="kept") == {"event": "kept"}
+    assert run(sampler, "info", event="unconfigured") == {"event": "unconfigured"}
+
+    sampler.set_rate("noisy", 0.5)
+    kept = [run(sampler, "info", event="noisy") for _ in range(2000)]
+    kept = [event for event in kept if event is not None]
+    assert 800 < len(kept) < 1200
+    assert all(event["sample_rate"] == 0.5 for event in kept)
+
+    with pytest.raises(ValueError):
+        sampler.update_rates({"noisy": 1.5})
+    with pytest.raises(ValueError):
+        sampler.set_rate("noisy", "often")
+    sampler.set_rate("noisy", "0.25")
+    assert sampler.get_rates()["noisy"] == 0.25
+
+
+def test_repeated_errors_collapse():
+    sampler = LogSampler(collapse_window=3600)
+
+    assert run(sampler, "error", event="db down", error="timeout") is not None
+    for _ in range(5):
+        assert run(sampler, "error", event="db down", error="timeout") is None
+    # A different error text is a different key
+    assert run(sampler, "error", event="db down", error="refused") is not None
+    # Info events are never collapsed
+    assert run(sampler, "info", event="db down", error="timeout") is not None
+
+    sampler.collapse_window = 0
+    passed = run(sampler, "error", event="db down", error="timeout")
+    assert passed["repeated"] == 5
+
+
+def test_burst_is_summarised_when_window_ends():
+    sampler = LogSampler(collapse_window=3600)
+    run(sampler, "error", event="Failed to send email", error="timeout")
+    for _ in range(3):
+        run(sampler, "error", event="Failed to send email", error="timeout")
+
+    # No further duplicate arrives; the next unrelated event reports the burst
+    sampler.collapse_window = 0
+    with structlog.testing.capture_logs() as logs:
+        assert run(sampler, "info", event="unrelated") == {"event": "unrelated"}
+    assert logs == [{
+        "event": "Collapsed repeated log events", "log_level": "warning",
+        "collapsed_event": "Failed to send email", "error": "timeout", "repeated": 3,
+    }]
+    with structlog.testing.capture_logs() as logs:
+        sampler.flush()
+    assert logs == []
+
+
+def test_tracked_errors_are_bounded():
+    sampler = LogSampler(collapse_window=3600, max_tracked=10)
+    for i in range(50):
+        run(sampler, "error", event=f"Failed to send email: {i}")
+        run(sampler, "error", event=f"Failed to send email: {i}")
+    with structlog.testing.capture_logs() as logs:
+        sampler.flush()
+    assert [log["collapsed_event"] for log in logs] == [f"Failed to send email: {i}" for i in range(40, 50)]
+
+
+def test_configure_logging_applies_config(monkeypatch):
+    config = replace(get_config(), log_sample_rates={"noisy": 0.25}, log_collapse_window=5.0)
+    monkeypatch.setattr(logger_config, 'get_config', lambda: config)
+    try:
+        logger_config.configure_logging('development')
+        assert shared_sampler.get_rates()["noisy"] == 0.25 and shared_sampler.collapse_window == 5.0
+    finally:
+        monkeypatch.undo()
+        logger_config.configure_logging()
+    assert "noisy" not in shared_sampler.get_rates()
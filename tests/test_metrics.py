@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process metrics registry and its histogram buckets.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import threading
+
+import pytest
+
+from utils.metrics import (MetricsRegistry, bucket_index, bucket_lower_bound,
+                           bucket_upper_bound, provider_request_duration,
+                           time_provider_call)
+
+
+def test_bucket_bounds_contain_value():
+    for microseconds in list(range(0, 2000)) + [10_000, 123_456, 5_000_000, 59_999_999]:
+        index = bucket_index(microseconds)
+        assert bucket_lower_bound(index) <= microseconds < bucket_upper_bound(index)
+        # Relative bucket width stays within the documented error bound
+        if microseconds >= 16:
+            width = bucket_upper_bound(index) - bucket_lower_bound(index)
+            assert width / bucket_lower_bound(index) <= 0.125
+
+
+def test_sharded_histogram_and_render():
+    registry = MetricsRegistry()
+    requests = registry.counter('test_requests_total', 'Requests.', ('route',))
+    latency = registry.histogram('test_latency_seconds', 'Latency.', ('route',))
+
+    def work():
+        for _ in range(1000):
+            requests.inc(route='/a')
+            latency.observe(0.002, route='/a')
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert requests.labels('/a').value() == 4000
+    p50 = latency.labels('/a').percentile(0.5)
+    assert abs(p50 - 0.002) / 0.002 < 0.07
+
+    text = registry.render_prometheus()
+    assert 'test_requests_total{route="/a"} 4000.0' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.001"} 0' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.0025"} 4000' in text
+    assert 'test_latency_seconds_count{route="/a"} 4000' in text
+
+
+def test_exited_threads_shards_are_folded():
+    registry = MetricsRegistry()
+    requests = registry.counter('test_thread_requests_total', 'Requests.')
+    latency = registry.histogram('test_thread_latency_seconds', 'Latency.')
+
+    def work():
+        requests.inc()
+        latency.observe(0.002)
+
+    # Thread-per-request: many short-lived threads, thread idents reused
+    for _ in range(50):
+        threads = [threading.Thread(target=work) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    series = requests.labels()
+    assert series.shard_count() <= 10 and latency.labels().shard_count() <= 10
+    assert series.value() == 500
+    assert latency.labels().counts()[0][bucket_index(2000)] == 500
+
+
+def test_provider_call_outcome():
+    def count(outcome):
+        return sum(provider_request_duration.labels('test', 'send', outcome).counts()[0])
+
+    with time_provider_call('test', 'send') as call:
+        call.record_status(200)
+    with time_provider_call('test', 'send') as call:
+        call.record_status(429)
+    with pytest.raises(RuntimeError):
+        with time_provider_call('test', 'send'):
+            raise RuntimeError("connection reset")
+
+    assert count('ok') == 1 and count('error') == 2
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the sampling CPU profiler and tracemalloc snapshot diffs.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import threading
+import time
+
+from utils import profiling
+
+
+def spin(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        sum(range(100))
+
+
+def test_sample_stacks_sees_busy_thread():
+    worker = threading.Thread(target=spin, args=(0.5,), name='spinner')
+    worker.start()
+    stacks, passes = profiling.sample_stacks(0.3, interval=0.002)
+    worker.join()
+
+    assert passes > 0
+    spinner = [stack for stack in stacks if stack.startswith('spinner;')]
+    assert spinner and all('spin (test_profiling.py' in stack for stack in spinner)
+    line = profiling.collapsed_text(stacks).splitlines()[0]
+    assert line.rsplit(' ', 1)[1].isdigit()
+
+
+def test_memory_snapshot_diff():
+    profiling.start_tracemalloc(frames=1)
+    try:
+        before = profiling.take_snapshot()
+        retained = [bytearray(1024) for _ in range(500)]
+        after = profiling.take_snapshot()
+
+        stats = profiling.diff_snapshots(before, after, limit=5)
+        top = stats[0]
+        assert 'test_profiling.py' in top['location']
+        assert top['size_diff_bytes'] >= 500 * 1024
+        assert len(retained) == 500
+    finally:
+        profiling.stop_tracemalloc()
+    assert profiling.memory_status()['snapshots'] == []
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the provider telemetry ring buffer and per-minute rollups.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from providers.telemetry import providerTelemetry, percentile
+
+
+def test_network_latency_and_rollup():
+    telemetry = providerTelemetry(maxlen=50, flush_seconds=0)
+    # Pin every sample to one minute so the rollup cannot split across a boundary
+    minute_start = time.time() // 60 * 60
+    for i in range(100):
+        telemetry.record('twilio', 'send_sms', 201, elapsed_seconds=0.3,
+                         provider_seconds=0.1, concurrent_requests=i % 3, home_region='us1',
+                         recorded_at=minute_start)
+    telemetry.record('twilio', 'send_sms', 429, elapsed_seconds=0.05, recorded_at=minute_start)
+    telemetry.record('sendgrid', 'send', 202, elapsed_seconds=0.2, recorded_at=minute_start)
+
+    # Ring buffer keeps only the newest samples
+    samples = telemetry.samples()
+    assert len(samples) == 50
+    assert samples[-1].provider == 'sendgrid'
+    assert round(samples[0].network_ms, 6) == 200.0
+    # Without a provider-reported duration the split is unknown
+    assert samples[-2].network_ms is None
+
+    [minute] = telemetry.rollup('twilio')
+    assert minute['calls'] == 49
+    assert minute['errors'] == 1
+    assert minute['provider_ms']['count'] == 48
+    assert round(minute['network_ms']['p50']) == 200
+    assert minute['home_regions'] == {'us1': 48}
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile(values, 1.0) == 100
+    assert percentile([], 0.5) is None
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests for SQL fingerprinting and the slow-query log.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, text
+
+from db.slow_queries import normalize_sql, slowQueryLog
+
+
+def test_normalize_sql():
+    assert normalize_sql("SELECT * FROM messages WHERE id = %(id_1)s AND body = 'it''s' LIMIT 10") == \
+        "SELECT * FROM messages WHERE id = ? AND body = ? LIMIT ?"
+    assert normalize_sql("SELECT a::uuid FROM t1 WHERE x IN (?, ?, ?)\n  AND y = :y") == \
+        "SELECT a::uuid FROM t1 WHERE x IN (?...) AND y = ?"
+    assert normalize_sql("SELECT * FROM t WHERE x IN ($1, $2)") == normalize_sql("SELECT * FROM t WHERE x IN ($1, $2, $3)")
+
+
+def test_top_n_and_sqlite_plan():
+    log = slowQueryLog(threshold_ms=5, top_n=2)
+    engine = create_engine('sqlite://')
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE messages (id INTEGER PRIMARY KEY, conversation_id TEXT)"))
+        statement = "SELECT id FROM messages WHERE conversation_id = ?"
+
+        log.observe(conn, None, statement, ('a',), 0.001)  # under threshold
+        log.observe(conn, None, statement, ('a',), 0.050)
+        log.observe(conn, None, statement, ('b',), 0.030)
+        log.observe(conn, None, "INSERT INTO messages (conversation_id) VALUES (?)", ('a',), 0.010)
+        log.observe(conn, None, "UPDATE messages SET conversation_id = ?", ('a',), 0.200)
+
+    top = log.top()
+    # The cheapest fingerprint (the INSERT) was evicted
+    assert [entry["fingerprint"].split()[0] for entry in top] == ["UPDATE", "SELECT"]
+    select = top[1]
+    assert select["calls"] == 2 and select["max_ms"] == 50.0
+    assert select["plan"] and "messages" in select["plan"][0]
+    # Only reads are explained
+    assert top[0]["plan"] is None and top[0]["plan_captured_at"] is None
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Tests for storage backend selection and the API read/write paths on in-memory SQLite.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from utils import get_config
+from db import hatchPostgres, get_backend, postgresBackend, sqliteBackend
+from db import postgres_connector, rebuild_contacts
+from db.contacts import recent_contacts
+from data_model import dbEmail, Message
+from data_model.application_model import generate_conversation_id
+
+
+def test_backend_selection():
+    config = replace(get_config(), database_url=None, db_backend=None, postgres_host='db', postgres_db='hatchapp')
+    assert isinstance(get_backend(config), postgresBackend)
+    assert get_backend(config).url.endswith('@db:5432/hatchapp')
+
+    sqlite = get_backend(replace(config, db_backend='sqlite', sqlite_path=':memory:'))
+    assert isinstance(sqlite, sqliteBackend) and sqlite.in_memory and sqlite.url == 'sqlite://'
+
+    # DATABASE_URL wins and its scheme picks the backend
+    from_url = get_backend(replace(config, db_backend='postgres', database_url='sqlite:////tmp/hatch.db'))
+    assert isinstance(from_url, sqliteBackend) and from_url.path == '/tmp/hatch.db'
+
+    with pytest.raises(ValueError):
+        get_backend(replace(config, db_backend='mongo'))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import api.api as api_module
+
+    pg = hatchPostgres(sqliteBackend())
+    assert pg.create_tables()
+    # Contacts written to earlier tests' databases must not be skipped in this one
+    recent_contacts.clear()
+    monkeypatch.setattr(api_module, 'pg', pg)
+    monkeypatch.setattr(postgres_connector, 'get_pg', lambda: pg)
+    api_module.app.config['TESTING'] = True
+    with api_module.app.test_client() as client:
+        yield client, pg
+    pg.engine.dispose()
+
+
+def test_api_paths_on_sqlite(client):
+    client, pg = client
+    before = datetime.now() - timedelta(seconds=1)
+
+    for body in ("Hello Bob!", "Hi Alice!"):
+        response = client.post('/api/send_message', json={"to": "Bob", "from": "Alice", "body": body})
+        assert response.status_code == 200 and response.json["method"] == "database"
+    client.post('/api/send_message', json={"to": "Carol", "from": "Alice", "body": "Hey Carol"})
+
+    conversations = client.get('/api/conversations').json["conversations"]
+    assert len(conversations) == 2
+    bob = generate_conversation_id("Bob", "Alice")
+    assert conversations[1]["conversation_id"] == str(bob) and conversations[1]["message_count"] == 2
+
+    messages = client.get(f'/api/conversation/{bob}/messages').json["messages"]
+    assert [m["body"] for m in messages] == ["Hello Bob!", "Hi Alice!"]
+
+    since = before.isoformat()
+    assert len(client.get(f'/api/conversation/{bob}/new_messages?since={since}').json["messages"]) == 2
+    later = (datetime.now() + timedelta(minutes=1)).isoformat()
+    assert client.get(f'/api/conversation/{bob}/new_messages?since={later}').json["messages"] == []
+
+    email_id = uuid4()
+    session = pg.start_connection()
+    session.add(dbEmail(id=email_id, to_contact="bob@example.com", from_contact="alice@example.com",
+                        subject="Hi", body="x" * 500, html_content="<p>Hi</p>", timestamp=datetime.now(),
+                        status="sent", conversation_id=generate_conversation_id("bob@example.com", "alice@example.com"),
+                        direction="outbound-api", provider_response={"status_code": 202}))
+    session.commit()
+    session.close()
+
+    emails = client.get(f'/api/conversation/{generate_conversation_id("bob@example.com", "alice@example.com")}/emails').json["emails"]
+    assert len(emails) == 1 and emails[0]["has_html"] is True and len(emails[0]["body_preview"]) == 200
+    content = client.get(f'/api/email/{email_id}/content').json
+    assert content["html_content"] == "<p>Hi</p>" and content["provider_response"] == {"status_code": 202}
+
+
+def test_keyset_paging_by_id(client):
+    client, pg = client
+    for i in range(5):
+        client.post('/api/send_message', json={"to": "Dave", "from": "Alice", "body": f"message {i}"})
+    conversation = generate_conversation_id("Dave", "Alice")
+    url = f'/api/conversation/{conversation}/messages'
+
+    bodies, after = [], ''
+    while True:
+        page = client.get(f'{url}?limit=2&after={after}').json["messages"]
+        if not page:
+            break
+        assert len(page) <= 2
+        bodies += [m["body"] for m in page]
+        after = page[-1]["id"]
+    assert bodies == [f"message {i}" for i in range(5)]
+
+    assert client.get(f'{url}?limit=0').status_code == 400
+    assert client.get(f'{url}?after=not-a-uuid').status_code == 400
+
+
+def test_find_emails_by_json_metadata(client):
+    client, pg = client
+    session = pg.start_connection()
+    for cc, status_code in ((["bob@example.com"], 202), (["bob@example.com", "dave@example.com"], 500), (None, 500)):
+        session.add(dbEmail(id=uuid4(), to_contact="carol@example.com", from_contact="alice@example.com",
+                            subject="Hi", body="x", timestamp=datetime.now(), cc=cc,
+                            provider_response={"status_code": status_code}))
+    session.commit()
+    session.close()
+
+    assert len(client.get('/api/emails?cc=bob@example.com').json["emails"]) == 2
+    assert len(client.get('/api/emails?cc=dave@example.com').json["emails"]) == 1
+    assert len(client.get('/api/emails?status_code=500').json["emails"]) == 2
+    assert len(client.get('/api/emails?cc=bob@example.com&status_code=202').json["emails"]) == 1
+    assert client.get('/api/emails').status_code == 400
+    assert client.get('/api/emails?status_code=abc').status_code == 400
+
+
+def test_search_substring_fallback(client):
+    client, pg = client
+    client.post('/api/send_message', json={"to": "Erin", "from": "Alice", "body": "Your Appointment is confirmed"})
+    client.post('/api/send_message', json={"to": "Erin", "from": "Alice", "body": "See you soon"})
+    session = pg.start_connection()
+    session.add(dbEmail(id=uuid4(), to_contact="erin@example.com", from_contact="alice@example.com",
+                        subject="Appointment reminder", body="Tomorrow at 10", timestamp=datetime.now()))
+    session.commit()
+    session.close()
+
+    results = client.get('/api/search?q=appointment').json["results"]
+    assert sorted(r["type"] for r in results) == ["email", "sms"]
+    assert [r["subject"] for r in client.get('/api/search?q=appointment&type=email').json["results"]] == ["Appointment reminder"]
+    assert len(client.get('/api/search?q=appointment&limit=1&offset=1').json["results"]) == 1
+    assert client.get('/api/search?q=').status_code == 400
+    assert client.get('/api/search?q=x&type=fax').status_code == 400
+
+
+def test_contacts_autocomplete(client):
+    client, pg = client
+    client.post('/api/send_message', json={"to": "Frank", "from": "Alice", "body": "Hi"})
+    session = pg.start_connection()
+    session.add(Message(id=uuid4(), to_contact="(833) 345-0761", from_contact="+18777804236", body="x",
+                        type="sms", timestamp=datetime.now()))
+    session.add(dbEmail(id=uuid4(), to_contact="Frank.Smith@Example.com", from_contact="alice@example.com",
+                        subject="Hi", body="x", timestamp=datetime.now()))
+    session.commit()
+    session.close()
+
+    def suggest(query):
+        return [c["contact"] for c in client.get(f'/api/contacts?{query}').json["contacts"]]
+
+    assert suggest('prefix=fra') == ["frank.smith@example.com", "Frank"]  # Both prefixes: most recent first
+    assert suggest('prefix=fra&kind=email') == ["frank.smith@example.com"]
+    # Typed phone fragments match normalised numbers
+    assert suggest('prefix=(833) 34') == ["+18333450761"]
+    assert suggest('prefix=877') == ["+18777804236"]
+    assert suggest('prefix=smith') == ["frank.smith@example.com"]
+    assert suggest('prefix=%25') == [] and suggest('prefix=') == []
+
+    # A rebuild from history finds the same contacts
+    with pg.engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM contacts")
+    assert rebuild_contacts(pg.engine) == 6
+    assert suggest('prefix=fra&kind=email') == ["frank.smith@example.com"]
+
+
+def test_contacts_with_aware_and_naive_timestamps(client):
+    client, pg = client
+    # Provider rows carry aware timestamps, API rows a naive datetime.now(); both touch the same contacts
+    for timestamp in (datetime.now(timezone.utc) - timedelta(hours=2), datetime.now()):
+        session = pg.start_connection()
+        session.add(Message(id=uuid4(), to_contact="+18885550100", from_contact="+18333450761", body="x",
+                            type="sms", timestamp=timestamp))
+        session.commit()
+        session.close()
+
+    contacts = client.get('/api/contacts?prefix=888555').json["contacts"]
+    assert [c["contact"] for c in contacts] == ["+18885550100"]
+    # last_seen moved on to the naive write, stored as UTC
+    last_seen = datetime.fromisoformat(contacts[0]["last_seen"])
+    assert abs(last_seen - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(minutes=5)
+    assert rebuild_contacts(pg.engine) == 2
+
+
+def test_unified_timeline(client):
+    client, pg = client
+    conversation = generate_conversation_id("grace@example.com", "alice@example.com")
+    start = datetime.now() - timedelta(hours=1)
+    session = pg.start_connection()
+    for i in range(3):
+        session.add(Message(id=uuid4(), to_contact="grace@example.com", from_contact="alice@example.com",
+                            body=f"sms {i}", type="sms", timestamp=start + timedelta(minutes=2 * i),
+                            conversation_id=conversation, direction="outbound-api"))
+        session.add(dbEmail(id=uuid4(), to_contact="grace@example.com", from_contact="alice@example.com",
+                            subject=f"email {i}", body="x" * 500, timestamp=start + timedelta(minutes=2 * i + 1),
+                            conversation_id=conversation, direction="outbound-api"))
+    # A legacy row without a timestamp sorts first instead of dropping out
+    session.add(Message(id=uuid4(), to_contact="grace@example.com", from_contact="alice@example.com",
+                        body="undated", type="sms", timestamp=None, conversation_id=conversation))
+    # An email-only thread still shows up in the inbox
+    session.add(dbEmail(id=uuid4(), to_contact="heidi@example.com", from_contact="alice@example.com",
+                        subject="Hello", body="x", timestamp=datetime.now(), direction="outbound-api",
+                        conversation_id=generate_conversation_id("heidi@example.com", "alice@example.com")))
+    session.commit()
+    session.close()
+
+    conversations = {c["conversation_id"]: c for c in client.get('/api/conversations').json["conversations"]}
+    assert len(conversations) == 2 and conversations[str(conversation)]["message_count"] == 7
+
+    url = f'/api/conversation/{conversation}/timeline'
+    items, after = [], ''
+    while True:
+        page = client.get(f'{url}?limit=4&after={after}').json["timeline"]
+        if not page:
+            break
+        items += page
+        after = page[-1]["cursor"]
+    assert [i["body"] if i["kind"] == "sms" else i["subject"] for i in items] == \
+        ["undated", "sms 0", "email 0", "sms 1", "email 1", "sms 2", "email 2"]
+    assert items[0]["timestamp"] is None and len(items[2]["body"]) == 200
+
+    assert client.get(f'{url}?after=garbage').status_code == 400
+    assert client.get(f'{url}?limit=0').status_code == 400
+
+
+def test_batch_latest_messages(client):
+    client, pg = client
+    for i in range(5):
+        client.post('/api/send_message', json={"to": "Ivan", "from": "Alice", "body": f"ivan {i}"})
+    client.post('/api/send_message', json={"to": "Judy", "from": "Alice", "body": "judy 0"})
+    ivan, judy = generate_conversation_id("Ivan", "Alice"), generate_conversation_id("Judy", "Alice")
+    empty = uuid4()
+
+    def batch(conversations, limit=2):
+        response = client.post('/api/conversations/messages', json={"conversations": conversations, "limit": limit})
+        assert response.status_code == 200
+        return response.json["conversations"]
+
+    page = batch([str(ivan), {"conversation_id": str(judy)}, str(empty)])
+    assert [m["body"] for m in page[str(ivan)]["messages"]] == ["ivan 3", "ivan 4"]
+    assert [m["body"] for m in page[str(judy)]["messages"]] == ["judy 0"]
+    assert page[str(empty)] == {"messages": [], "before": None}
+
+    # Each conversation pages back independently from its own cursor
+    older = batch([{"conversation_id": str(ivan), "before": page[str(ivan)]["before"]},
+                   {"conversation_id": str(judy), "before": page[str(judy)]["before"]}])
+    assert [m["body"] for m in older[str(ivan)]["messages"]] == ["ivan 1", "ivan 2"]
+    assert older[str(judy)]["messages"] == []
+
+    assert client.post('/api/conversations/messages', json={"conversations": []}).status_code == 400
+    assert client.post('/api/conversations/messages', json={"conversations": ["nope"]}).status_code == 400
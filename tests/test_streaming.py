@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming listing responses.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+
+import flask
+
+from api.streaming import stream_rows
+
+
+def test_stream_cleanup_runs_once():
+    app = flask.Flask(__name__)
+    closed = []
+
+    with app.test_request_context('/'):
+        # Client gone before the first chunk: the body is never iterated, only closed
+        stream_rows("rows", iter([{"a": 1}]), on_close=lambda: closed.append('unstarted')).close()
+
+        response = stream_rows("rows", iter([{"a": 1}, {"a": 2}]), on_close=lambda: closed.append('drained'))
+        body = response.get_data(as_text=True)
+        response.close()
+
+    assert json.loads(body) == {"rows": [{"a": 1}, {"a": 2}]}
+    assert closed == ['unstarted', 'drained']
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for request-scoped tracing and the Server-Timing summary.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from utils.tracing import start_trace, end_trace, span, current_trace
+
+
+def test_spans_nest_and_summarise():
+    trace = start_trace("POST /api/send_message")
+    with span('twilio.post') as post:
+        with span('db.commit') as commit:
+            pass
+    for _ in range(3):
+        with span('twilio.backoff_sleep'):
+            pass
+    with pytest.raises(RuntimeError):
+        with span('sendgrid.send'):
+            raise RuntimeError("boom")
+
+    assert end_trace(502) is trace
+    assert current_trace() is None
+    assert commit.parent_id == post.span_id
+    assert post.parent_id == trace.root.span_id
+    assert trace.spans[-1].error == "RuntimeError: boom"
+
+    header = trace.server_timing()
+    assert 'twilio.backoff_sleep;dur=' in header and 'desc="x3"' in header
+    assert header.endswith(f"total;dur={trace.root.duration_ms:.1f}")
+
+    otlp = trace.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(otlp) == 7
+    assert {s["traceId"] for s in otlp} == {trace.trace_id}
+    assert otlp[0]["status"] == {"code": 2, "message": "HTTP 502"}
+    assert otlp[1]["status"] == {}
+
+
+def test_span_without_trace_is_noop():
+    with span('db.commit') as s:
+        assert s is None
+    assert end_trace() is None
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the validate-at-the-edge / trusted-internally model construction paths.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import datetime
+from uuid import UUID
+
+from data_model.application_model import (EmailMessage, MessageType, apiMessage, generate_conversation_id,
+                                          hatchMessage, twilioSMS)
+from data_model.api_message_handler import APIMessageHandler
+
+
+def test_trusted_matches_validated():
+    fields = dict(to_contact='+15550000001', from_contact='+15550000002', body='Hello', type=MessageType.SMS,
+                  status='delivered', direction='outbound-api', timestamp=datetime(2025, 5, 26, 19, 22, 31))
+    validated = hatchMessage(**fields)
+    trusted = hatchMessage.trusted(id=validated.id, **fields)
+    assert trusted == validated
+    assert trusted.model_dump() == validated.model_dump()
+    # Derived and default fields are filled the same way
+    assert trusted.conversation_id == generate_conversation_id('+15550000001', '+15550000002')
+    assert trusted.num_segments == 1 and trusted.price_unit == 'USD'
+
+
+def test_trusted_defaults_are_per_instance():
+    first = hatchMessage.trusted(to_contact='a', from_contact='b', body='x', type=MessageType.SMS)
+    second = hatchMessage.trusted(to_contact='a', from_contact='b', body='x', type=MessageType.SMS)
+    assert isinstance(first.id, UUID) and first.id != second.id
+    assert isinstance(first.timestamp, datetime)
+    assert 'id' not in first.model_fields_set and 'body' in first.model_fields_set
+
+    email = EmailMessage.trusted(to_contact='a@example.com', from_contact='b@example.com', body='x', subject='s')
+    assert email.type == MessageType.EMAIL and email.cc is None
+
+
+def test_post_init_runs_once_on_validation():
+    assert twilioSMS(to='a', from_='b', body='x').conversation_id == generate_conversation_id('a', 'b')
+    api_msg = apiMessage(**{'to': 'a', 'from': 'b', 'body': 'x', 'type': 'sms', 'direction': 'inbound-api'})
+    assert api_msg.timestamp is not None and api_msg.conversation_id == generate_conversation_id('a', 'b')
+
+    # The handler's trusted conversion stores plain strings, as validation would
+    app_msg = APIMessageHandler.to_application_model(api_msg)
+    assert type(app_msg.status) is str and app_msg.status == 'pending'
+    assert type(app_msg.direction) is str and app_msg.direction == 'inbound-api'
@@ -1,9 +1,15 @@
-from .logger_config import logger, structlog
+from .logger_config import logger, structlog, configure_logging, get_log_queue
 from .logger_config import logging
 from logging import INFO, DEBUG, WARNING, ERROR, CRITICAL
 from .exceptions import SMSServiceError, SMSSendFailedError, ServiceException
+from .config import get_config, hatchConfig
+from .log_sampling import sampler, LogSampler
+from .dates import parse_provider_datetime, to_naive_utc
+from .contacts import normalize_contact, contact_kind, contact_search_term, contact_prefix
+from .ids import uuid7
 
 
-__all__ = ["logger", "logging", "structlog", 
+__all__ = ["logger", "logging", "structlog", "configure_logging", "get_log_queue",
            "INFO", "DEBUG", "WARNING", "ERROR", "CRITICAL",
-           "SMSServiceError", "SMSSendFailedError", "ServiceException"]
\ No newline at end of file
+           "SMSServiceError", "SMSSendFailedError", "ServiceException",
+           "get_config", "hatchConfig", "sampler", "LogSampler", "parse_provider_datetime", "to_naive_utc", "normalize_contact", "contact_kind", "contact_search_term", "contact_prefix", "uuid7"]
\ No newline at end of file
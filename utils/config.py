@@ -0,0 +1,177 @@
+"""
+Application configuration.
+
+Environment files are loaded once per process (`.env`, then `.secrets/.secrets`
+overriding it) and the resulting settings are cached, so modules read
+`get_config()` instead of each calling `dotenv.load_dotenv` at import time.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_environment():
+    """Load .env and .secrets/.secrets into os.environ (secrets take precedence)."""
+    import dotenv
+    dotenv.load_dotenv(PROJECT_ROOT / '.env')
+    dotenv.load_dotenv(PROJECT_ROOT / '.secrets' / '.secrets', override=True)
+
+
+@dataclass(frozen=True)
+class hatchConfig:
+    """Process-wide settings, read from the environment once."""
+
+    # Flask / server
+    flask_host: str
+    flask_port: int
+    flask_env: str
+
+    # PostgreSQL
+    postgres_user: str | None
+    postgres_password: str | None
+    postgres_host: str | None
+    postgres_port: str
+    postgres_db: str | None
+    # Full SQLAlchemy URL; overrides the POSTGRES_* settings when set
+    database_url: str | None
+    # Storage backend: postgres or sqlite (see db/backends.py); inferred from database_url when set
+    db_backend: str | None
+    # SQLite database file for the sqlite backend, or :memory:
+    sqlite_path: str
+    # Postgres connection pool, per worker process
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: int
+    db_pool_recycle: int
+    # Rows per server-side cursor round-trip and per streamed chunk (api/streaming.py)
+    stream_batch_size: int
+
+    # Slow-query log (db/slow_queries.py)
+    slow_query_ms: float
+    slow_query_top: int
+    slow_query_analyze: bool
+    slow_query_explain_interval: float
+
+    # Twilio
+    twilio_sid: str | None
+    twilio_secret: str | None
+    twilio_number: str | None
+    test_number: str | None
+    twilio_api_url: str
+    # Seconds; delivery polling and 429 retries wait base * 2**attempt
+    twilio_backoff_base: float
+
+    # SendGrid
+    sendgrid_token: str | None
+    sendgrid_api_host: str
+
+    # Logging
+    rich_tracebacks: bool
+    log_profile: str
+    # Event name -> keep probability, from the JSON object in HATCH_LOG_SAMPLE_RATES (utils/log_sampling.py)
+    log_sample_rates: dict[str, float]
+    # Seconds during which repeated identical warnings/errors are collapsed
+    log_collapse_window: float
+
+    # Tracing (utils/tracing.py); traces are appended as OTLP/JSON lines when a path is set
+    trace_export_path: str | None
+    service_name: str
+
+    # On-demand CPU profiles (utils/profiling.py)
+    profile_dir: str
+    profile_seconds: float
+    profile_signal: str
+
+    # Provider telemetry ring buffer (providers/telemetry.py); 0 disables the periodic DB flush
+    telemetry_buffer_size: int
+    telemetry_flush_seconds: float
+
+    # Gunicorn (gunicorn.conf.py)
+    gunicorn_workers: int
+    gunicorn_threads: int
+    gunicorn_backlog: int
+    gunicorn_preload: bool
+    gunicorn_max_requests: int
+    gunicorn_max_requests_jitter: int
+    gunicorn_timeout: int
+    gunicorn_graceful_timeout: int
+    gunicorn_keepalive: int
+    gunicorn_access_log: str
+    gunicorn_log_level: str
+
+    # Admin endpoints (/admin/...) are disabled unless a token is configured
+    admin_token: str | None
+
+    @property
+    def is_production(self) -> bool:
+        return self.flask_env == 'production'
+
+    @classmethod
+    def from_environ(cls) -> 'hatchConfig':
+        env = os.environ
+        flask_env = env.get('FLASK_ENV', 'development')
+        return cls(
+            flask_host=env.get('FLASK_HOST', '0.0.0.0'),
+            flask_port=int(env.get('FLASK_PORT', 5000)),
+            flask_env=flask_env,
+            postgres_user=env.get('POSTGRES_USER'),
+            postgres_password=env.get('POSTGRES_PASSWORD'),
+            postgres_host=env.get('POSTGRES_HOST'),
+            postgres_port=env.get('POSTGRES_PORT', '5432'),
+            postgres_db=env.get('POSTGRES_DB'),
+            database_url=env.get('DATABASE_URL'),
+            db_backend=env.get('HATCH_DB_BACKEND'),
+            sqlite_path=env.get('HATCH_SQLITE_PATH', ':memory:'),
+            db_pool_size=int(env.get('DB_POOL_SIZE', 5)),
+            db_max_overflow=int(env.get('DB_MAX_OVERFLOW', 10)),
+            db_pool_timeout=int(env.get('DB_POOL_TIMEOUT', 30)),
+            db_pool_recycle=int(env.get('DB_POOL_RECYCLE', 1800)),
+            stream_batch_size=int(env.get('STREAM_BATCH_SIZE', 500)),
+            slow_query_ms=float(env.get('HATCH_SLOW_QUERY_MS', 200)),
+            slow_query_top=int(env.get('HATCH_SLOW_QUERY_TOP', 50)),
+            slow_query_analyze=env.get('HATCH_SLOW_QUERY_ANALYZE', 'false').lower() == 'true',
+            slow_query_explain_interval=float(env.get('HATCH_SLOW_QUERY_EXPLAIN_INTERVAL', 600)),
+            twilio_sid=env.get('TWILIO_SID'),
+            twilio_secret=env.get('TWILIO_SECRET'),
+            twilio_number=env.get('TWILIO_NUMBER'),
+            test_number=env.get('TEST_NUMBER', env.get('TWILIO_NUMBER')),
+            twilio_api_url=env.get('TWILIO_API_URL', 'https://api.twilio.com/2010-04-01'),
+            twilio_backoff_base=float(env.get('TWILIO_BACKOFF_BASE', 1.0)),
+            sendgrid_token=env.get('SENDGRID_TOKEN'),
+            sendgrid_api_host=env.get('SENDGRID_API_HOST', 'https://api.sendgrid.com'),
+            rich_tracebacks=env.get('HATCH_RICH_TRACEBACKS', 'false' if flask_env == 'production' else 'true').lower() == 'true',
+            log_profile=env.get('HATCH_LOG_PROFILE', 'production' if flask_env == 'production' else 'development'),
+            trace_export_path=env.get('HATCH_TRACE_EXPORT_PATH'),
+            service_name=env.get('HATCH_SERVICE_NAME', 'hatch'),
+            profile_dir=env.get('HATCH_PROFILE_DIR', '/tmp'),
+            profile_seconds=float(env.get('HATCH_PROFILE_SECONDS', 30)),
+            profile_signal=env.get('HATCH_PROFILE_SIGNAL', 'SIGUSR2'),
+            telemetry_buffer_size=int(env.get('HATCH_TELEMETRY_BUFFER_SIZE', 10_000)),
+            telemetry_flush_seconds=float(env.get('HATCH_TELEMETRY_FLUSH_SECONDS', 0)),
+            gunicorn_workers=int(env.get('WEB_CONCURRENCY', (os.cpu_count() or 1) * 2 + 1)),
+            gunicorn_threads=int(env.get('GUNICORN_THREADS', 4)),
+            gunicorn_backlog=int(env.get('GUNICORN_BACKLOG', 2048)),
+            gunicorn_preload=env.get('GUNICORN_PRELOAD', 'true').lower() == 'true',
+            gunicorn_max_requests=int(env.get('GUNICORN_MAX_REQUESTS', 10000)),
+            gunicorn_max_requests_jitter=int(env.get('GUNICORN_MAX_REQUESTS_JITTER', 1000)),
+            gunicorn_timeout=int(env.get('GUNICORN_TIMEOUT', 120)),
+            gunicorn_graceful_timeout=int(env.get('GUNICORN_GRACEFUL_TIMEOUT', 60)),
+            gunicorn_keepalive=int(env.get('GUNICORN_KEEPALIVE', 5)),
+            gunicorn_access_log=env.get('GUNICORN_ACCESS_LOG', '-'),
+            gunicorn_log_level=env.get('GUNICORN_LOG_LEVEL', 'info'),
+            log_sample_rates=json.loads(env.get('HATCH_LOG_SAMPLE_RATES') or '{}'),
+            log_collapse_window=float(env.get('HATCH_LOG_COLLAPSE_WINDOW', 60)),
+            admin_token=env.get('HATCH_ADMIN_TOKEN'),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_config() -> hatchConfig:
+    """Load the environment files on first call and return the cached settings."""
+    load_environment()
+    return hatchConfig.from_environ()
@@ -0,0 +1,83 @@
+"""
+Contact normalisation for conversation IDs.
+
+The same person reaches us as '+1 (833) 345-0761', '8333450761' or
+'+18333450761', and as 'Ian@HapticPaper.com ' or 'ian@hapticpaper.com'.
+Normalising before hashing makes those one conversation from the start, instead
+of splitting the thread and merging it later.
+
+* Phone numbers (digits plus spaces, dots, dashes, parentheses and a leading +)
+  become E.164. A 10-digit number without a country code is taken as NANP (+1),
+  the only region the service sends from.
+* Emails are trimmed and lowercased.
+* Anything else (test names, short codes, channel handles) is only trimmed.
+"""
+
+import re
+
+DEFAULT_COUNTRY_CODE = '1'
+
+_PHONE_CHARS = re.compile(r'\+?[\d\s().\-]+')
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_contact(contact: str) -> str:
+    """
+    Canonical form of a phone number, email address or other contact handle.
+
+    Args:
+        contact (str): Contact as received from a request or provider.
+
+    Returns:
+        str: E.164 for phone numbers, lowercase for emails, otherwise the trimmed input.
+    """
+    contact = contact.strip()
+    if '@' in contact:
+        return contact.lower()
+    if not _PHONE_CHARS.fullmatch(contact):
+        return contact
+    digits = _NON_DIGITS.sub('', contact)
+    if contact.startswith('+'):
+        return f"+{digits}"
+    if len(digits) == 10:
+        return f"+{DEFAULT_COUNTRY_CODE}{digits}"
+    if len(digits) == 11 and digits.startswith(DEFAULT_COUNTRY_CODE):
+        return f"+{digits}"
+    # Short codes and numbers we can't place keep their digits only
+    return digits
+
+
+def contact_kind(contact: str) -> str:
+    """'email', 'phone' or 'other' for a normalised contact."""
+    if '@' in contact:
+        return 'email'
+    if contact[1:].isdigit() if contact.startswith('+') else contact.isdigit():
+        return 'phone'
+    return 'other'
+
+
+def contact_search_term(text: str) -> str:
+    """
+    What to look for in normalised contacts while someone is typing one.
+
+    Phone-like input keeps only its digits, so '(833) 34' finds '+18333450761';
+    anything else is trimmed and lowercased.
+    """
+    text = text.strip()
+    if _PHONE_CHARS.fullmatch(text):
+        return _NON_DIGITS.sub('', text)
+    return text.lower()
+
+
+def contact_prefix(term: str) -> str:
+    """
+    How a normalised contact starts if `term` (from contact_search_term) is its beginning.
+
+    Typed digits are the start of a national number unless they begin with the
+    country code, so '833' ranks '+1833...' as a prefix match.
+    """
+    if not term.isdigit():
+        return term
+    if term.startswith(DEFAULT_COUNTRY_CODE):
+        return f"+{term}"
+    return f"+{DEFAULT_COUNTRY_CODE}{term}"
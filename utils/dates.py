@@ -0,0 +1,44 @@
+"""
+Timestamp parsing for provider payloads.
+
+Twilio sends RFC 2822 dates in message resources ('Mon, 26 May 2025 19:22:31
++0000') and HTTP dates in headers ('Mon, 26 May 2025 19:22:31 GMT'); other
+sources send ISO 8601. The format is picked from the first character instead of
+trying each parser in turn, and results are cached: the same few timestamps
+repeat across a send, its delivery polls and their headers.
+"""
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def parse_provider_datetime(value: str) -> datetime | None:
+    """
+    Parse an RFC 2822/HTTP date or an ISO 8601 timestamp.
+
+    Args:
+        value (str): Timestamp as sent by the provider.
+
+    Returns:
+        datetime | None: The parsed (immutable, shareable) datetime, or None if it is not a recognised format.
+    """
+    if not value:
+        return None
+    try:
+        if value[0].isdigit():
+            return datetime.fromisoformat(value[:-1] + '+00:00' if value[-1] == 'Z' else value)
+        return parsedate_to_datetime(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """
+    The same instant as a naive UTC datetime, so aware and naive timestamps can be compared.
+
+    Provider timestamps are aware, while rows written by the API carry a naive
+    datetime.now(). Naive values are taken as local time, as datetime.astimezone() does.
+    """
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,146 @@
+"""
+Log sampling and rate limiting for high-volume events.
+
+`LogSampler` is a structlog processor with two jobs:
+
+* Sampling: events whose name has a configured rate in [0, 1] are kept with
+  that probability; kept events carry `sample_rate` so counts can be scaled
+  back up downstream.
+* Error collapsing: repeated identical warnings/errors (same event and error
+  text) are passed through once per window; the duplicates in between are
+  dropped and counted. When the window ends the count is reported, either on
+  the next duplicate (`repeated=<count>`) or, if the burst has stopped, as a
+  "Collapsed repeated log events" summary emitted by the next event logged.
+  At most MAX_TRACKED_ERRORS keys are tracked; the oldest are summarised and
+  evicted first. `flush()` emits summaries for anything still pending.
+
+Initial rates and the collapse window come from hatchConfig
+(HATCH_LOG_SAMPLE_RATES, HATCH_LOG_COLLAPSE_WINDOW) and are applied by
+utils.logger_config.configure_logging. Rates can be changed at runtime with
+`set_rate` / `update_rates` (the API exposes this at /admin/log_sampling), no
+restart needed.
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import structlog
+
+# Events logged on every message and email. All are kept by default; lower them
+# with HATCH_LOG_SAMPLE_RATES or /admin/log_sampling when log volume matters.
+# Sampling matches on the event name, so these events keep their values in
+# kwargs rather than formatting them into the name.
+DEFAULT_RATES = {
+    "Message saved to database successfully": 1.0,
+    "Email saved to database successfully": 1.0,
+    "Message sent successfully": 1.0,
+    "Email sent successfully": 1.0,
+    "Email sent successfully via SendGrid": 1.0,
+}
+
+COLLAPSE_LEVELS = frozenset({"warning", "error", "critical", "exception"})
+
+SUMMARY_EVENT = "Collapsed repeated log events"
+
+# Error events often carry the exception text, so keys are bounded
+MAX_TRACKED_ERRORS = 1000
+
+
+class LogSampler:
+    """structlog processor that samples events by name and collapses repeated errors."""
+
+    def __init__(self, rates: dict[str, float] | None = None, collapse_window: float = 60.0,
+                 max_tracked: int = MAX_TRACKED_ERRORS):
+        # key -> [window_start, suppressed_count], oldest window first
+        self._repeats: OrderedDict[tuple, list] = OrderedDict()
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        self.configure(rates, collapse_window)
+
+    def configure(self, rates: dict[str, float] | None = None, collapse_window: float = 60.0):
+        """Reset to DEFAULT_RATES overridden by `rates`, and set the collapse window."""
+        new_rates = dict(DEFAULT_RATES)
+        for event, rate in (rates or {}).items():
+            if not 0.0 <= float(rate) <= 1.0:
+                raise ValueError(f"Sample rate for '{event}' must be between 0 and 1, got {rate}")
+            new_rates[event] = float(rate)
+        self._rates = new_rates
+        self.collapse_window = collapse_window
+
+    # --- Runtime tuning -------------------------------------------------
+
+    def set_rate(self, event: str, rate: float):
+        """Set the keep probability for an event name (1.0 keeps all, 0.0 drops all)."""
+        if not 0.0 <= float(rate) <= 1.0:
+            raise ValueError(f"Sample rate for '{event}' must be between 0 and 1, got {rate}")
+        self._rates = {**self._rates, event: float(rate)}
+
+    def update_rates(self, rates: dict[str, float]):
+        """Validate and apply several rates at once."""
+        for event, rate in rates.items():
+            if not 0.0 <= float(rate) <= 1.0:
+                raise ValueError(f"Sample rate for '{event}' must be between 0 and 1, got {rate}")
+        self._rates = {**self._rates, **{event: float(rate) for event, rate in rates.items()}}
+
+    def get_rates(self) -> dict[str, float]:
+        return dict(self._rates)
+
+    # --- Processor ------------------------------------------------------
+
+    def __call__(self, logger, method_name, event_dict):
+        event = event_dict.get("event")
+
+        rate = self._rates.get(event)
+        if rate is not None and rate < 1.0:
+            if rate <= 0.0 or random.random() >= rate:
+                raise structlog.DropEvent
+            event_dict["sample_rate"] = rate
+
+        now = time.monotonic()
+        with self._lock:
+            if method_name in COLLAPSE_LEVELS and event != SUMMARY_EVENT:
+                key = (event, str(event_dict.get("error", "")))
+                state = self._repeats.get(key)
+                if state is not None and now - state[0] < self.collapse_window:
+                    state[1] += 1
+                    raise structlog.DropEvent
+                if state is not None and state[1]:
+                    event_dict["repeated"] = state[1]
+                    event_dict["repeat_window_seconds"] = round(now - state[0], 1)
+                self._repeats[key] = [now, 0]
+                self._repeats.move_to_end(key)
+            expired = self._expire(now)
+
+        # Logged outside the lock: the summaries run back through this processor
+        if expired:
+            self._summarise(expired)
+        return event_dict
+
+    def _expire(self, now: float) -> list:
+        """Pop keys whose window has ended, or that exceed max_tracked. Caller holds the lock."""
+        expired = []
+        while self._repeats:
+            key, state = next(iter(self._repeats.items()))
+            if len(self._repeats) <= self.max_tracked and now - state[0] < self.collapse_window:
+                break
+            self._repeats.popitem(last=False)
+            if state[1]:
+                expired.append((key, state[1]))
+        return expired
+
+    def _summarise(self, pending, log=None):
+        log = log or structlog.get_logger("log_sampling")
+        for (event, error), count in pending:
+            log.warning(SUMMARY_EVENT, collapsed_event=event, error=error, repeated=count)
+
+    def flush(self, log=None):
+        """Emit a summary for every collapsed error that has pending duplicates."""
+        with self._lock:
+            pending = [(key, state[1]) for key, state in self._repeats.items() if state[1]]
+            self._repeats.clear()
+        self._summarise(pending, log)
+
+# Shared by every logging profile; configure_logging applies the configured rates
+sampler = LogSampler()
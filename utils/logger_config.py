@@ -1,13 +1,27 @@
 
-import structlog
+import atexit
 import logging
-from rich.console import Console
-from rich.traceback import install as rich_traceback_install
+import os
+import logging.handlers
+import queue
+
+import structlog
 from structlog.processors import CallsiteParameter
 
-#better_exceptions.MAX_LENGTH = None
-rich_traceback_install(show_locals=False, width=180, 
-                       extra_lines=3, theme="lightbulb", word_wrap=True)
+from .config import get_config
+from .log_sampling import sampler
+
+
+def install_rich_tracebacks():
+    """Pretty uncaught-exception tracebacks for local development (rich.traceback is slow to import)."""
+    from rich.traceback import install as rich_traceback_install
+    #better_exceptions.MAX_LENGTH = None
+    rich_traceback_install(show_locals=False, width=180, 
+                           extra_lines=3, theme="lightbulb", word_wrap=True)
+
+
+if get_config().rich_tracebacks:
+    install_rich_tracebacks()
 
 def reorder_keys(logger, method_name, event_dict):
     """Custom processor to reorder log keys."""
@@ -35,10 +49,11 @@ def reorder_keys(logger, method_name, event_dict):
     
     return ordered_dict
 
-# Configure structlog to use colorized output for the terminal
-structlog.configure(
-    processors=[
+def development_processors() -> list:
+    """Rich, colorized console output with callsite details, for local development."""
+    return [
         structlog.stdlib.filter_by_level,
+        sampler,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.processors.CallsiteParameterAdder(parameters={CallsiteParameter.FILENAME, CallsiteParameter.FUNC_NAME, CallsiteParameter.LINENO, CallsiteParameter.MODULE}, additional_ignores=None),
@@ -51,18 +66,109 @@ structlog.configure(
                                       sort_keys=False, 
                                     ),
 
-    ],
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
-    context_class=dict,
-    cache_logger_on_first_use=True,
-)
+    ]
+
+
+def production_processors() -> list:
+    """
+    Compact JSON lines for the send/save hot paths: no stack-frame inspection,
+    no key reordering, no colors.
+    """
+    return [
+        structlog.stdlib.filter_by_level,
+        sampler,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+        structlog.processors.format_exc_info,
+        structlog.processors.JSONRenderer(),
+    ]
+
+
+LOG_FORMAT = "%(message)s"
+
+# Background log writer for the production profile
+_log_queue: queue.SimpleQueue | None = None
+_queue_listener: logging.handlers.QueueListener | None = None
+_log_stream = None
+
+
+def get_log_queue() -> queue.SimpleQueue | None:
+    """The queue feeding the background log writer, or None outside the production profile."""
+    return _log_queue
+
+
+def stop_queue_listener():
+    """Flush queued records and stop the background writer thread."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+def configure_logging(profile: str | None = None, stream=None):
+    """
+    Configure structlog and the stdlib root logger, and apply the configured log sampling
+    rates and collapse window to the shared sampler.
+
+    Args:
+        profile (str, optional): 'development' (Rich console) or 'production' (JSON lines written by a
+            background QueueListener thread). Defaults to the HATCH_LOG_PROFILE config setting.
+        stream (optional): Output stream, stderr by default.
+    """
+    global _log_queue, _queue_listener, _log_stream
+    config = get_config()
+    profile = profile or config.log_profile
+    sampler.configure(config.log_sample_rates, config.log_collapse_window)
+    stop_queue_listener()
+    _log_stream = stream
+
+    if profile == 'production':
+        processors = production_processors()
+        # The structlog chain (including JSONRenderer) still runs on the calling thread, and
+        # QueueHandler.prepare() applies the trivial %(message)s format there too. Only the
+        # stream write and its lock move to the listener thread, so a slow stderr or pipe
+        # no longer stalls requests.
+        _log_queue = queue.SimpleQueue()
+        output = logging.StreamHandler(stream)
+        output.setFormatter(logging.Formatter(LOG_FORMAT))
+        _queue_listener = logging.handlers.QueueListener(_log_queue, output, respect_handler_level=False)
+        _queue_listener.start()
+        handler = logging.handlers.QueueHandler(_log_queue)
+    else:
+        processors = development_processors()
+        _log_queue = None
+        handler = logging.StreamHandler(stream)
+
+    structlog.configure(
+        processors=processors,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        context_class=dict,
+        cache_logger_on_first_use=True,
+    )
+
+    # Disable colorized output for the text logs
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, handlers=[handler], force=True)
+
+
+def _restart_queue_listener_after_fork():
+    """The listener thread does not survive fork(); preforked workers need their own."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener = None
+        configure_logging('production', stream=_log_stream)
+
 
-# Disable colorized output for the text logs
-logging.basicConfig(level=logging.INFO, format="%(message)s")
+configure_logging()
+atexit.register(stop_queue_listener)
+# atexit runs last-registered first: summarize collapsed errors before the writer stops
+atexit.register(sampler.flush)
+os.register_at_fork(after_in_child=_restart_queue_listener_after_fork)
 
 logger = structlog.get_logger()
 
 
 if __name__=="__main__":
-    logger.info("Logging configured successfully.")
\ No newline at end of file
+    logger.info("Logging configured successfully.")
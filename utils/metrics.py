@@ -0,0 +1,372 @@
+"""
+In-process metrics: counters, callback gauges and HDR-style latency histograms,
+rendered in the Prometheus text exposition format.
+
+The hot path is lock-free: every thread records into its own shard (a plain
+list it alone writes to), and shards are only summed when metrics are scraped.
+A lock is taken once per (series, thread) to register the shard, when the thread
+exits (its counts are folded into the series' base shard and the shard dropped,
+so thread-per-request servers don't grow the shard list), and on scrape.
+
+Histograms use log-linear buckets over integer microseconds: 16 linear buckets
+below 16us, then 8 sub-buckets per power of two, which bounds the relative
+error of any recorded value (and of percentiles) to about 6%.
+
+Metrics are per process; under Gunicorn each worker serves its own /metrics.
+"""
+
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+# --- Log-linear bucket layout -----------------------------------------------
+
+_LINEAR = 16           # values below this many microseconds get one bucket each
+_SUB_BUCKETS = 8       # sub-buckets per power of two above that
+_MAX_BUCKETS = 256     # covers ~10^19 us; anything above is clamped into the last bucket
+
+# Cumulative `le` bounds (seconds) exported to Prometheus, derived from the fine buckets
+EXPORT_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def bucket_index(microseconds: int) -> int:
+    """Fine bucket index for a non-negative duration in microseconds."""
+    if microseconds < _LINEAR:
+        return max(microseconds, 0)
+    exponent = microseconds.bit_length() - 4
+    mantissa = microseconds >> exponent          # in [8, 15]
+    index = _LINEAR + (exponent - 1) * _SUB_BUCKETS + (mantissa - _SUB_BUCKETS)
+    return index if index < _MAX_BUCKETS else _MAX_BUCKETS - 1
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Exclusive upper bound of a fine bucket, in microseconds."""
+    if index < _LINEAR:
+        return index + 1
+    k = index - _LINEAR
+    exponent = k // _SUB_BUCKETS + 1
+    mantissa = k % _SUB_BUCKETS + _SUB_BUCKETS
+    return (mantissa + 1) << exponent
+
+
+def bucket_lower_bound(index: int) -> int:
+    """Inclusive lower bound of a fine bucket, in microseconds."""
+    if index < _LINEAR:
+        return index
+    k = index - _LINEAR
+    return (k % _SUB_BUCKETS + _SUB_BUCKETS) << (k // _SUB_BUCKETS + 1)
+
+
+def percentile_from_counts(counts: list[int], q: float) -> float | None:
+    """Approximate q-quantile (0..1), in seconds, from fine bucket counts (bucket midpoint)."""
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0
+    index = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if count and seen >= rank:
+            break
+    return (bucket_lower_bound(index) + bucket_upper_bound(index)) / 2 / 1_000_000
+
+
+def _label_string(labelnames: tuple, labelvalues: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+# --- Series -------------------------------------------------------------------
+
+class _ShardOwner:
+    """Held only by one thread's local storage; it is freed, and its shard retired, when the thread exits."""
+    __slots__ = ('shard', '__weakref__')
+
+    def __init__(self, shard: list):
+        self.shard = shard
+
+
+class _ShardedSeries:
+    """Base for a single labelled series whose state is sharded per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        # Counts of threads that have exited, then one shard per live thread (keyed by id)
+        self._base = self._new_shard()
+        self._shards: dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> list:
+        raise NotImplementedError
+
+    def _shard(self) -> list:
+        try:
+            return self._local.owner.shard
+        except AttributeError:
+            shard = self._new_shard()
+            with self._lock:
+                self._shards[id(shard)] = shard
+            owner = self._local.owner = _ShardOwner(shard)
+            finalizer = weakref.finalize(owner, self._retire, shard)
+            finalizer.atexit = False
+            return shard
+
+    def _retire(self, shard: list):
+        """Fold an exited thread's shard into the base shard and forget it."""
+        with self._lock:
+            for index, value in enumerate(shard):
+                self._base[index] += value
+            del self._shards[id(shard)]
+
+    def shard_count(self) -> int:
+        """Live per-thread shards (exited threads' shards have been folded away)."""
+        with self._lock:
+            return len(self._shards)
+
+    def _merged(self) -> list:
+        """Element-wise sum of the base and every live shard, taken under the lock so a shard is
+        never counted both in the base and on its own while it is being retired."""
+        with self._lock:
+            merged = list(self._base)
+            for shard in self._shards.values():
+                for index, value in enumerate(shard):
+                    merged[index] += value
+        return merged
+
+
+class CounterSeries(_ShardedSeries):
+    def _new_shard(self):
+        return [0.0]
+
+    def inc(self, amount: float = 1.0):
+        self._shard()[0] += amount
+
+    def value(self) -> float:
+        return self._merged()[0]
+
+
+class HistogramSeries(_ShardedSeries):
+    def _new_shard(self):
+        # [fine bucket counts..., sum of seconds]
+        return [0] * _MAX_BUCKETS + [0.0]
+
+    def observe(self, seconds: float):
+        shard = self._shard()
+        shard[bucket_index(int(seconds * 1_000_000))] += 1
+        shard[_MAX_BUCKETS] += seconds
+
+    def counts(self) -> tuple[list[int], float]:
+        """Merged fine bucket counts and the sum of observations."""
+        merged = self._merged()
+        return merged[:_MAX_BUCKETS], merged[_MAX_BUCKETS]
+
+    def percentile(self, q: float) -> float | None:
+        return percentile_from_counts(self.counts()[0], q)
+
+
+# --- Metric families ------------------------------------------------------------
+
+class _Metric:
+    series_class = None
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: dict[tuple, _ShardedSeries] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labelvalues, **labelkwargs):
+        """Return the series for a label set, creating it on first use."""
+        if labelkwargs:
+            labelvalues = tuple(str(labelkwargs[name]) for name in self.labelnames)
+        else:
+            labelvalues = tuple(str(value) for value in labelvalues)
+        series = self._series.get(labelvalues)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labelvalues, self.series_class())
+        return series
+
+    def _items(self):
+        with self._lock:
+            return list(self._series.items())
+
+
+class Counter(_Metric):
+    series_class = CounterSeries
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.labels(**labels).inc(amount)
+
+    def render(self) -> list[str]:
+        lines = []
+        for labelvalues, series in self._items():
+            lines.append(f"{self.name}{_label_string(self.labelnames, labelvalues)} {series.value()}")
+        return lines
+
+
+class Histogram(_Metric):
+    series_class = HistogramSeries
+    type_name = 'histogram'
+
+    def observe(self, seconds: float, **labels):
+        self.labels(**labels).observe(seconds)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.labels(**labels).observe(time.perf_counter() - start)
+
+    def render(self) -> list[str]:
+        lines = []
+        for labelvalues, series in self._items():
+            counts, total_seconds = series.counts()
+            cumulative = 0
+            index = 0
+            for bound in EXPORT_BOUNDS:
+                bound_us = bound * 1_000_000
+                while index < _MAX_BUCKETS and bucket_upper_bound(index) <= bound_us:
+                    cumulative += counts[index]
+                    index += 1
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_string(self.labelnames, labelvalues, le)} {cumulative}")
+            total = sum(counts)
+            labels = _label_string(self.labelnames, labelvalues)
+            inf = _label_string(self.labelnames, labelvalues, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {total}")
+            lines.append(f"{self.name}_sum{labels} {total_seconds}")
+            lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge whose value(s) are read from a callback at scrape time."""
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float | dict | None], labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def render(self) -> list[str]:
+        value = self.callback()
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return [f"{self.name}{_label_string(self.labelnames, labelvalues if isinstance(labelvalues, tuple) else (labelvalues,))} {v}"
+                    for labelvalues, v in value.items()]
+        return [f"{self.name} {value}"]
+
+
+# --- Registry -------------------------------------------------------------------
+
+class MetricsRegistry:
+    """Holds every metric family and renders them for /metrics."""
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames))
+
+    def gauge_callback(self, name: str, documentation: str, callback, labelnames: Iterable[str] = ()) -> CallbackGauge:
+        return self._register(CallbackGauge(name, documentation, callback, labelnames))
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.render()
+            except Exception:
+                # A failing gauge callback must not break the whole scrape
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# --- Application metrics --------------------------------------------------------
+
+http_requests_total = registry.counter(
+    'hatch_http_requests_total', 'HTTP requests by route, method and status.', ('route', 'method', 'status'))
+http_request_duration = registry.histogram(
+    'hatch_http_request_duration_seconds', 'Time to response headers by route and method.', ('route', 'method'))
+db_statement_duration = registry.histogram(
+    'hatch_db_statement_duration_seconds', 'SQL statement execution time by statement class.', ('statement',))
+db_statement_errors_total = registry.counter(
+    'hatch_db_statement_errors_total', 'Failed SQL statements by statement class.', ('statement',))
+provider_request_duration = registry.histogram(
+    'hatch_provider_request_duration_seconds', 'Outbound provider call latency.', ('provider', 'operation', 'outcome'))
+
+
+def _log_queue_depth():
+    from utils.logger_config import get_log_queue
+    log_queue = get_log_queue()
+    return log_queue.qsize() if log_queue is not None else None
+
+
+registry.gauge_callback('hatch_log_queue_depth', 'Records waiting for the background log writer.', _log_queue_depth)
+
+
+class providerCall:
+    """Outcome label for one timed provider call; callers mark HTTP failures that did not raise."""
+    __slots__ = ('outcome',)
+
+    def __init__(self):
+        self.outcome = 'ok'
+
+    def record_status(self, status_code: int):
+        """Label the call an error when the provider answered with status >= 400."""
+        if status_code >= 400:
+            self.outcome = 'error'
+
+
+@contextmanager
+def time_provider_call(provider: str, operation: str):
+    """
+    Record a provider call's latency, labelled ok/error.
+
+    The call is an error if the block raises, or if the caller passes an error
+    status to the yielded providerCall's record_status (e.g. a 429 or 5xx
+    that the HTTP client returned rather than raised).
+    """
+    start = time.perf_counter()
+    call = providerCall()
+    try:
+        yield call
+    except BaseException:
+        call.outcome = 'error'
+        raise
+    finally:
+        provider_request_duration.labels(provider, operation, call.outcome).observe(time.perf_counter() - start)
@@ -0,0 +1,232 @@
+"""
+On-demand profiling for running workers.
+
+CPU: a sampling profiler that reads every thread's current frame via
+`sys._current_frames()` at a fixed interval, from a separate thread. Nothing is
+installed into the interpreter (no sys.setprofile), so overhead is limited to
+the sampler's own wakeups and only while a profile is running. Output is
+collapsed stacks ("frame;frame;frame count" per line), the input format of
+flamegraph.pl, speedscope and inferno.
+
+Memory: tracemalloc start/snapshot/diff, to compare allocations between two
+points in a long-lived worker and find what keeps growing.
+
+Both are reachable through the admin blueprint (/admin/profile/...). A signal
+(HATCH_PROFILE_SIGNAL, default SIGUSR2) can also start a CPU profile that is
+written to HATCH_PROFILE_DIR; see install_profile_signal_handler.
+"""
+
+import gc
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from .config import get_config
+from .logger_config import logger
+
+l = logger
+
+PROFILE_DIR = get_config().profile_dir
+PROFILE_SIGNAL_SECONDS = get_config().profile_seconds
+MAX_PROFILE_SECONDS = 60.0
+MAX_SNAPSHOTS = 10
+
+# One CPU profile at a time per process
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a CPU profile is already running in this process."""
+
+
+# --- CPU sampling ------------------------------------------------------------
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    labels.reverse()
+    return ';'.join(labels)
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, include_idle: bool = False) -> tuple[Counter, int]:
+    """
+    Sample every other thread's stack for `seconds`.
+
+    Args:
+        seconds (float): How long to sample, capped at MAX_PROFILE_SECONDS.
+        interval (float): Seconds between samples (default 5 ms, ~200 Hz).
+        include_idle (bool): Keep stacks of threads parked in the server's idle waits.
+
+    Returns:
+        tuple[Counter, int]: Collapsed stack -> sample count, and the number of sampling passes.
+
+    Raises:
+        ProfilerBusy: If another profile is already running in this process.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A CPU profile is already running in this process")
+    try:
+        seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+        own_id = threading.get_ident()
+        stacks: Counter = Counter()
+        passes = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+                stacks[_collapse(frame, names.get(thread_id, str(thread_id)))] += 1
+            passes += 1
+            time.sleep(interval)
+        return stacks, passes
+    finally:
+        _profile_lock.release()
+
+
+# Leaf functions where worker and helper threads block while doing nothing
+_IDLE_LEAVES = frozenset({'wait', 'select', 'poll', 'accept', '_wait_for_tstate_lock', 'sleep', 'get'})
+_IDLE_FILES = frozenset({'threading.py', 'selectors.py', 'queue.py', 'socket.py', 'socketserver.py'})
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return code.co_name in _IDLE_LEAVES and os.path.basename(code.co_filename) in _IDLE_FILES
+
+
+def collapsed_text(stacks: Counter) -> str:
+    """Render sampled stacks as collapsed lines, most frequent first."""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def write_profile(seconds: float = PROFILE_SIGNAL_SECONDS, directory: str = PROFILE_DIR) -> str | None:
+    """Profile this process and write collapsed stacks to a file; returns the path."""
+    try:
+        stacks, passes = sample_stacks(seconds)
+    except ProfilerBusy:
+        l.warning("CPU profile already running; signal ignored", pid=os.getpid())
+        return None
+    path = os.path.join(directory, f"cpu-{os.getpid()}-{int(time.time())}.folded")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(collapsed_text(stacks))
+    l.info("CPU profile written", path=path, seconds=seconds, passes=passes, stacks=len(stacks))
+    return path
+
+
+def install_profile_signal_handler(signum: int | None = None):
+    """
+    Start a background CPU profile when the process receives `signum`.
+
+    Call from the main thread after the server has installed its own handlers
+    (Gunicorn's post_worker_init). Defaults to HATCH_PROFILE_SIGNAL or SIGUSR2;
+    SIGUSR1 is taken by Gunicorn for log reopening.
+    """
+    if signum is None:
+        signum = getattr(signal, get_config().profile_signal)
+
+    def _handler(received, frame):
+        # Never sample from inside the signal handler; it runs on the main thread
+        threading.Thread(target=write_profile, name='cpu-profile', daemon=True).start()
+
+    signal.signal(signum, _handler)
+    l.info("CPU profile signal handler installed", signal=signal.Signals(signum).name, pid=os.getpid())
+
+
+# --- tracemalloc ---------------------------------------------------------------
+
+_snapshots: dict[int, tuple[float, tracemalloc.Snapshot]] = {}
+_snapshot_ids = iter(range(1, sys.maxsize))
+_snapshot_lock = threading.Lock()
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def start_tracemalloc(frames: int = 10) -> dict:
+    """Start tracing allocations (if not already) keeping `frames` frames per traceback."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return memory_status()
+
+
+def stop_tracemalloc() -> dict:
+    """Stop tracing and drop stored snapshots."""
+    tracemalloc.stop()
+    with _snapshot_lock:
+        _snapshots.clear()
+    return memory_status()
+
+
+def memory_status() -> dict:
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    with _snapshot_lock:
+        snapshot_ids = sorted(_snapshots)
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "traceback_frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "snapshots": snapshot_ids,
+    }
+
+
+def take_snapshot() -> int:
+    """Store a filtered snapshot and return its id; the oldest is dropped past MAX_SNAPSHOTS."""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running; start it first")
+    # Collect cyclic garbage first so it is not reported as growth between snapshots
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+    with _snapshot_lock:
+        snapshot_id = next(_snapshot_ids)
+        _snapshots[snapshot_id] = (time.time(), snapshot)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            del _snapshots[min(_snapshots)]
+    return snapshot_id
+
+
+def diff_snapshots(from_id: int, to_id: int, key_type: str = 'lineno', limit: int = 25) -> list[dict]:
+    """
+    Largest allocation changes between two stored snapshots.
+
+    Args:
+        from_id (int): Earlier snapshot id.
+        to_id (int): Later snapshot id.
+        key_type (str): 'lineno', 'filename' or 'traceback'.
+        limit (int): Number of entries to return.
+
+    Returns:
+        list[dict]: Entries sorted by absolute size growth.
+
+    Raises:
+        KeyError: If either snapshot id is unknown.
+    """
+    with _snapshot_lock:
+        _, older = _snapshots[from_id]
+        _, newer = _snapshots[to_id]
+    stats = newer.compare_to(older, key_type)
+    return [{
+        "location": stat.traceback.format() if key_type == 'traceback' else str(stat.traceback),
+        "size_diff_bytes": stat.size_diff,
+        "size_bytes": stat.size,
+        "count_diff": stat.count_diff,
+        "count": stat.count,
+    } for stat in stats[:limit]]
@@ -0,0 +1,229 @@
+"""
+Lightweight request-scoped tracing.
+
+A trace is started per HTTP request (see the hooks in api/api.py) and held in a
+context variable, so any code running for that request can open a span without
+passing anything around:
+
+    with span('twilio.post', sid=sid):
+        ...
+
+Outside a trace (scripts, tests, background threads) `span` is a no-op.
+
+When the trace ends its spans are:
+
+* summarised into a `Server-Timing` header (durations summed per span name,
+  so polling loops show up as one entry with a call count), and
+* if HATCH_TRACE_EXPORT_PATH is set, appended to that file as one line of
+  OTLP/JSON (an ExportTraceServiceRequest per trace), the format read by the
+  OpenTelemetry Collector's `otlpjsonfile` receiver.
+"""
+
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .config import get_config
+
+TRACE_EXPORT_PATH = get_config().trace_export_path
+SERVICE_NAME = get_config().service_name
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+_SERVER_TIMING_UNSAFE = re.compile(r'[^A-Za-z0-9_.\-]')
+
+
+class traceSpan:
+    """One timed stage of a request."""
+    __slots__ = ('name', 'span_id', 'parent_id', 'kind', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, name: str, parent_id: str | None, kind: int = SPAN_KIND_INTERNAL, attributes: dict | None = None):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes or {}
+        self.error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1_000_000
+
+
+class requestTrace:
+    """All spans recorded for one request; the root span covers the whole request."""
+
+    def __init__(self, name: str, attributes: dict | None = None):
+        self.trace_id = secrets.token_hex(16)
+        self.root = traceSpan(name, None, SPAN_KIND_SERVER, attributes)
+        self.spans: list[traceSpan] = [self.root]
+        self.finished = False
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: per-name total duration, plus the request total."""
+        totals: dict[str, list] = {}
+        for s in self.spans[1:]:
+            entry = totals.setdefault(s.name, [0.0, 0])
+            entry[0] += s.duration_ms
+            entry[1] += 1
+        parts = []
+        for name, (duration, count) in totals.items():
+            metric = _SERVER_TIMING_UNSAFE.sub('_', name)
+            part = f"{metric};dur={duration:.1f}"
+            if count > 1:
+                part += f';desc="x{count}"'
+            parts.append(part)
+        parts.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ', '.join(parts)
+
+    def to_otlp(self) -> dict:
+        """This trace as an OTLP/JSON ExportTraceServiceRequest."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute('service.name', SERVICE_NAME),
+                                            _otlp_attribute('process.pid', os.getpid())]},
+                "scopeSpans": [{
+                    "scope": {"name": "hatch.tracing"},
+                    "spans": [self._otlp_span(s) for s in self.spans],
+                }],
+            }]
+        }
+
+    def _otlp_span(self, s: traceSpan) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(k, v) for k, v in s.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": s.error} if s.error else {},
+        }
+        if s.parent_id:
+            span["parentSpanId"] = s.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+_current_trace: ContextVar[requestTrace | None] = ContextVar('hatch_trace', default=None)
+_current_span: ContextVar[traceSpan | None] = ContextVar('hatch_span', default=None)
+
+
+def start_trace(name: str, **attributes) -> requestTrace:
+    """Begin a trace for the current request and make its root span current."""
+    trace = requestTrace(name, attributes)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+
+def current_trace() -> requestTrace | None:
+    return _current_trace.get()
+
+
+def end_trace(status_code: int | None = None) -> requestTrace | None:
+    """
+    Finish the current trace, export it if configured, and clear it from the context.
+
+    Args:
+        status_code (int): HTTP status to attach to the root span; 5xx marks it as an error.
+
+    Returns:
+        requestTrace: The finished trace, or None if there was none (or it already ended).
+    """
+    trace = _current_trace.get()
+    _current_trace.set(None)
+    _current_span.set(None)
+    if trace is None or trace.finished:
+        return None
+    trace.finished = True
+    trace.root.end_ns = time.time_ns()
+    if status_code is not None:
+        trace.root.attributes['http.status_code'] = status_code
+        if status_code >= 500:
+            trace.root.error = f"HTTP {status_code}"
+    if TRACE_EXPORT_PATH:
+        exporter.export(trace)
+    return trace
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """
+    Time a stage of the current request as a child of the current span.
+
+    Yields the span (or None outside a trace) so callers can add attributes.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    s = traceSpan(name, parent.span_id if parent else None, kind, attributes)
+    trace.spans.append(s)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes):
+    """Add an already-timed span (wall-clock ns) under the current span; no-op outside a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    s = traceSpan(name, parent.span_id if parent else None, SPAN_KIND_CLIENT, attributes)
+    s.start_ns = start_ns
+    s.end_ns = end_ns
+    trace.spans.append(s)
+
+
+class otlpFileExporter:
+    """Appends finished traces to a file as OTLP/JSON lines; one file handle per process."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def export(self, trace: requestTrace):
+        line = json.dumps(trace.to_otlp(), separators=(',', ':'))
+        with self._lock:
+            if self._file is None or self._pid != os.getpid():
+                # Reopen after fork so workers don't share a buffered handle with the parent
+                self._file = open(self.path, 'a', buffering=1, encoding='utf-8')
+                self._pid = os.getpid()
+            self._file.write(line + '\n')
+
+
+exporter = otlpFileExporter(TRACE_EXPORT_PATH)